@@ -1,18 +1,62 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.services.query_service import QueryService
+from app.core.services.async_query_service import AsyncQueryService
+from app.core.index.vector_index import VectorIndex, get_chunk_index, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
+from app.core.index.sharding import ShardedIndex, get_sharded_index
 
 from app.infrastructure.persistence.db.session import get_db
+from app.infrastructure.persistence.db.async_session import get_async_db
 from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.repositories.chunk_repository import ChunkRepository
+from app.infrastructure.persistence.repositories.async_document_repository import AsyncDocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
 
 from app.core.services.embedding_service import EmbeddingService, get_embedding_service
 
-def get_document_repository(db: Session = Depends(get_db)) -> DocumentRepository:
-    return DocumentRepository(db)
+def get_document_repository(
+    db: Session = Depends(get_db),
+    vector_store: MmapVectorStore | None = Depends(get_vector_store),
+) -> DocumentRepository:
+    return DocumentRepository(db, vector_store=vector_store)
 
 def get_query_service(
+    db: Session = Depends(get_db),
     repo: DocumentRepository = Depends(get_document_repository),
     embedding_service: EmbeddingService = Depends(get_embedding_service),
+    index: VectorIndex = Depends(get_vector_index),
+    chunk_index: VectorIndex = Depends(get_chunk_index),
+    lexical_index: BM25Index = Depends(get_lexical_index),
+    shards: ShardedIndex | None = Depends(get_sharded_index),
 ) -> QueryService:
-    return QueryService(repo=repo, embedding_service=embedding_service)
\ No newline at end of file
+    return QueryService(
+        repo=repo,
+        embedding_service=embedding_service,
+        index=index,
+        chunk_index=chunk_index,
+        chunk_repo=ChunkRepository(db),
+        lexical_index=lexical_index,
+        shards=shards,
+    )
+
+def get_async_document_repository(
+    db: AsyncSession = Depends(get_async_db),
+    vector_store: MmapVectorStore | None = Depends(get_vector_store),
+    sync_db: Session = Depends(get_db),
+) -> AsyncDocumentRepository:
+    # A sessão síncrona só abre conexão se um índice residente ainda precisar ser carregado
+    return AsyncDocumentRepository(db, vector_store=vector_store, sync_db=sync_db)
+
+def get_async_query_service(
+    repo: AsyncDocumentRepository = Depends(get_async_document_repository),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    index: VectorIndex = Depends(get_vector_index),
+    lexical_index: BM25Index = Depends(get_lexical_index),
+    shards: ShardedIndex | None = Depends(get_sharded_index),
+) -> AsyncQueryService:
+    return AsyncQueryService(
+        repo=repo, embedding_service=embedding_service, index=index, lexical_index=lexical_index, shards=shards
+    )
@@ -1,8 +1,13 @@
-from pydantic import BaseModel
+from typing import Dict, List
+from pydantic import BaseModel, Field, StrictBool, StrictFloat, StrictInt, StrictStr
+
+# bool antes de int: sem Strict* o pydantic converteria true em 1
+AttributeValue = StrictStr | StrictBool | StrictInt | StrictFloat
 
 class DocumentBase(BaseModel):
     title: str
     content: str
+    metadata: Dict[str, AttributeValue] = Field(default_factory=dict)
 
 class DocumentCreate(DocumentBase):
     pass
@@ -10,9 +15,19 @@ class DocumentCreate(DocumentBase):
 class DocumentRead(DocumentBase):
     id: int
 
+class DocumentSummary(BaseModel):
+    id: int
+    title: str
+
+class DocumentIds(BaseModel):
+    ids: List[int]
+
 class DocumentQueryResult(BaseModel):
     id: int
     title: str
     score: float
+    # Trecho do conteúdo que mais casou com a consulta, quando há chunks
+    chunk_start: int | None = None
+    chunk_end: int | None = None
 
 
@@ -0,0 +1,16 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class JobCreated(BaseModel):
+    id: int
+    status: str
+    total: int
+
+class JobRead(JobCreated):
+    processed: int
+    cached: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    docs_per_second: float | None = None
@@ -1,11 +1,68 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List
 from app.api.schemas.document import DocumentQueryResult
+from app.core.index.attributes import validate_filter
+from app.core.index.engines import SEARCH_ENGINES
+from app.core.index.fusion import FUSIONS, SEARCH_MODES
+from app.infrastructure.settings import settings
 
 class QueryRequest(BaseModel):
     query: str
     top_k: int | None = None
+    nprobe: int | None = Field(default=None, ge=1)
+    ef_search: int | None = Field(default=None, ge=1)
+    engine: str | None = None
+    mode: str | None = None
+    fusion: str | None = None
+    alpha: float | None = Field(default=None, ge=0.0, le=1.0)
+    prefilter: bool = False
+    must_match: str | None = Field(default=None, min_length=1)
+    filter: Dict[str, Any] | None = None
+
+    @field_validator("engine")
+    @classmethod
+    def validate_engine(cls, value: str | None) -> str | None:
+        if value is not None and value not in SEARCH_ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(SEARCH_ENGINES)}")
+        return value
+
+    @field_validator("mode")
+    @classmethod
+    def validate_mode(cls, value: str | None) -> str | None:
+        if value is not None and value not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        return value
+
+    @field_validator("fusion")
+    @classmethod
+    def validate_fusion(cls, value: str | None) -> str | None:
+        if value is not None and value not in FUSIONS:
+            raise ValueError(f"fusion must be one of {', '.join(FUSIONS)}")
+        return value
+
+    @field_validator("filter")
+    @classmethod
+    def validate_filter(cls, value: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        return None if value is None else validate_filter(value)
 
 class QueryResponse(BaseModel):
     query: str
-    results: List[DocumentQueryResult]
\ No newline at end of file
+    results: List[DocumentQueryResult]
+
+class BatchQueryItem(BaseModel):
+    query: str
+    top_k: int | None = Field(default=None, ge=1)
+
+class BatchQueryRequest(BaseModel):
+    queries: List[BatchQueryItem] = Field(min_length=1, max_length=settings.batch_query_max_queries)
+    nprobe: int | None = Field(default=None, ge=1)
+    ef_search: int | None = Field(default=None, ge=1)
+    engine: str | None = None
+
+    @field_validator("engine")
+    @classmethod
+    def validate_engine(cls, value: str | None) -> str | None:
+        return QueryRequest.validate_engine(value)
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
\ No newline at end of file
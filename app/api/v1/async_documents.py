@@ -0,0 +1,107 @@
+import json
+import logging
+from typing import AsyncIterator, List, Union
+from fastapi import status, APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.document import DocumentIds, DocumentRead, DocumentCreate, DocumentSummary
+
+from app.core.services.embedding_service import EmbeddingService, get_embedding_service
+from app.core.services.ingestion_service import AsyncIngestionService
+from app.core.mappers.document_mapper import DocumentMapper
+from app.core.index.vector_index import VectorIndex, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
+from app.core.index.sharding import ShardedIndex, get_sharded_index
+
+from app.infrastructure.persistence.db.async_session import get_async_db
+from app.infrastructure.persistence.repositories.async_document_repository import AsyncDocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
+from app.infrastructure.settings import settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
+
+
+async def json_array(rows, batch_size: int) -> AsyncIterator[str]:
+    '''Encode rows as one JSON array, emitted `batch_size` rows per chunk.'''
+    yield "["
+    batch: List[str] = []
+    separator = ""
+    async for row in rows:
+        batch.append(json.dumps(row._asdict()))
+        if len(batch) >= batch_size:
+            yield separator + ",".join(batch)
+            separator, batch = ",", []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]"
+
+
+# Endpoint to create multiple documents
+@router.post(
+    "/",
+    response_model=Union[List[DocumentRead], DocumentIds],
+    status_code=status.HTTP_201_CREATED
+)
+async def create_document(
+    payload: List[DocumentCreate],
+    response: Response,
+    ids_only: bool = Query(False, description="Return only the new ids instead of the full documents"),
+    db: AsyncSession = Depends(get_async_db),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    index: VectorIndex = Depends(get_vector_index),
+    vector_store: MmapVectorStore | None = Depends(get_vector_store),
+    lexical_index: BM25Index = Depends(get_lexical_index),
+    shards: ShardedIndex | None = Depends(get_sharded_index),
+):
+    '''Create multiple documents through the AsyncSession; only the encode uses the inference pool.'''
+    logger.info(f"Creating {len(payload)} documents")
+    service = AsyncIngestionService(
+        db, embedding_service, index, vector_store=vector_store, lexical_index=lexical_index, shards=shards,
+    )
+    saved_docs, cached = await service.ingest(payload)
+    response.headers["X-Embeddings-Cached"] = str(cached)
+    logger.info(f"Successfully created {len(saved_docs)} documents, {cached} embeddings from cache")
+    if ids_only:
+        return DocumentIds(ids=[doc.id for doc in saved_docs])
+    return [DocumentMapper.to_read(doc) for doc in saved_docs]
+
+# Endpoint to list documents page by page
+@router.get("/", response_model=Union[List[DocumentRead], List[DocumentSummary]])
+async def list_documents(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=settings.list_max_page_size, description="Page size"),
+    after: int | None = Query(None, ge=0, description="Return documents with an id greater than this cursor"),
+    include_content: bool = Query(True, description="Include the document content"),
+    stream: bool = Query(False, description="Stream every document after the cursor as one JSON array"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    '''List documents ordered by id using keyset pagination (see the sync router).'''
+    repo = AsyncDocumentRepository(db)
+    if stream:
+        logger.info(f"Streaming documents after {after}")
+        rows = repo.iter_rows(after, limit, include_content, settings.list_stream_batch_size)
+        return StreamingResponse(json_array(rows, settings.list_stream_batch_size), media_type="application/json")
+    limit = limit or settings.list_page_size
+    logger.info(f"Listing {limit} documents after {after}")
+    rows = await repo.list_page(limit, after, include_content)
+    logger.debug(f"Found {len(rows)} documents")
+    if len(rows) == limit:
+        response.headers["X-Next-After"] = str(rows[-1].id)
+    return [DocumentMapper.to_listing(row) for row in rows]
+
+# Endpoint to get a document by ID
+@router.get("/{document_id}", response_model=DocumentRead)
+async def get_document(
+    document_id: int,
+    db: AsyncSession = Depends(get_async_db),
+):
+    '''Get a document by its ID.'''
+    logger.info(f"Retrieving document with id: {document_id}")
+    document = await AsyncDocumentRepository(db).get_by_id(document_id)
+    if document is None:
+        logger.warning(f"Document not found: {document_id}")
+        raise HTTPException(status_code=404, detail="Document not found")
+    logger.debug(f"Found document: {document.title}")
+    return DocumentMapper.to_read(document)
@@ -0,0 +1,72 @@
+import logging
+from time import time
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps import get_async_query_service
+from app.api.schemas.query import BatchQueryRequest, BatchQueryResponse, QueryResponse, QueryRequest
+from app.core.services.async_query_service import AsyncQueryService
+from app.infrastructure.persistence.db.fts import FullTextUnavailableError
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/query", tags=["query"])
+
+
+@router.get("/", response_model=QueryResponse)
+async def query_documents(
+    payload: QueryRequest,
+    query_service: AsyncQueryService = Depends(get_async_query_service),
+):
+    '''Perform a semantic search query without blocking the event loop.'''
+    logger.info(f"Received query: '{payload.query}' with top_k={payload.top_k}")
+    start_time = time()
+
+    try:
+        results = await query_service.search(
+            payload.query,
+            payload.top_k,
+            nprobe=payload.nprobe,
+            ef_search=payload.ef_search,
+            engine=payload.engine,
+            mode=payload.mode,
+            fusion=payload.fusion,
+            alpha=payload.alpha,
+            prefilter=payload.prefilter,
+            must_match=payload.must_match,
+            metadata_filter=payload.filter,
+        )
+    except FullTextUnavailableError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    elapsed_time = time() - start_time
+    logger.info(f"Query completed in {elapsed_time:.3f}s, found {len(results)} results")
+
+    return QueryResponse(
+        query=payload.query,
+        results=results
+    )
+
+
+@router.post("/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(
+    payload: BatchQueryRequest,
+    query_service: AsyncQueryService = Depends(get_async_query_service),
+):
+    '''Run many queries in one request, scored together against the index.'''
+    logger.info(f"Received batch of {len(payload.queries)} queries")
+    start_time = time()
+
+    results = await query_service.search_batch(
+        [item.query for item in payload.queries],
+        [item.top_k for item in payload.queries],
+        nprobe=payload.nprobe,
+        ef_search=payload.ef_search,
+        engine=payload.engine,
+    )
+
+    elapsed_time = time() - start_time
+    logger.info(f"Batch of {len(payload.queries)} queries completed in {elapsed_time:.3f}s")
+
+    return BatchQueryResponse(results=[
+        QueryResponse(query=item.query, results=item_results)
+        for item, item_results in zip(payload.queries, results)
+    ])
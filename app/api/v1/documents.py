@@ -1,58 +1,100 @@
+import json
 import logging
-from typing import List
-from fastapi import status, APIRouter, Depends, HTTPException
+from typing import Iterator, List, Union
+from fastapi import status, APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from requests import Session
 
-from app.api.schemas.document import DocumentRead, DocumentCreate
+from app.api.schemas.document import DocumentIds, DocumentRead, DocumentCreate, DocumentSummary
 
 from app.core.services.embedding_service import EmbeddingService, get_embedding_service
+from app.core.services.ingestion_service import IngestionService
 from app.core.mappers.document_mapper import DocumentMapper
+from app.core.index.vector_index import VectorIndex, get_chunk_index, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
 
 from app.infrastructure.persistence.db.session import get_db
 from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
+from app.infrastructure.settings import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
 
+
+def json_array(rows, batch_size: int) -> Iterator[str]:
+    '''Encode rows as one JSON array, emitted `batch_size` rows per chunk.'''
+    yield "["
+    batch: List[str] = []
+    separator = ""
+    for row in rows:
+        batch.append(json.dumps(row._asdict()))
+        if len(batch) >= batch_size:
+            yield separator + ",".join(batch)
+            separator, batch = ",", []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]"
+
+
 # Endpoint to create multiple documents
 @router.post(
-    "/", 
-    response_model=List[DocumentRead],
+    "/",
+    response_model=Union[List[DocumentRead], DocumentIds],
     status_code=status.HTTP_201_CREATED
 )
 def create_document(
     payload: List[DocumentCreate],
+    response: Response,
+    ids_only: bool = Query(False, description="Return only the new ids instead of the full documents"),
     db: Session = Depends(get_db),
     embedding_service: EmbeddingService = Depends(get_embedding_service),
+    index: VectorIndex = Depends(get_vector_index),
+    vector_store: MmapVectorStore | None = Depends(get_vector_store),
+    chunk_index: VectorIndex = Depends(get_chunk_index),
+    lexical_index: BM25Index = Depends(get_lexical_index),
 ):
     '''Create multiple documents with their embeddings.'''
     logger.info(f"Creating {len(payload)} documents")
-    repo = DocumentRepository(db)
-
-    contents = [doc.content for doc in payload]
-    logger.debug(f"Generating embeddings for {len(contents)} texts")
-    embeddings = embedding_service.embed_texts(contents)
-
-    models = [
-        DocumentMapper.to_model(doc, emb)
-        for doc, emb in zip(payload, embeddings)
-    ]
-    
-    saved_docs = repo.create_many(models)
-    logger.info(f"Successfully created {len(saved_docs)} documents")
+    service = IngestionService(
+        db, embedding_service, index,
+        vector_store=vector_store, chunk_index=chunk_index, lexical_index=lexical_index,
+    )
+    saved_docs, cached = service.ingest(payload)
+    response.headers["X-Embeddings-Cached"] = str(cached)
+    logger.info(f"Successfully created {len(saved_docs)} documents, {cached} embeddings from cache")
+    if ids_only:
+        return DocumentIds(ids=[doc.id for doc in saved_docs])
     return [DocumentMapper.to_read(doc) for doc in saved_docs]
 
-# Endpoint to list all documents
-@router.get("/", response_model=List[DocumentRead])
+# Endpoint to list documents page by page
+@router.get("/", response_model=Union[List[DocumentRead], List[DocumentSummary]])
 def list_documents(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=settings.list_max_page_size, description="Page size"),
+    after: int | None = Query(None, ge=0, description="Return documents with an id greater than this cursor"),
+    include_content: bool = Query(True, description="Include the document content"),
+    stream: bool = Query(False, description="Stream every document after the cursor as one JSON array"),
     db: Session = Depends(get_db),
 ):
-    '''List all documents in the repository.'''
-    logger.info("Listing all documents")
+    '''List documents ordered by id using keyset pagination.
+
+    A full page sets `X-Next-After` to the cursor of the next page. With
+    `stream=true` the rows are read from a server-side cursor and written
+    as they arrive, so the table is never held in memory.
+    '''
     repo = DocumentRepository(db)
-    documents = repo.list_all()
-    logger.debug(f"Found {len(documents)} documents")
-    return [DocumentMapper.to_read(doc) for doc in documents]
+    if stream:
+        logger.info(f"Streaming documents after {after}")
+        rows = repo.iter_rows(after, limit, include_content, settings.list_stream_batch_size)
+        return StreamingResponse(json_array(rows, settings.list_stream_batch_size), media_type="application/json")
+    limit = limit or settings.list_page_size
+    logger.info(f"Listing {limit} documents after {after}")
+    rows = repo.list_page(limit, after, include_content)
+    logger.debug(f"Found {len(rows)} documents")
+    if len(rows) == limit:
+        response.headers["X-Next-After"] = str(rows[-1].id)
+    return [DocumentMapper.to_listing(row) for row in rows]
 
 # Endpoint to get a document by ID
 @router.get("/{document_id}", response_model=DocumentRead)
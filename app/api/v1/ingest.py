@@ -0,0 +1,147 @@
+import json
+import logging
+from time import perf_counter
+from typing import AsyncIterator, List
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from app.api.schemas.document import DocumentCreate
+
+from app.core.services.embedding_service import EmbeddingService, get_embedding_service
+from app.core.services.ingestion_service import IngestionService
+from app.core.index.vector_index import VectorIndex, get_chunk_index, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
+
+from app.infrastructure.persistence.db.session import get_db
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
+from app.infrastructure.settings import settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
+
+
+class LineTooLongError(ValueError):
+    pass
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    '''Split a byte stream into lines without buffering more than one line.'''
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLongError(f"NDJSON line exceeds {max_line_bytes} bytes")
+    if buffer:
+        yield buffer
+
+
+class BodyStreamingResponse(StreamingResponse):
+    '''StreamingResponse whose generator is still reading the request body.
+
+    Below ASGI spec 2.4 Starlette watches for disconnects by calling
+    `receive()` while streaming, which would steal the body chunks the
+    generator consumes; here a disconnect surfaces as a send error instead.
+    '''
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _progress(payload: dict) -> bytes:
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+# Endpoint to stream NDJSON documents in chunks
+@router.post("/stream")
+async def stream_documents(
+    request: Request,
+    db: Session = Depends(get_db),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    index: VectorIndex = Depends(get_vector_index),
+    vector_store: MmapVectorStore | None = Depends(get_vector_store),
+    chunk_index: VectorIndex = Depends(get_chunk_index),
+    lexical_index: BM25Index = Depends(get_lexical_index),
+):
+    '''Ingest an NDJSON body (one document per line) in chunks, streaming progress back.
+
+    Every `INGEST_CHUNK_SIZE` documents are embedded, committed and indexed
+    before more of the body is read, so memory is bounded by the chunk size.
+    Each chunk emits a progress line; invalid lines are reported and skipped.
+    '''
+    service = IngestionService(
+        db, embedding_service, index,
+        vector_store=vector_store, chunk_index=chunk_index, lexical_index=lexical_index,
+    )
+    chunk_size = settings.ingest_chunk_size
+
+    async def progress() -> AsyncIterator[bytes]:
+        started = perf_counter()
+        total = errors = chunks = 0
+        pending: List[DocumentCreate] = []
+
+        async def flush() -> bytes:
+            nonlocal total, chunks
+            chunk_started = perf_counter()
+            # Sessão síncrona: embed + commit rodam no threadpool, fora do event loop
+            saved, cached = await run_in_threadpool(service.ingest, pending)
+            chunks += 1
+            total += len(saved)
+            elapsed = perf_counter() - started
+            line = _progress({
+                "chunk": chunks,
+                "ids": [doc.id for doc in saved],
+                "count": len(saved),
+                "cached": cached,
+                "total": total,
+                "chunk_seconds": round(perf_counter() - chunk_started, 3),
+                "docs_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+            })
+            pending.clear()
+            return line
+
+        line_number = 0
+        try:
+            async for raw in iter_ndjson_lines(request.stream(), settings.ingest_max_line_bytes):
+                line_number += 1
+                if not raw.strip():
+                    continue
+                try:
+                    pending.append(DocumentCreate.model_validate_json(raw))
+                except ValidationError as exc:
+                    errors += 1
+                    yield _progress({"line": line_number, "error": exc.errors(include_url=False)[0]["msg"]})
+                    continue
+                if len(pending) >= chunk_size:
+                    yield await flush()
+            if pending:
+                yield await flush()
+        except LineTooLongError as exc:
+            errors += 1
+            logger.warning(f"Stopping NDJSON ingestion at line {line_number + 1}: {exc}")
+            yield _progress({"line": line_number + 1, "error": str(exc)})
+
+        elapsed = perf_counter() - started
+        logger.info(f"Streamed ingestion stored {total} documents in {chunks} chunks, {errors} errors, {elapsed:.3f}s")
+        yield _progress({
+            "done": True,
+            "total": total,
+            "chunks": chunks,
+            "errors": errors,
+            "seconds": round(elapsed, 3),
+            "docs_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        })
+
+    return BodyStreamingResponse(progress(), media_type="application/x-ndjson")
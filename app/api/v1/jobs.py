@@ -0,0 +1,59 @@
+import logging
+from typing import List
+from fastapi import status, APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.schemas.document import DocumentCreate
+from app.api.schemas.job import JobCreated, JobRead
+
+from app.core.services.ingestion_jobs import IngestionJobQueue, get_ingestion_job_queue
+
+from app.infrastructure.persistence.db.session import get_db
+from app.infrastructure.persistence.models.ingestion_job import IngestionJobModel
+from app.infrastructure.persistence.repositories.ingestion_job_repository import IngestionJobRepository, utcnow
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+
+def _to_read(job: IngestionJobModel) -> JobRead:
+    rate = None
+    if job.started_at is not None:
+        elapsed = ((job.finished_at or utcnow()) - job.started_at).total_seconds()
+        rate = round(job.processed / elapsed, 1) if elapsed > 0 else None
+    return JobRead(
+        id=job.id,
+        status=job.status,
+        total=job.total,
+        processed=job.processed,
+        cached=job.cached,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        docs_per_second=rate,
+    )
+
+# Endpoint to enqueue documents for background ingestion
+@router.post("/", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    payload: List[DocumentCreate],
+    db: Session = Depends(get_db),
+    job_queue: IngestionJobQueue = Depends(get_ingestion_job_queue),
+):
+    '''Persist the documents as an ingestion job and return immediately.'''
+    job = job_queue.submit(db, payload)
+    return JobCreated(id=job.id, status=job.status, total=job.total)
+
+# Endpoint to poll an ingestion job
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    '''Report progress, rate and errors of an ingestion job.'''
+    job = IngestionJobRepository(db).get(job_id)
+    if job is None:
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_read(job)
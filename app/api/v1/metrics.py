@@ -0,0 +1,19 @@
+import logging
+from fastapi import APIRouter, Depends
+
+from app.core.services.embedding_service import EmbeddingService, get_embedding_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"])
+
+
+@router.get("/")
+def get_metrics(
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+):
+    '''Expose in-process counters for monitoring.'''
+    batcher = embedding_service.batcher
+    return {
+        "query_embedding_cache": embedding_service.query_cache.stats(),
+        "query_batching": batcher.stats() if batcher is not None else None,
+    }
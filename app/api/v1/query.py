@@ -1,10 +1,11 @@
 import logging
 from time import time
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.api.deps import get_query_service
-from app.api.schemas.query import QueryResponse, QueryRequest
+from app.api.schemas.query import BatchQueryRequest, BatchQueryResponse, QueryResponse, QueryRequest
 from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.db.fts import FullTextUnavailableError
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/query", tags=["query"])
@@ -15,11 +16,26 @@ def query_documents(
     payload: QueryRequest,
     query_service: QueryService = Depends(get_query_service),
 ):
-    '''Perform a semantic search query and return the top matching documents.'''
+    '''Search documents semantically (default), lexically with BM25, or both fused.'''
     logger.info(f"Received query: '{payload.query}' with top_k={payload.top_k}")
     start_time = time()
     
-    results = query_service.search(payload.query, payload.top_k)
+    try:
+        results = query_service.search(
+            payload.query,
+            payload.top_k,
+            nprobe=payload.nprobe,
+            ef_search=payload.ef_search,
+            engine=payload.engine,
+            mode=payload.mode,
+            fusion=payload.fusion,
+            alpha=payload.alpha,
+            prefilter=payload.prefilter,
+            must_match=payload.must_match,
+            metadata_filter=payload.filter,
+        )
+    except FullTextUnavailableError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     
     elapsed_time = time() - start_time
     logger.info(f"Query completed in {elapsed_time:.3f}s, found {len(results)} results")
@@ -30,3 +46,28 @@ def query_documents(
         results=results
     )
 
+
+@router.post("/batch", response_model=BatchQueryResponse)
+def query_documents_batch(
+    payload: BatchQueryRequest,
+    query_service: QueryService = Depends(get_query_service),
+):
+    '''Run many queries in one request, scored together against the index.'''
+    logger.info(f"Received batch of {len(payload.queries)} queries")
+    start_time = time()
+
+    results = query_service.search_batch(
+        [item.query for item in payload.queries],
+        [item.top_k for item in payload.queries],
+        nprobe=payload.nprobe,
+        ef_search=payload.ef_search,
+        engine=payload.engine,
+    )
+
+    elapsed_time = time() - start_time
+    logger.info(f"Batch of {len(payload.queries)} queries completed in {elapsed_time:.3f}s")
+
+    return BatchQueryResponse(results=[
+        QueryResponse(query=item.query, results=item_results)
+        for item, item_results in zip(payload.queries, results)
+    ])
@@ -0,0 +1,49 @@
+from typing import Tuple
+import numpy as np
+
+from app.core.index.topk import top_k_indices
+
+MAX = "max"
+MEAN = "mean"
+AGGREGATIONS = (MAX, MEAN)
+
+
+def aggregate_chunks(
+    document_ids: np.ndarray,
+    scores: np.ndarray,
+    top_k: int,
+    method: str = MAX,
+    top_n: int = 3,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Fold candidate chunk scores into document scores.
+
+    `document_ids` and `scores` describe the candidate chunks, best first.
+    A document scores its best chunk (`max`) or the mean of its best
+    `top_n` candidate chunks (`mean`). Returns (document ids, scores, row
+    of each document's best chunk in the input), best first.
+    '''
+    if method not in AGGREGATIONS:
+        raise ValueError(f"Unknown chunk aggregation: {method}")
+    document_ids = np.asarray(document_ids, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float32)
+    if len(document_ids) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    # Ordenação estável por documento: dentro de cada grupo a ordem por score é mantida
+    order = np.argsort(document_ids, kind="stable")
+    grouped = document_ids[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    best_rows = order[starts]
+    if method == MAX:
+        document_scores = scores[best_rows]
+    else:
+        sizes = np.diff(np.r_[starts, len(order)])
+        group = np.repeat(np.arange(len(starts)), sizes)
+        rank = np.arange(len(order)) - np.repeat(starts, sizes)
+        keep = rank < top_n
+        sums = np.bincount(group[keep], weights=scores[order][keep], minlength=len(starts))
+        counts = np.bincount(group[keep], minlength=len(starts))
+        document_scores = (sums / counts).astype(np.float32)
+
+    top = top_k_indices(document_scores, top_k)
+    return grouped[starts][top], document_scores[top], best_rows[top]
@@ -0,0 +1,221 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPARISONS = ("$gt", "$gte", "$lt", "$lte")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_scalar(value: Any) -> bool:
+    return isinstance(value, (str, bool)) or _is_number(value)
+
+
+def validate_filter(expression: Any) -> Dict[str, Any]:
+    '''Check a metadata filter, raising ValueError on unknown operators or value types.
+
+    Grammar: an object whose keys are ANDed. A key is either a field,
+    mapped to a scalar (equality) or to {operator: value} with operators
+    $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte; or $and / $or (lists of
+    filters) and $not (a filter).
+    '''
+    if not isinstance(expression, dict) or not expression:
+        raise ValueError("filter must be a non-empty object")
+    for key, condition in expression.items():
+        if key in ("$and", "$or"):
+            if not isinstance(condition, list) or not condition:
+                raise ValueError(f"{key} expects a non-empty list of filters")
+            for item in condition:
+                validate_filter(item)
+        elif key == "$not":
+            validate_filter(condition)
+        elif key.startswith("$"):
+            raise ValueError(f"unknown filter operator {key}")
+        elif isinstance(condition, dict):
+            if not condition:
+                raise ValueError(f"empty condition on {key}")
+            for op, value in condition.items():
+                if op in ("$in", "$nin"):
+                    if not isinstance(value, list) or not all(_is_scalar(v) for v in value):
+                        raise ValueError(f"{op} on {key} expects a list of strings, numbers or booleans")
+                elif op in COMPARISONS:
+                    if not _is_number(value):
+                        raise ValueError(f"{op} on {key} expects a number")
+                elif op in ("$eq", "$ne"):
+                    if not _is_scalar(value):
+                        raise ValueError(f"{op} on {key} expects a string, number or boolean")
+                else:
+                    raise ValueError(f"unknown filter operator {op} on {key}")
+        elif not _is_scalar(condition):
+            raise ValueError(f"{key} must be compared with a string, number or boolean")
+    return expression
+
+
+class AttributeIndex:
+    '''Document metadata laid out for vectorized filtering, aligned with VectorIndex rows.
+
+    Strings and booleans get one packed bitmap (1 bit per row) per
+    (key, value); numbers live in a float64 column per key, NaN where the
+    key is absent, so ranges are vectorized comparisons. A filter is
+    evaluated with bitwise AND / OR / NOT over packed bytes and unpacked
+    once into a boolean row mask.
+    '''
+
+    def __init__(self):
+        self._loaded = False
+        self._reset()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self._bitmaps.values()) + sum(c.nbytes for c in self._numbers.values())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self, ids: np.ndarray, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        '''Build the bitmaps for index rows `ids` from (document id, metadata) pairs.'''
+        self._reset()
+        self._grow(len(ids))
+        self._size = len(ids)
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        positions: List[int] = []
+        attributes: List[Dict[str, Any]] = []
+        for doc_id, metadata in rows:
+            slot = np.searchsorted(sorted_ids, doc_id)
+            if slot < len(sorted_ids) and sorted_ids[slot] == doc_id:
+                positions.append(int(order[slot]))
+                attributes.append(metadata)
+        self._set(np.asarray(positions, dtype=np.int64), attributes)
+        self._loaded = True
+        logger.info(f"Attribute index loaded: {len(self._bitmaps)} bitmaps, {len(self._numbers)} numeric keys")
+
+    def set_rows(self, rows: Sequence[int], attributes: Sequence[Dict[str, Any] | None]) -> None:
+        '''Record the metadata of (new) index rows.'''
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        needed = int(rows.max()) + 1
+        if needed > self._capacity:
+            self._grow(max(needed, 2 * self._capacity))
+        self._size = max(self._size, needed)
+        self._set(rows, attributes)
+
+    def mask(self, expression: Dict[str, Any]) -> np.ndarray:
+        '''Boolean mask over the rows that satisfy a validated filter.'''
+        return np.unpackbits(self._evaluate(expression), count=self._size).astype(bool)
+
+    def clear(self) -> None:
+        self._reset()
+        self._loaded = False
+
+    def _reset(self) -> None:
+        self._bitmaps: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._numbers: Dict[str, np.ndarray] = {}
+        self._capacity = 0
+        self._size = 0
+
+    def _grow(self, capacity: int) -> None:
+        capacity = -(-max(capacity, 1024) // 8) * 8
+        for key, bitmap in self._bitmaps.items():
+            grown = np.zeros(capacity // 8, dtype=np.uint8)
+            grown[:len(bitmap)] = bitmap
+            self._bitmaps[key] = grown
+        for key, column in self._numbers.items():
+            grown = np.full(capacity, np.nan)
+            grown[:len(column)] = column
+            self._numbers[key] = grown
+        self._capacity = capacity
+
+    def _set(self, rows: np.ndarray, attributes: Sequence[Dict[str, Any] | None]) -> None:
+        # Agrupa por (chave, valor) para ligar os bits de cada bitmap de uma vez
+        flagged: Dict[Tuple[str, Any], List[int]] = defaultdict(list)
+        numeric: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        for row, metadata in zip(rows.tolist(), attributes):
+            for key, value in (metadata or {}).items():
+                if _is_number(value):
+                    numeric[key][0].append(row)
+                    numeric[key][1].append(float(value))
+                else:
+                    flagged[(key, value)].append(row)
+        for key, positions in flagged.items():
+            bitmap = self._bitmaps.get(key)
+            if bitmap is None:
+                bitmap = self._bitmaps[key] = np.zeros(self._capacity // 8, dtype=np.uint8)
+            positions = np.asarray(positions, dtype=np.int64)
+            # Ordem de bits do packbits: a linha i é o bit 0x80 >> (i % 8) do byte i // 8
+            np.bitwise_or.at(bitmap, positions >> 3, (0x80 >> (positions & 7)).astype(np.uint8))
+        for key, (positions, values) in numeric.items():
+            column = self._numbers.get(key)
+            if column is None:
+                column = self._numbers[key] = np.full(self._capacity, np.nan)
+            column[positions] = values
+
+    def _evaluate(self, expression: Dict[str, Any]) -> np.ndarray:
+        result = None
+        for key, condition in expression.items():
+            if key == "$and":
+                packed = self._all([self._evaluate(item) for item in condition])
+            elif key == "$or":
+                packed = self._any([self._evaluate(item) for item in condition])
+            elif key == "$not":
+                packed = ~self._evaluate(condition)
+            elif isinstance(condition, dict):
+                packed = self._all([self._compare(key, op, value) for op, value in condition.items()])
+            else:
+                packed = self._equals(key, condition)
+            result = packed if result is None else result & packed
+        return result
+
+    def _compare(self, key: str, op: str, value: Any) -> np.ndarray:
+        if op == "$eq":
+            return self._equals(key, value)
+        if op == "$ne":
+            return ~self._equals(key, value)
+        if op == "$in":
+            return self._any([self._equals(key, item) for item in value])
+        if op == "$nin":
+            return ~self._any([self._equals(key, item) for item in value])
+        column = self._column(key)
+        with np.errstate(invalid="ignore"):
+            selected = {
+                "$gt": column > value,
+                "$gte": column >= value,
+                "$lt": column < value,
+                "$lte": column <= value,
+            }[op]
+        return np.packbits(selected)
+
+    def _equals(self, key: str, value: Any) -> np.ndarray:
+        nbytes = -(-self._size // 8)
+        if _is_number(value):
+            return np.packbits(self._column(key) == value)
+        bitmap = self._bitmaps.get((key, value))
+        if bitmap is None:
+            return np.zeros(nbytes, dtype=np.uint8)
+        return bitmap[:nbytes]
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self._numbers.get(key)
+        if column is None:
+            return np.full(self._size, np.nan)
+        return column[:self._size]
+
+    def _all(self, parts: List[np.ndarray]) -> np.ndarray:
+        if not parts:
+            return np.full(-(-self._size // 8), 0xFF, dtype=np.uint8)
+        return np.bitwise_and.reduce(parts)
+
+    def _any(self, parts: List[np.ndarray]) -> np.ndarray:
+        if not parts:
+            return np.zeros(-(-self._size // 8), dtype=np.uint8)
+        return np.bitwise_or.reduce(parts)
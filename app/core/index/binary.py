@@ -0,0 +1,99 @@
+import logging
+from typing import Tuple
+import numpy as np
+
+from app.core.index.topk import chunked_top_k, rerank_exact
+
+logger = logging.getLogger(__name__)
+
+_ENCODE_BLOCK = 65536
+# Tabela de popcount por byte, usada quando o NumPy não tem bitwise_count (< 2.0)
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def pack_signs(vectors: np.ndarray) -> np.ndarray:
+    '''Pack the sign bit of every dimension: (n, dim) floats -> (n, ceil(dim / 8)) uint8.'''
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    '''Popcount Hamming distance between each packed row and the query code.'''
+    diff = np.bitwise_xor(codes, query_code)
+    if diff.shape[1] % 8 == 0 and diff.flags.c_contiguous:
+        # 8 bytes por palavra: menos popcounts por linha
+        diff = diff.view(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+class BinaryIndex:
+    '''Search engine over packed sign-bit codes with exact re-ranking.
+
+    Each normalized embedding is reduced to one bit per dimension (384 dims
+    -> 48 bytes). Candidates are the `top_k * oversample` rows with the
+    smallest Hamming distance to the query code; they are then re-scored
+    with the exact cosine against the matrix.
+    '''
+
+    name = "binary"
+
+    def __init__(self, oversample: int = 10, block_size: int = 65536):
+        self.oversample = oversample
+        self.block_size = block_size
+        self._codes = np.empty((0, 0), dtype=np.uint8)
+        self.size = 0
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def build(self, matrix: np.ndarray) -> None:
+        '''Encode every row of the matrix.'''
+        self.size = 0
+        self._codes = np.empty((0, (matrix.shape[1] + 7) // 8), dtype=np.uint8)
+        self._encode_rows(matrix, 0)
+        logger.info(f"Built binary sign-bit index over {len(matrix)} vectors")
+
+    def add(self, matrix: np.ndarray, start: int) -> None:
+        '''Encode rows `matrix[start:]`; sign codes need no training.'''
+        self._encode_rows(matrix, start)
+
+    def search(self,
+               matrix: np.ndarray,
+               query: np.ndarray,
+               top_k: int,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        '''Hamming prefilter followed by exact cosine re-ranking.'''
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        oversample = params.get("oversample") or self.oversample
+        query_code = pack_signs(query)
+        # Códigos de um add concorrente podem passar do fim da matriz recebida
+        codes = self.codes[:len(matrix)]
+        rows, _ = chunked_top_k(
+            codes,
+            top_k * oversample,
+            # menor distância = melhor, então a pontuação é a distância negada
+            lambda block: -hamming_distances(block, query_code).astype(np.float32),
+            block_size=self.block_size,
+        )
+        return rerank_exact(matrix, rows, query, top_k)
+
+    def _encode_rows(self, matrix: np.ndarray, start: int) -> None:
+        n = len(matrix)
+        if n <= start:
+            return
+        if len(self._codes) < n:
+            capacity = max(n, 2 * len(self._codes), 1024)
+            codes = np.empty((capacity, (matrix.shape[1] + 7) // 8), dtype=np.uint8)
+            codes[:self.size] = self._codes[:self.size]
+            self._codes = codes
+        for block_start in range(start, n, _ENCODE_BLOCK):
+            block = matrix[block_start:block_start + _ENCODE_BLOCK]
+            self._codes[block_start:block_start + len(block)] = pack_signs(block)
+        self.size = n
@@ -0,0 +1,230 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+from app.core.index.topk import top_k_indices
+from app.core.index.vector_index import sorted_ids, unseen
+from app.infrastructure.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Palavras e identificadores compostos (SKU-123, E_CONN.REFUSED, v2.1.0)
+_TOKEN = re.compile(r"\w+(?:[-./:]\w+)*")
+_SEPARATORS = re.compile(r"[-./:]")
+_LOAD_BATCH = 10_000
+
+
+def document_text(title: str, content: str) -> str:
+    '''The text a document is indexed under: title and content.'''
+    return f"{title} {content}"
+
+
+def tokenize(text: str) -> List[str]:
+    '''Lowercase terms; compound identifiers are indexed whole and by their parts.'''
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        terms.append(token)
+        if _SEPARATORS.search(token):
+            terms.extend(part for part in _SEPARATORS.split(token) if part)
+    return terms
+
+
+class BM25Index:
+    '''Process-wide BM25 inverted index over document titles and contents.
+
+    Postings are kept in flat arrays instead of per-term Python lists: a
+    CSR block (`offsets` per term into `rows` / `tfs`) plus a small tail of
+    postings appended since the last merge. New documents go to the tail,
+    which is merged into the CSR block once it grows past a fraction of it,
+    so appends stay amortized O(postings). Like VectorIndex it is loaded
+    from the repository on first use, `add` is a no-op before that and
+    skips documents the load already read.
+    '''
+
+    _MERGE_MIN = 65536
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    @property
+    def nbytes(self) -> int:
+        '''Bytes held by the posting and per-document arrays.'''
+        pending = sum(part.nbytes for parts in self._pending for part in parts)
+        return (self._offsets.nbytes + self._rows.nbytes + self._tfs.nbytes + pending
+                + self._doc_ids[:self._size].nbytes + self._doc_lengths[:self._size].nbytes)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def ensure_loaded(self, repo) -> None:
+        '''Tokenize every stored document on first use.'''
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._reset()
+            ids: List[int] = []
+            texts: List[str] = []
+            for row in repo.iter_rows(include_content=True, batch_size=_LOAD_BATCH):
+                ids.append(row.id)
+                texts.append(document_text(row.title, row.content))
+                if len(ids) >= _LOAD_BATCH:
+                    self._append(ids, texts)
+                    ids, texts = [], []
+            if ids:
+                self._append(ids, texts)
+            self._merge()
+            self._loaded_ids = sorted_ids(self._doc_ids[:self._size].copy())
+            self._loaded = True
+            logger.info(f"BM25 index loaded with {self._size} documents, {len(self._terms)} terms")
+
+    def add(self, ids: Sequence[int], texts: Sequence[str]) -> None:
+        '''Index freshly committed documents; no-op until the index is loaded.'''
+        with self._lock:
+            if not self._loaded or len(ids) == 0:
+                return
+            ids = np.asarray(ids, dtype=np.int64)
+            fresh = unseen(self._loaded_ids, ids)
+            if not fresh.all():
+                # Commitados antes do load terminar: o load já indexou estes documentos
+                ids, texts = ids[fresh], [text for text, keep in zip(texts, fresh) if keep]
+                if len(ids) == 0:
+                    return
+            self._append(ids, texts)
+            if self._pending_size > max(self._MERGE_MIN, len(self._rows) // 8):
+                self._merge()
+
+    def search(self,
+               query: str,
+               top_k: int,
+               allowed: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''Return (document ids, BM25 scores) of the best `top_k` matches, best first.
+
+        `allowed` restricts the matches to those document ids.
+        '''
+        with self._lock:
+            term_ids = sorted({self._terms[term] for term in tokenize(query) if term in self._terms})
+            if not term_ids or self._size == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            doc_lengths = self._doc_lengths[:self._size]
+            average_length = self._total_length / self._size
+            rows_parts, score_parts = [], []
+            for term_id in term_ids:
+                rows, tfs = self._postings(term_id)
+                df = len(rows)
+                idf = math.log(1.0 + (self._size - df + 0.5) / (df + 0.5))
+                tfs = tfs.astype(np.float32)
+                norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[rows] / average_length)
+                rows_parts.append(rows)
+                score_parts.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+            # Soma as contribuições só nas linhas que aparecem em alguma posting
+            rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+            if allowed is not None:
+                keep = np.isin(self._doc_ids[rows], allowed)
+                rows, scores = rows[keep], scores[keep]
+            best = top_k_indices(scores, top_k)
+            return self._doc_ids[rows[best]], scores[best]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._loaded = False
+
+    def _reset(self) -> None:
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._rows = np.empty(0, dtype=np.int32)
+        self._tfs = np.empty(0, dtype=np.uint16)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+        self._doc_ids = np.empty(0, dtype=np.int64)
+        self._doc_lengths = np.empty(0, dtype=np.float32)
+        self._size = 0
+        self._total_length = 0
+        self._loaded_ids = np.empty(0, dtype=np.int64)
+
+    def _append(self, ids: Sequence[int], texts: Sequence[str]) -> None:
+        terms, rows, tfs, lengths = [], [], [], []
+        for offset, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                terms.append(self._terms.setdefault(term, len(self._terms)))
+                rows.append(self._size + offset)
+                tfs.append(tf)
+        self._pending.append((
+            np.array(terms, dtype=np.int32),
+            np.array(rows, dtype=np.int32),
+            np.minimum(np.array(tfs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+        ))
+        self._pending_size += len(terms)
+        self._append_documents(np.asarray(ids, dtype=np.int64), np.array(lengths, dtype=np.float32))
+
+    def _append_documents(self, ids: np.ndarray, lengths: np.ndarray) -> None:
+        needed = self._size + len(ids)
+        if needed > len(self._doc_ids):
+            # Crescimento geométrico, como na VectorIndex
+            capacity = max(needed, 2 * len(self._doc_ids), 1024)
+            doc_ids = np.empty(capacity, dtype=np.int64)
+            doc_ids[:self._size] = self._doc_ids[:self._size]
+            doc_lengths = np.empty(capacity, dtype=np.float32)
+            doc_lengths[:self._size] = self._doc_lengths[:self._size]
+            self._doc_ids, self._doc_lengths = doc_ids, doc_lengths
+        self._doc_ids[self._size:needed] = ids
+        self._doc_lengths[self._size:needed] = lengths
+        self._size = needed
+        self._total_length += int(lengths.sum())
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        parts_rows, parts_tfs = [], []
+        if term_id < len(self._offsets) - 1:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            parts_rows.append(self._rows[start:end])
+            parts_tfs.append(self._tfs[start:end])
+        for terms, rows, tfs in self._pending:
+            mask = terms == term_id
+            parts_rows.append(rows[mask])
+            parts_tfs.append(tfs[mask])
+        if len(parts_rows) == 1:
+            return parts_rows[0], parts_tfs[0]
+        return np.concatenate(parts_rows), np.concatenate(parts_tfs)
+
+    def _merge(self) -> None:
+        '''Fold the pending tail into the CSR block.'''
+        if not self._pending:
+            return
+        base_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))
+        terms = np.concatenate([base_terms] + [terms for terms, _, _ in self._pending])
+        rows = np.concatenate([self._rows] + [rows for _, rows, _ in self._pending])
+        tfs = np.concatenate([self._tfs] + [tfs for _, _, tfs in self._pending])
+        # Estável: dentro de cada termo as linhas continuam em ordem crescente
+        order = np.argsort(terms, kind="stable")
+        counts = np.bincount(terms, minlength=len(self._terms))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._rows, self._tfs = rows[order], tfs[order]
+        self._pending, self._pending_size = [], 0
+        logger.debug(f"Merged BM25 postings: {len(self._rows)} postings, {len(self._terms)} terms")
+
+
+@lru_cache
+def get_lexical_index() -> BM25Index:
+    return BM25Index(k1=settings.bm25_k1, b=settings.bm25_b)
@@ -0,0 +1,52 @@
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.db.session import database_sidecar_path
+from app.core.index.ivf import IVFIndex
+from app.core.index.hnsw import HNSWIndex
+from app.core.index.pq import PQIndex
+from app.core.index.binary import BinaryIndex
+
+EXACT = "exact"
+IVF = "ivf"
+HNSW = "hnsw"
+PQ = "pq"
+BINARY = "binary"
+
+SEARCH_ENGINES = (EXACT, IVF, HNSW, PQ, BINARY)
+# Guardam códigos compactos além da matriz float32, que continua sendo lida no re-ranking
+COMPRESSED_ENGINES = (PQ, BINARY)
+
+def create_search_engine(name: str):
+    '''Create an approximate search engine configured from Settings.
+
+    Engines index row offsets of the VectorIndex matrix and expose
+    `build(matrix)`, `add(matrix, start)` and `search(matrix, query, top_k, **params)`,
+    where params carries per-request tuning such as `nprobe` or `ef_search`.
+    '''
+    if name == IVF:
+        return IVFIndex(
+            nlist=settings.ivf_nlist,
+            nprobe=settings.ivf_nprobe,
+            retrain_growth=settings.ivf_retrain_growth,
+            background=settings.ivf_background_retrain,
+        )
+    if name == HNSW:
+        return HNSWIndex(
+            m=settings.hnsw_m,
+            ef_construction=settings.hnsw_ef_construction,
+            ef_search=settings.hnsw_ef_search,
+            path=settings.hnsw_index_path or database_sidecar_path(".hnsw.npz"),
+            save_interval=settings.hnsw_save_interval,
+            background=settings.hnsw_background_inserts,
+        )
+    if name == PQ:
+        return PQIndex(
+            m=settings.pq_m,
+            rerank=settings.pq_rerank,
+            rerank_factor=settings.pq_rerank_factor,
+        )
+    if name == BINARY:
+        return BinaryIndex(
+            oversample=settings.binary_oversample,
+            block_size=settings.binary_block_size,
+        )
+    raise ValueError(f"Unknown search engine: {name}")
@@ -0,0 +1,54 @@
+from typing import Sequence, Tuple
+import numpy as np
+
+from app.core.index.topk import top_k_indices
+
+SEMANTIC = "semantic"
+LEXICAL = "lexical"
+HYBRID = "hybrid"
+SEARCH_MODES = (SEMANTIC, LEXICAL, HYBRID)
+
+RRF = "rrf"
+WEIGHTED = "weighted"
+FUSIONS = (RRF, WEIGHTED)
+
+
+def _union(rankings: Sequence[np.ndarray]) -> Tuple[np.ndarray, list]:
+    ids = np.unique(np.concatenate([np.asarray(r, dtype=np.int64) for r in rankings]))
+    positions = [np.searchsorted(ids, np.asarray(r, dtype=np.int64)) for r in rankings]
+    return ids, positions
+
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], top_k: int, k: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    '''Fuse id rankings (best first) with RRF: each list adds 1 / (k + rank).'''
+    ids, positions = _union(rankings)
+    fused = np.zeros(len(ids), dtype=np.float32)
+    for slots in positions:
+        fused[slots] += 1.0 / (k + np.arange(1, len(slots) + 1, dtype=np.float32))
+    best = top_k_indices(fused, top_k)
+    return ids[best], fused[best]
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    scores = np.asarray(scores, dtype=np.float32)
+    if len(scores) == 0:
+        return scores
+    spread = scores.max() - scores.min()
+    if spread <= 0:
+        return np.ones_like(scores)
+    return (scores - scores.min()) / spread
+
+
+def weighted_fusion(dense_ids: np.ndarray,
+                    dense_scores: np.ndarray,
+                    lexical_ids: np.ndarray,
+                    lexical_scores: np.ndarray,
+                    top_k: int,
+                    alpha: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    '''alpha * dense + (1 - alpha) * lexical, each min-max normalized; missing scores count as 0.'''
+    ids, (dense_slots, lexical_slots) = _union([dense_ids, lexical_ids])
+    fused = np.zeros(len(ids), dtype=np.float32)
+    fused[dense_slots] += alpha * _min_max(dense_scores)
+    fused[lexical_slots] += (1.0 - alpha) * _min_max(lexical_scores)
+    best = top_k_indices(fused, top_k)
+    return ids[best], fused[best]
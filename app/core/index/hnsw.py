@@ -0,0 +1,313 @@
+import heapq
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+
+from app.core.index.topk import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+class HNSWIndex:
+    '''Hierarchical navigable small world graph over the resident matrix rows.
+
+    Level 0 adjacency is a dense (capacity, 2*M) int64 array padded with -1;
+    the sparse upper levels map node -> neighbour array. Similarity is the
+    dot product of unit vectors. The graph can be saved to and restored from
+    an `.npz` file so it is not rebuilt on every restart.
+
+    Each node is linked under a lock that searches also hold, so a query
+    never walks a half-linked node. With `background=True`, `add` only
+    hands the new rows to a worker thread and returns; they become
+    searchable as the worker links them.
+    '''
+
+    name = "hnsw"
+
+    def __init__(self,
+                 m: int = 16,
+                 ef_construction: int = 100,
+                 ef_search: int = 64,
+                 path: str | None = None,
+                 save_interval: int = 1000,
+                 seed: int = 0,
+                 background: bool = False):
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.path = path
+        self.save_interval = save_interval
+        self._ml = 1.0 / np.log(max(m, 2))
+        self._rng = np.random.default_rng(seed)
+        self.background = background
+        self._lock = threading.RLock()
+        self._pending_lock = threading.Condition()
+        self._pending: np.ndarray | None = None
+        self._draining = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._neighbors0 = np.full((0, self.m0), -1, dtype=np.int64)
+        self._upper: List[Dict[int, np.ndarray]] = []
+        self._levels = np.empty(0, dtype=np.int8)
+        self.entry_point = -1
+        self.max_level = -1
+        self.size = 0
+        self._unsaved = 0
+        # Ids das linhas não chegam até o engine, então amostras dos vetores identificam a matriz
+        self._fingerprint = np.empty((0, 0), dtype=np.float32)
+
+    def build(self, matrix: np.ndarray) -> None:
+        '''Restore the graph from disk when it matches the matrix, else build it.'''
+        with self._lock:
+            self._reset()
+            if self.path and os.path.exists(self.path) and self._load(matrix):
+                logger.info(f"Loaded HNSW graph with {self.size} nodes from {self.path}")
+        self._insert_rows(matrix, self.size)
+        if self._unsaved:
+            self.save()
+
+    def add(self, matrix: np.ndarray, start: int) -> None:
+        '''Insert rows `matrix[start:]` into the graph, or queue them for the worker when in background.'''
+        if not self.background:
+            self._insert_rows(matrix, start)
+            if self._unsaved >= self.save_interval:
+                self.save()
+            return
+        with self._pending_lock:
+            # A view mais recente cobre todas as linhas ainda não ligadas ao grafo
+            self._pending = matrix
+            if not self._draining:
+                self._draining = True
+                threading.Thread(target=self._drain, name="hnsw-insert", daemon=True).start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        '''Block until queued rows are linked; returns False on timeout.'''
+        with self._pending_lock:
+            return self._pending_lock.wait_for(lambda: not self._draining, timeout)
+
+    def search(self,
+               matrix: np.ndarray,
+               query: np.ndarray,
+               top_k: int,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        '''Approximate top-k rows; `ef_search` trades latency for recall.'''
+        with self._lock:
+            if self.entry_point < 0:
+                return _EMPTY, np.empty(0, dtype=np.float32)
+            ef = max(params.get("ef_search") or self.ef_search, top_k)
+            entry = [self.entry_point]
+            for level in range(self.max_level, 0, -1):
+                entry = [self._search_layer(matrix, query, entry, 1, level)[0][1]]
+            found = self._search_layer(matrix, query, entry, ef, 0)
+        nodes = np.fromiter((node for _, node in found), dtype=np.int64, count=len(found))
+        scores = np.fromiter((score for score, _ in found), dtype=np.float32, count=len(found))
+        best = top_k_indices(scores, top_k)
+        return nodes[best], scores[best]
+
+    def save(self, path: str | None = None) -> None:
+        '''Atomically write the graph to `path` (defaults to the configured path).'''
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            upper_nodes, upper_offsets, upper_flat = [], [], []
+            for level in self._upper:
+                nodes = np.fromiter(level.keys(), dtype=np.int64, count=len(level))
+                lengths = [len(level[n]) for n in nodes]
+                upper_nodes.append(nodes)
+                upper_offsets.append(np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+                upper_flat.append(np.concatenate([level[n] for n in nodes]) if len(nodes) else _EMPTY)
+            arrays = {
+                "params": np.array(
+                    [self.m, self.entry_point, self.max_level, self.size, len(self._upper)], dtype=np.int64
+                ),
+                "neighbors0": self._neighbors0[:self.size].copy(),
+                "levels": self._levels[:self.size].copy(),
+                "fingerprint": self._fingerprint,
+            }
+            self._unsaved = 0
+        for i, (nodes, offsets, flat) in enumerate(zip(upper_nodes, upper_offsets, upper_flat)):
+            arrays[f"upper{i}_nodes"] = nodes
+            arrays[f"upper{i}_offsets"] = offsets
+            arrays[f"upper{i}_flat"] = flat
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        logger.debug(f"Saved HNSW graph with {self.size} nodes to {path}")
+
+    def _load(self, matrix: np.ndarray) -> bool:
+        try:
+            with np.load(self.path) as data:
+                m, entry_point, max_level, size, n_upper = (int(v) for v in data["params"])
+                fingerprint = data["fingerprint"]
+                if m != self.m or size > len(matrix) or not self._matches(matrix, size, fingerprint):
+                    logger.warning(f"HNSW graph at {self.path} does not match the stored vectors, rebuilding")
+                    return False
+                neighbors0 = data["neighbors0"]
+                levels = data["levels"]
+                upper = []
+                for i in range(n_upper):
+                    nodes, offsets, flat = data[f"upper{i}_nodes"], data[f"upper{i}_offsets"], data[f"upper{i}_flat"]
+                    upper.append({int(n): flat[offsets[j]:offsets[j + 1]].copy() for j, n in enumerate(nodes)})
+        except (OSError, KeyError, ValueError) as exc:
+            logger.warning(f"Could not load HNSW graph from {self.path}: {exc}")
+            return False
+        self._neighbors0 = neighbors0.copy()
+        self._levels = levels.copy()
+        self._upper = upper
+        self.entry_point, self.max_level, self.size = entry_point, max_level, size
+        self._fingerprint = fingerprint.copy()
+        return True
+
+    @staticmethod
+    def _sample_positions(size: int) -> np.ndarray:
+        return np.unique(np.linspace(0, size - 1, num=min(16, size)).astype(np.int64)) if size else _EMPTY
+
+    def _matches(self, matrix: np.ndarray, size: int, fingerprint: np.ndarray) -> bool:
+        positions = self._sample_positions(size)
+        if size == 0 or fingerprint.shape != (len(positions), matrix.shape[1]):
+            return False
+        return np.allclose(np.asarray(matrix[positions], dtype=np.float32), fingerprint)
+
+    def _drain(self) -> None:
+        '''Worker loop: link queued rows until nothing is pending, then exit.'''
+        while True:
+            with self._pending_lock:
+                matrix, self._pending = self._pending, None
+                if matrix is None:
+                    self._draining = False
+                    self._pending_lock.notify_all()
+                    return
+            try:
+                self._insert_rows(matrix, self.size)
+                if self._unsaved >= self.save_interval:
+                    self.save()
+            except Exception:
+                # As linhas restantes entram no próximo add ou na reconstrução do grafo
+                logger.exception("Background HNSW insert failed")
+                with self._pending_lock:
+                    self._draining = False
+                    self._pending_lock.notify_all()
+                return
+
+    def _insert_rows(self, matrix: np.ndarray, start: int) -> None:
+        n = len(matrix)
+        if start >= n:
+            return
+        for node in range(start, n):
+            # Um nó por vez: buscas concorrentes esperam no máximo uma inserção
+            with self._lock:
+                self._grow(node + 1)
+                self._insert(matrix, node)
+                self.size = node + 1
+                self._unsaved += 1
+        with self._lock:
+            self._fingerprint = np.asarray(matrix[self._sample_positions(n)], dtype=np.float32)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._neighbors0):
+            return
+        capacity = max(needed, 2 * len(self._neighbors0), 1024)
+        neighbors0 = np.full((capacity, self.m0), -1, dtype=np.int64)
+        neighbors0[:len(self._neighbors0)] = self._neighbors0
+        levels = np.zeros(capacity, dtype=np.int8)
+        levels[:len(self._levels)] = self._levels
+        self._neighbors0, self._levels = neighbors0, levels
+
+    def _random_level(self) -> int:
+        return min(int(-np.log(1.0 - self._rng.random()) * self._ml), 32)
+
+    def _neighbors(self, node: int, level: int) -> np.ndarray:
+        if level == 0:
+            row = self._neighbors0[node]
+            return row[row >= 0]
+        return self._upper[level - 1].get(node, _EMPTY)
+
+    def _set_neighbors(self, node: int, level: int, neighbors: np.ndarray) -> None:
+        if level == 0:
+            row = np.full(self.m0, -1, dtype=np.int64)
+            row[:len(neighbors)] = neighbors
+            self._neighbors0[node] = row
+        else:
+            self._upper[level - 1][node] = np.asarray(neighbors, dtype=np.int64)
+
+    def _search_layer(self, matrix, query, entry_points, ef: int, level: int) -> List[Tuple[float, int]]:
+        '''Best-first search on one level; returns (score, node) pairs, best first.'''
+        limit = len(matrix)
+        entry = np.asarray(entry_points, dtype=np.int64)
+        visited = set(entry.tolist())
+        entry_scores = np.asarray(matrix[entry], dtype=np.float32) @ query
+        candidates = [(-float(s), int(e)) for s, e in zip(entry_scores, entry)]
+        results = [(float(s), int(e)) for s, e in zip(entry_scores, entry)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while candidates:
+            neg_score, node = heapq.heappop(candidates)
+            if -neg_score < results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in self._neighbors(node, level).tolist() if n < limit and n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            scores = np.asarray(matrix[neighbors], dtype=np.float32) @ query
+            for n, score in zip(neighbors, scores.tolist()):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, n))
+                    heapq.heappush(results, (score, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select(self, matrix, candidates: List[Tuple[float, int]], m: int) -> np.ndarray:
+        '''Neighbour selection heuristic: keep candidates closer to the node than to any kept one.'''
+        if len(candidates) <= 1:
+            return np.asarray([node for _, node in candidates], dtype=np.int64)
+        nodes = np.asarray([node for _, node in candidates], dtype=np.int64)
+        scores = np.asarray([score for score, _ in candidates], dtype=np.float32)
+        vectors = np.asarray(matrix[nodes], dtype=np.float32)
+        pairwise = vectors @ vectors.T
+        selected: List[int] = []
+        for i in range(len(nodes)):
+            if len(selected) >= m:
+                break
+            if selected and pairwise[i, selected].max() > scores[i]:
+                continue
+            selected.append(i)
+        return nodes[selected]
+
+    def _insert(self, matrix: np.ndarray, node: int) -> None:
+        vector = np.asarray(matrix[node], dtype=np.float32)
+        level = self._random_level()
+        self._levels[node] = level
+        while len(self._upper) < level:
+            self._upper.append({})
+
+        if self.entry_point < 0:
+            self.entry_point, self.max_level = node, level
+            return
+
+        entry = [self.entry_point]
+        for lc in range(self.max_level, level, -1):
+            entry = [self._search_layer(matrix, vector, entry, 1, lc)[0][1]]
+
+        for lc in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(matrix, vector, entry, self.ef_construction, lc)
+            max_degree = self.m0 if lc == 0 else self.m
+            neighbors = self._select(matrix, found, self.m)
+            self._set_neighbors(node, lc, neighbors)
+            for n in neighbors.tolist():
+                linked = np.append(self._neighbors(n, lc), node)
+                if len(linked) > max_degree:
+                    # Poda: mantém os vizinhos mais similares ao nó n
+                    scores = np.asarray(matrix[linked], dtype=np.float32) @ np.asarray(matrix[n], dtype=np.float32)
+                    linked = linked[top_k_indices(scores, max_degree)]
+                self._set_neighbors(n, lc, linked)
+            entry = [n for _, n in found]
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
@@ -0,0 +1,148 @@
+import logging
+import threading
+from typing import List, Tuple
+import numpy as np
+
+from app.core.index.kmeans import assign, spherical_kmeans
+from app.core.index.topk import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+class IVFIndex:
+    '''Inverted-file approximate index over the rows of the resident matrix.
+
+    Rows are bucketed by their nearest k-means centroid; a query scores only
+    the rows in its `nprobe` closest buckets. Lists hold row offsets into the
+    VectorIndex matrix, so no vectors are duplicated.
+
+    Once the corpus has grown `retrain_growth` times past the training set
+    the centroids are retrained. With `background=True` the retrain runs on
+    a worker thread: `add` keeps bucketing new rows into the current lists
+    and the new lists are swapped in when k-means finishes.
+    '''
+
+    name = "ivf"
+
+    def __init__(self,
+                 nlist: int = 1024,
+                 nprobe: int = 8,
+                 retrain_growth: float = 2.0,
+                 max_train_points: int = 256 * 1024,
+                 seed: int = 0,
+                 background: bool = False):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.retrain_growth = retrain_growth
+        self.max_train_points = max_train_points
+        self.seed = seed
+        self.background = background
+        self._lock = threading.Lock()
+        self._retrain_done = threading.Condition(self._lock)
+        self._retraining = False
+        # View mais recente recebida pelo add: o retreino termina indexando as linhas que chegaram depois
+        self._latest: np.ndarray | None = None
+        # (centroids, lists) trocados juntos para que buscas concorrentes nunca vejam um par misturado
+        self._trained: Tuple[np.ndarray, List[np.ndarray]] | None = None
+        self.trained_size = 0
+        self.size = 0
+
+    @property
+    def centroids(self) -> np.ndarray | None:
+        return None if self._trained is None else self._trained[0]
+
+    @property
+    def lists(self) -> List[np.ndarray]:
+        return [] if self._trained is None else self._trained[1]
+
+    def build(self, matrix: np.ndarray) -> None:
+        '''Train centroids over the matrix and bucket every row.'''
+        trained = self._train(matrix)
+        with self._lock:
+            self._latest = matrix
+            self._trained = trained
+            self.trained_size = self.size = len(matrix)
+
+    def add(self, matrix: np.ndarray, start: int) -> None:
+        '''Bucket rows `matrix[start:]`, retraining once the corpus has grown enough.'''
+        with self._lock:
+            self._latest = matrix
+            if self._trained is not None:
+                centroids, lists = self._trained
+                self._bucket(centroids, lists, matrix, start)
+                self.size = len(matrix)
+                if len(matrix) < self.trained_size * self.retrain_growth:
+                    return
+                if self.background:
+                    if not self._retraining:
+                        self._retraining = True
+                        worker = threading.Thread(target=self._retrain, args=(matrix,), name="ivf-retrain", daemon=True)
+                        worker.start()
+                    return
+        self.build(matrix)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        '''Block until a background retrain has been swapped in; returns False on timeout.'''
+        with self._retrain_done:
+            return self._retrain_done.wait_for(lambda: not self._retraining, timeout)
+
+    def search(self,
+               matrix: np.ndarray,
+               query: np.ndarray,
+               top_k: int,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        '''Approximate top-k rows by probing the `nprobe` closest inverted lists.'''
+        if self._trained is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        centroids, lists = self._trained
+        nprobe = min(params.get("nprobe") or self.nprobe, len(centroids))
+        probes = top_k_indices(centroids @ query, nprobe)
+        candidates = np.concatenate([lists[p] for p in probes])
+        # Linhas de um add concorrente podem já estar nas listas mas não na matriz recebida
+        candidates = candidates[candidates < len(matrix)]
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = np.asarray(matrix[candidates], dtype=np.float32) @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def _train(self, matrix: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]] | None:
+        n = len(matrix)
+        if n == 0:
+            return None
+        rng = np.random.default_rng(self.seed)
+        sample = matrix
+        if n > self.max_train_points:
+            sample = matrix[np.sort(rng.choice(n, size=self.max_train_points, replace=False))]
+        centroids, _ = spherical_kmeans(sample, self.nlist, seed=self.seed)
+        lists = [np.empty(0, dtype=np.int64) for _ in range(len(centroids))]
+        self._bucket(centroids, lists, matrix, 0)
+        logger.info(f"Trained IVF index with {len(centroids)} lists over {n} vectors")
+        return centroids, lists
+
+    def _retrain(self, matrix: np.ndarray) -> None:
+        '''Worker: train over `matrix`, then bucket the rows added meanwhile and swap the lists in.'''
+        try:
+            trained = self._train(matrix)
+        except Exception:
+            # As listas antigas continuam valendo; o próximo add tenta de novo
+            logger.exception("Background IVF retrain failed")
+            trained = None
+        with self._lock:
+            if trained is not None:
+                latest = self._latest
+                if len(latest) > len(matrix):
+                    self._bucket(trained[0], trained[1], latest, len(matrix))
+                self._trained = trained
+                self.trained_size = len(matrix)
+                self.size = len(latest)
+            self._retraining = False
+            self._retrain_done.notify_all()
+
+    @staticmethod
+    def _bucket(centroids: np.ndarray, lists: List[np.ndarray], matrix: np.ndarray, start: int) -> None:
+        labels = assign(matrix[start:], centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        rows = order + start
+        for list_id in np.flatnonzero(np.diff(bounds)):
+            lists[list_id] = np.concatenate([lists[list_id], rows[bounds[list_id]:bounds[list_id + 1]]])
@@ -0,0 +1,97 @@
+from typing import Tuple
+import numpy as np
+
+def _cluster_sums(vectors: np.ndarray, labels: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''Per-cluster vector sums and sizes via a sort + reduceat (much faster than np.add.at).'''
+    counts = np.bincount(labels, minlength=k)
+    sums = np.zeros((k, vectors.shape[1]), dtype=np.float32)
+    order = np.argsort(labels, kind="stable")
+    present = np.flatnonzero(counts)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+    sums[present] = np.add.reduceat(vectors[order], starts, axis=0)
+    return sums, counts
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    '''Index of the most similar centroid (by dot product) for each vector.'''
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        labels[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    n_iter: int = 20,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''Cluster unit-norm vectors by cosine similarity.
+
+    Returns (centroids, labels); centroids are re-normalized after every
+    update so assignment is a plain matrix product. Empty clusters are
+    re-seeded from random points.
+    '''
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n = len(vectors)
+    if n == 0:
+        raise ValueError("Cannot train k-means on an empty set")
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(n, size=k, replace=False)].copy()
+    labels = np.zeros(n, dtype=np.int64)
+
+    for _ in range(n_iter):
+        new_labels = assign(vectors, centroids)
+        sums, counts = _cluster_sums(vectors, new_labels, k)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(n, size=len(empty), replace=False)]
+        centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-10)
+        converged = np.array_equal(new_labels, labels)
+        labels = new_labels
+        if converged:
+            break
+    return centroids.astype(np.float32), labels
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    n_iter: int = 20,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''Euclidean k-means (Lloyd) used for codebooks of non-normalized sub-vectors.
+
+    Returns (centroids, labels). Empty clusters are re-seeded from random points.
+    '''
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n = len(vectors)
+    if n == 0:
+        raise ValueError("Cannot train k-means on an empty set")
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(n, size=k, replace=False)].copy()
+    labels = np.zeros(n, dtype=np.int64)
+
+    for _ in range(n_iter):
+        new_labels = nearest(vectors, centroids)
+        sums, counts = _cluster_sums(vectors, new_labels, k)
+        empty = np.flatnonzero(counts == 0)
+        counts[empty] = 1
+        centroids = sums / counts[:, None]
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(n, size=len(empty), replace=False)]
+        converged = np.array_equal(new_labels, labels)
+        labels = new_labels
+        if converged:
+            break
+    return centroids.astype(np.float32), labels
+
+def nearest(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    '''Index of the closest centroid (by squared L2 distance) for each vector.'''
+    labels = np.empty(len(vectors), dtype=np.int64)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(vectors), block_size):
+        block = np.ascontiguousarray(vectors[start:start + block_size], dtype=np.float32)
+        # ||x - c||² = ||x||² - 2 x·c + ||c||², e ||x||² não muda o argmin
+        labels[start:start + block_size] = np.argmin(centroid_norms - 2 * (block @ centroids.T), axis=1)
+    return labels
@@ -0,0 +1,170 @@
+import logging
+from typing import Tuple
+import numpy as np
+
+from app.core.index.kmeans import kmeans, nearest
+from app.core.index.topk import chunked_top_k, rerank_exact
+
+logger = logging.getLogger(__name__)
+
+class ProductQuantizer:
+    '''Product quantization codec: one uint8 code per sub-vector.
+
+    The vector is split into `m` contiguous sub-vectors and each one is
+    replaced by the id of its nearest centroid in a 256-entry codebook
+    trained for that subspace, so a 384-dim float32 vector (1536 bytes)
+    becomes `m` bytes.
+    '''
+
+    def __init__(self, m: int = 48, n_centroids: int = 256, seed: int = 0):
+        if n_centroids > 256:
+            raise ValueError("n_centroids must fit in a uint8 code")
+        self.m = m
+        self.n_centroids = n_centroids
+        self.seed = seed
+        self.codebooks: np.ndarray | None = None  # (m, n_centroids, dsub)
+
+    @property
+    def dim(self) -> int | None:
+        return None if self.codebooks is None else self.codebooks.shape[0] * self.codebooks.shape[2]
+
+    @property
+    def dsub(self) -> int:
+        return self.codebooks.shape[2]
+
+    def train(self, vectors: np.ndarray) -> None:
+        '''Train one codebook per subspace.'''
+        vectors = np.asarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1]
+        # Usa o maior divisor da dimensão que não passa de m
+        m = max(d for d in range(1, min(self.m, dim) + 1) if dim % d == 0)
+        if m != self.m:
+            logger.warning(f"PQ: dimension {dim} is not divisible by {self.m}, using {m} sub-quantizers")
+        dsub = dim // m
+        k = min(self.n_centroids, len(vectors))
+        codebooks = np.zeros((m, k, dsub), dtype=np.float32)
+        for j in range(m):
+            codebooks[j], _ = kmeans(vectors[:, j * dsub:(j + 1) * dsub], k, seed=self.seed + j)
+        self.m = m
+        self.codebooks = codebooks
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        '''Quantize (n, dim) vectors to (n, m) uint8 codes.'''
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        dsub = self.dsub
+        for j in range(self.m):
+            codes[:, j] = nearest(vectors[:, j * dsub:(j + 1) * dsub], self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        '''Reconstruct approximate vectors from codes.'''
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.hstack(parts)
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        '''Per-query (m, n_centroids) table of sub-vector inner products.'''
+        q = np.asarray(query, dtype=np.float32).reshape(self.m, 1, self.dsub)
+        return (self.codebooks * q).sum(axis=2)
+
+    def adc_scores(self, table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        '''Asymmetric inner products between the query behind `table` and encoded vectors.'''
+        offsets = np.arange(self.m, dtype=np.intp) * table.shape[1]
+        return np.take(table.ravel(), codes.astype(np.intp) + offsets).sum(axis=1)
+
+
+class PQIndex:
+    '''Search engine scoring PQ codes with per-query lookup tables.
+
+    The top `top_k * rerank_factor` candidates by approximate score are
+    optionally re-ranked exactly against the original vectors, which are
+    read from the VectorIndex matrix (the memory-mapped file when
+    VECTOR_STORE_BACKEND=mmap). Without the mmap store that matrix stays
+    resident, so the codes add to memory rather than replace it.
+    '''
+
+    name = "pq"
+
+    def __init__(self,
+                 m: int = 48,
+                 rerank: bool = True,
+                 rerank_factor: int = 4,
+                 max_train_points: int = 65536,
+                 block_size: int = 65536,
+                 seed: int = 0):
+        self.quantizer = ProductQuantizer(m=m, seed=seed)
+        self.rerank = rerank
+        self.rerank_factor = rerank_factor
+        self.max_train_points = max_train_points
+        self.block_size = block_size
+        self.seed = seed
+        self._codes = np.empty((0, 0), dtype=np.uint8)
+        self.size = 0
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        '''Memory held by codes and codebooks.'''
+        codebooks = 0 if self.quantizer.codebooks is None else self.quantizer.codebooks.nbytes
+        return self.codes.nbytes + codebooks
+
+    def build(self, matrix: np.ndarray) -> None:
+        '''Train the codebooks on a sample of the matrix and encode every row.'''
+        n = len(matrix)
+        self.size = 0
+        if n == 0:
+            return
+        sample = matrix
+        if n > self.max_train_points:
+            rng = np.random.default_rng(self.seed)
+            sample = matrix[np.sort(rng.choice(n, size=self.max_train_points, replace=False))]
+        self.quantizer.train(sample)
+        self._codes = np.empty((0, self.quantizer.m), dtype=np.uint8)
+        self._encode_rows(matrix, 0)
+        logger.info(f"Trained PQ index with {self.quantizer.m} sub-quantizers over {n} vectors")
+
+    def add(self, matrix: np.ndarray, start: int) -> None:
+        '''Encode rows `matrix[start:]`.'''
+        if self.quantizer.codebooks is None:
+            self.build(matrix)
+            return
+        self._encode_rows(matrix, start)
+
+    def search(self,
+               matrix: np.ndarray,
+               query: np.ndarray,
+               top_k: int,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        '''Approximate top-k by ADC, exactly re-ranked when enabled.'''
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        table = self.quantizer.lookup_table(query)
+        n_candidates = top_k * self.rerank_factor if self.rerank else top_k
+        # Códigos de um add concorrente podem passar do fim da matriz recebida
+        codes = self.codes[:len(matrix)]
+        rows, scores = chunked_top_k(
+            codes,
+            n_candidates,
+            lambda block: self.quantizer.adc_scores(table, block),
+            block_size=self.block_size,
+        )
+        if not self.rerank:
+            return rows, scores
+        return rerank_exact(matrix, rows, query, top_k)
+
+    def _encode_rows(self, matrix: np.ndarray, start: int) -> None:
+        n = len(matrix)
+        if n <= start:
+            return
+        if len(self._codes) < n:
+            capacity = max(n, 2 * len(self._codes), 1024)
+            codes = np.empty((capacity, self.quantizer.m), dtype=np.uint8)
+            codes[:self.size] = self._codes[:self.size]
+            self._codes = codes
+        for block_start in range(start, n, self.block_size):
+            block = matrix[block_start:block_start + self.block_size]
+            self._codes[block_start:block_start + len(block)] = self.quantizer.encode(block)
+        self.size = n
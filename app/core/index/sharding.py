@@ -0,0 +1,272 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import numpy as np
+
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.db.session import SessionLocal
+from app.infrastructure.persistence.embedding_codec import matrix_dtype
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import get_vector_store
+from app.core.index.vector_index import VectorIndex
+from app.core.index.topk import chunked_top_k_rows, top_k_indices, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+HASH = "hash"
+RANGE = "range"
+SHARD_PARTITIONS = (HASH, RANGE)
+
+# Parte da matriz carregada uma vez por processo shard, no initializer
+_shard_index: VectorIndex | None = None
+_shard_rows: "_ShardRows | None" = None
+
+
+class ShardPartition:
+    '''Assigns document ids to shards, by id modulo (hash) or by contiguous id ranges.
+
+    Range shards are cut evenly between the lowest and highest id known
+    when the partition is created; later ids all land on the last shard.
+    '''
+
+    def __init__(self, shards: int, scheme: str = HASH, cuts: Sequence[int] = ()):
+        if scheme not in SHARD_PARTITIONS:
+            raise ValueError(f"Unknown shard partition: {scheme}")
+        if scheme == RANGE and len(cuts) != shards - 1:
+            raise ValueError(f"Range partition over {shards} shards needs {shards - 1} cut points")
+        self.shards = shards
+        self.scheme = scheme
+        self.cuts = [int(cut) for cut in cuts]
+
+    @classmethod
+    def by_range(cls, shards: int, lowest: int | None, highest: int | None) -> "ShardPartition":
+        '''Even id ranges over [lowest, highest]; an empty table gets degenerate cuts.'''
+        lowest, highest = lowest or 1, highest or 1
+        cuts = np.linspace(lowest, highest + 1, shards + 1)[1:-1].astype(np.int64)
+        return cls(shards, RANGE, cuts.tolist())
+
+    def shard_of(self, ids: np.ndarray) -> np.ndarray:
+        '''Shard number of each id.'''
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.scheme == HASH:
+            return ids % self.shards
+        return np.searchsorted(np.asarray(self.cuts, dtype=np.int64), ids, side="right")
+
+    def selects(self, shard: int, ids: Any) -> Any:
+        '''Condition selecting the ids of `shard`; works on NumPy arrays and SQL id columns.'''
+        if self.scheme == HASH:
+            return ids % self.shards == shard
+        lowest = self.cuts[shard - 1] if shard > 0 else 0
+        if shard == self.shards - 1:
+            return ids >= lowest
+        return (ids >= lowest) & (ids < self.cuts[shard])
+
+
+def load_shard_from_database(partition: ShardPartition, shard: int) -> List[Tuple[int, np.ndarray]]:
+    '''(id, embedding) pairs of one shard, read by the shard process from the configured database.'''
+    with SessionLocal() as db:
+        repo = DocumentRepository(db, vector_store=get_vector_store())
+        return repo.list_embeddings(id_filter=lambda ids: partition.selects(shard, ids))
+
+
+def load_shard_attributes_from_database(partition: ShardPartition, shard: int) -> List[Tuple[int, Dict[str, Any]]]:
+    '''(id, metadata) pairs of one shard, read by the shard process from the configured database.'''
+    with SessionLocal() as db:
+        return DocumentRepository(db).list_attributes(id_filter=lambda ids: partition.selects(shard, ids))
+
+
+class _ShardRows:
+    '''Adapter so VectorIndex can load rows and attributes through its repository interface.'''
+    def __init__(self,
+                 rows: List[Tuple[int, np.ndarray]],
+                 attributes: Callable[[], List[Tuple[int, Dict[str, Any]]]]):
+        self.rows = rows
+        self.attributes = attributes
+
+    def list_embeddings(self) -> List[Tuple[int, np.ndarray]]:
+        return self.rows
+
+    def list_attributes(self) -> List[Tuple[int, Dict[str, Any]]]:
+        return self.attributes()
+
+
+def _init_shard(loader: Callable[[ShardPartition, int], List[Tuple[int, np.ndarray]]],
+                attribute_loader: Callable[[ShardPartition, int], List[Tuple[int, Dict[str, Any]]]],
+                partition: ShardPartition,
+                shard: int,
+                dtype) -> None:
+    global _shard_index, _shard_rows
+    _shard_index = VectorIndex(dtype=dtype)
+    # Os atributos só são lidos no primeiro filtro, como no índice residente
+    _shard_rows = _ShardRows(loader(partition, shard), lambda: attribute_loader(partition, shard))
+    _shard_index.ensure_loaded(_shard_rows)
+    # A matriz já tem uma cópia das linhas
+    _shard_rows.rows = []
+    logger.info(f"Shard {shard}/{partition.shards} loaded with {len(_shard_index)} embeddings")
+
+
+def _shard_size() -> int:
+    return len(_shard_index)
+
+
+def _shard_add(ids: np.ndarray, embeddings: np.ndarray, attributes: List[Dict[str, Any] | None] | None) -> int:
+    _shard_index.add(ids, embeddings, attributes)
+    return len(_shard_index)
+
+
+def _shard_filter(metadata_filter: Dict[str, Any], allowed: np.ndarray | None) -> np.ndarray:
+    '''Ids of this shard that pass a metadata filter, evaluated on the shard's own attribute bitmaps.'''
+    index = _shard_index
+    index.ensure_attributes_loaded(_shard_rows)
+    ids, _ = index.snapshot()
+    mask = index.filter_mask(metadata_filter)[:len(ids)]
+    ids = ids[:len(mask)]
+    if allowed is not None:
+        mask &= np.isin(ids, allowed)
+    return ids[mask]
+
+
+def _shard_search(queries: np.ndarray,
+                  top_k: int,
+                  allowed: np.ndarray | None) -> Tuple[np.ndarray, np.ndarray]:
+    '''Exact top-k of every query over this shard: (ids, scores), both (queries, k).'''
+    index = _shard_index
+    if len(index) == 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+    if allowed is not None:
+        rows = np.flatnonzero(np.isin(index.ids, allowed))
+        scores = queries @ np.asarray(index.matrix[rows], dtype=np.float32).T
+        best, best_scores = top_k_rows(scores, top_k)
+        return index.ids[rows][best], best_scores
+    block_size = max(1, settings.batch_query_score_block // len(queries))
+    best, best_scores = chunked_top_k_rows(
+        index.matrix,
+        top_k,
+        lambda block: queries @ block.astype(np.float32, copy=False).T,
+        block_size=block_size,
+    )
+    return index.ids[best], best_scores
+
+
+class ShardedIndex:
+    '''Document vectors partitioned across local shard processes, searched by scatter-gather.
+
+    Each shard is a spawned single-worker process holding the rows of its
+    partition in its own VectorIndex, read from the database by the shard
+    itself. A search sends the query embeddings to every shard, each
+    returns its exact top-k, and the parent keeps the best k of the union;
+    every global winner is in its shard's top-k, so the merge matches an
+    unsharded exact search. Metadata filters are evaluated by each shard
+    on attribute bitmaps of its own rows, read on the first filter.
+    '''
+
+    def __init__(self,
+                 partition: ShardPartition,
+                 loader: Callable[[ShardPartition, int], List[Tuple[int, np.ndarray]]] = load_shard_from_database,
+                 dtype=np.float32,
+                 attribute_loader: Callable[[ShardPartition, int], List[Tuple[int, Dict[str, Any]]]] =
+                 load_shard_attributes_from_database):
+        self.partition = partition
+        self._lock = threading.Lock()
+        self._sizes: List[int] | None = None
+        context = multiprocessing.get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_shard,
+                initargs=(loader, attribute_loader, partition, shard, dtype),
+            )
+            for shard in range(partition.shards)
+        ]
+        logger.info(f"Sharded index configured with {partition.shards} {partition.scheme} shards")
+
+    @property
+    def loaded(self) -> bool:
+        return self._sizes is not None
+
+    @property
+    def sizes(self) -> List[int]:
+        '''Number of embeddings held by each shard.'''
+        return list(self._sizes or [])
+
+    def __len__(self) -> int:
+        return sum(self._sizes or [])
+
+    def ensure_loaded(self, repo=None) -> None:
+        '''Start the shard processes and wait for their partitions; `repo` is unused, shards read their own.'''
+        if self._sizes is not None:
+            return
+        with self._lock:
+            if self._sizes is None:
+                futures = [executor.submit(_shard_size) for executor in self._executors]
+                self._sizes = [future.result() for future in futures]
+                logger.info(f"Sharded index loaded: {self._sizes} embeddings per shard")
+
+    def add(self,
+            ids: Sequence[int],
+            embeddings: np.ndarray,
+            attributes: Sequence[Dict[str, Any] | None] | None = None) -> None:
+        '''Route freshly committed embeddings (and their metadata) to their shards; a no-op before the load.'''
+        with self._lock:
+            if self._sizes is None or len(ids) == 0:
+                return
+            ids = np.asarray(ids, dtype=np.int64)
+            embeddings = np.asarray(embeddings).reshape(len(ids), -1)
+            owners = self.partition.shard_of(ids)
+            futures = {}
+            for shard in np.unique(owners).tolist():
+                owned = owners == shard
+                shard_attributes = [item for item, keep in zip(attributes, owned) if keep] if attributes else None
+                futures[shard] = self._executors[shard].submit(
+                    _shard_add, ids[owned], embeddings[owned], shard_attributes
+                )
+            for shard, future in futures.items():
+                self._sizes[shard] = future.result()
+
+    def search(self,
+               queries: np.ndarray,
+               top_ks: Sequence[int],
+               allowed: np.ndarray | None = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        '''Scatter (queries, dim) to every shard and merge; one (ids, scores) pair per query, best first.
+
+        `allowed` restricts the search to those document ids.
+        '''
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = max(top_ks)
+        # Todas as shards recebem a consulta antes de esperar qualquer resposta
+        futures = [executor.submit(_shard_search, queries, k, allowed) for executor in self._executors]
+        partials = [future.result() for future in futures]
+        ids = np.concatenate([shard_ids for shard_ids, _ in partials], axis=1)
+        scores = np.concatenate([shard_scores for _, shard_scores in partials], axis=1)
+        merged = []
+        for row_ids, row_scores, top_k in zip(ids, scores, top_ks):
+            best = top_k_indices(row_scores, top_k)
+            merged.append((row_ids[best], row_scores[best]))
+        logger.debug(f"Merged {scores.shape[1]} shard candidates per query from {len(partials)} shards")
+        return merged
+
+    def filter_ids(self, metadata_filter: Dict[str, Any], allowed: np.ndarray | None = None) -> np.ndarray:
+        '''Sorted ids passing a validated metadata filter (and in `allowed`, if given), gathered from every shard.'''
+        futures = [executor.submit(_shard_filter, metadata_filter, allowed) for executor in self._executors]
+        return np.sort(np.concatenate([future.result() for future in futures]))
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+@lru_cache
+def get_sharded_index() -> ShardedIndex | None:
+    '''Process-wide sharded document index, or None when INDEX_SHARDS is 0.'''
+    if settings.index_shards <= 0:
+        return None
+    if settings.shard_partition == RANGE:
+        with SessionLocal() as db:
+            partition = ShardPartition.by_range(settings.index_shards, *DocumentRepository(db).id_range())
+    else:
+        partition = ShardPartition(settings.index_shards, settings.shard_partition)
+    return ShardedIndex(partition, dtype=matrix_dtype(settings.embedding_storage_dtype))
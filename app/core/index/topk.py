@@ -0,0 +1,116 @@
+from typing import Callable, Tuple
+import numpy as np
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    '''Indices of the k highest scores, best first.
+
+    Uses argpartition to select the winners in O(n) and only sorts those k,
+    instead of a full O(n log n) argsort over every score.
+    '''
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def chunked_top_k(
+    matrix: np.ndarray,
+    k: int,
+    score_fn: Callable[[np.ndarray], np.ndarray],
+    block_size: int = 65536,
+    mask: np.ndarray | None = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''Score `matrix` in fixed-size row blocks keeping a running top-k.
+
+    Only one block of scores plus the current k winners is alive at any
+    time, so peak memory is bounded by `block_size` rather than by the
+    number of rows. Rows where the boolean `mask` is False score -inf
+    before selection and are never returned. Returns (row_indices,
+    scores) ordered best first.
+    '''
+    n = len(matrix)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    best_idx = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    excluded = None if mask is None else ~mask
+    for start in range(0, n, block_size):
+        block_scores = score_fn(matrix[start:start + block_size])
+        if excluded is not None:
+            np.copyto(block_scores, -np.inf, where=excluded[start:start + block_size])
+        local = top_k_indices(block_scores, k)
+        # Mescla os vencedores do bloco com o heap corrente e reduz de volta para k
+        merged_idx = np.concatenate([best_idx, local + start])
+        merged_scores = np.concatenate([best_scores, block_scores[local]])
+        keep = top_k_indices(merged_scores, k)
+        best_idx, best_scores = merged_idx[keep], merged_scores[keep]
+    if mask is not None:
+        kept = np.isfinite(best_scores)
+        best_idx, best_scores = best_idx[kept], best_scores[kept]
+    return best_idx, best_scores
+
+def rerank_exact(
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    query: np.ndarray,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''Re-score candidate rows against the full-precision matrix and keep the best k.'''
+    # Ordena as linhas para ler o arquivo mmap sequencialmente
+    rows = np.sort(rows)
+    exact = np.asarray(matrix[rows], dtype=np.float32) @ query
+    best = top_k_indices(exact, k)
+    return rows[best], exact[best]
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''Row-wise top_k_indices over a (queries, n) score matrix.
+
+    One argpartition and one argsort along axis 1 select every row's
+    winners at once. Returns (indices, scores), both (queries, k), best first.
+    '''
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=np.float32)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+def chunked_top_k_rows(
+    matrix: np.ndarray,
+    k: int,
+    score_fn: Callable[[np.ndarray], np.ndarray],
+    block_size: int = 65536,
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''chunked_top_k for many queries at once.
+
+    `score_fn` maps a block of rows to a (queries, block) score matrix,
+    typically one matrix-matrix product; each query keeps its own running
+    top-k. Returns (row_indices, scores), both (queries, k), best first.
+    '''
+    n = len(matrix)
+    k = min(k, n)
+    best_idx = best_scores = None
+    for start in range(0, n, block_size):
+        block_scores = score_fn(matrix[start:start + block_size])
+        local, local_scores = top_k_rows(block_scores, k)
+        if best_idx is None:
+            best_idx, best_scores = local + start, local_scores
+            continue
+        merged_idx = np.concatenate([best_idx, local + start], axis=1)
+        merged_scores = np.concatenate([best_scores, local_scores], axis=1)
+        keep, best_scores = top_k_rows(merged_scores, k)
+        best_idx = np.take_along_axis(merged_idx, keep, axis=1)
+    if best_idx is None:
+        return np.empty((0, 0), dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+    return best_idx, best_scores
@@ -0,0 +1,244 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
+from app.infrastructure.persistence.embedding_codec import matrix_dtype
+from app.infrastructure.settings import settings
+from app.core.index.engines import COMPRESSED_ENGINES, create_search_engine
+from app.core.index.attributes import AttributeIndex
+
+logger = logging.getLogger(__name__)
+
+
+def sorted_ids(ids: np.ndarray) -> np.ndarray:
+    '''`ids` as an ascending array, sorting only when they were not read in id order.'''
+    ids = np.asarray(ids, dtype=np.int64)
+    return ids if np.all(ids[1:] > ids[:-1]) else np.sort(ids)
+
+
+def unseen(loaded_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    '''Mask of the `ids` missing from the ascending `loaded_ids`.'''
+    slots = np.searchsorted(loaded_ids, ids)
+    found = slots < len(loaded_ids)
+    found[found] = loaded_ids[slots[found]] == ids[found]
+    return ~found
+
+
+class VectorIndex:
+    '''Process-wide, resident matrix of document embeddings.
+
+    Embeddings are loaded once from the repository and appended incrementally
+    as new documents are committed, so a search is a single matrix product
+    instead of hydrating every row on each request. When a memory-mapped
+    vector store is configured the index serves its views directly instead
+    of keeping a private copy. The matrix is float32, or float16 when a
+    16-bit storage dtype is configured; scoring upcasts it block by block.
+
+    `attributes` holds the document metadata as bitmaps aligned with the
+    rows; it is built on the first filtered query and kept in step by `add`.
+
+    A request may commit documents while the index loads and call `add`
+    after the load already read them, so ids seen by the load are skipped.
+    '''
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, store: MmapVectorStore | None = None, dtype=np.float32):
+        self._store = store
+        self.dtype = np.dtype(dtype) if store is None else store.dtype
+        self._lock = threading.RLock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix: np.ndarray | None = None
+        self._size = 0
+        self._loaded = False
+        self._engines = {}
+        self._loaded_ids = np.empty(0, dtype=np.int64)
+        self.attributes = AttributeIndex()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def ids(self) -> np.ndarray:
+        '''Document ids aligned with the rows of `matrix`.'''
+        if self._store is not None:
+            return self._store.ids
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        '''Contiguous (n, dim) view over the stored embeddings.'''
+        if self._store is not None:
+            return self._store.vectors
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=self.dtype)
+        return self._matrix[:self._size]
+
+    @property
+    def dim(self) -> int | None:
+        if self._store is not None:
+            return self._store.dim
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''(ids, matrix) views over the same rows, safe to score while `add` keeps appending.'''
+        with self._lock:
+            ids, matrix = self.ids, self.matrix
+        # O store grava fora deste lock: corta as duas views no mesmo número de linhas
+        n = min(len(ids), len(matrix))
+        return ids[:n], matrix[:n]
+
+    def __len__(self) -> int:
+        if self._store is not None:
+            return len(self._store)
+        return self._size
+
+    def ensure_loaded(self, repo) -> None:
+        '''Load every stored embedding from the repository on first use.'''
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self._store is not None:
+                # O arquivo mmap já é a matriz residente; nada para copiar
+                self._loaded = True
+                logger.info(f"Vector index backed by mmap store with {len(self._store)} embeddings")
+                return
+            rows = repo.list_embeddings()
+            ids = np.fromiter((doc_id for doc_id, _ in rows), dtype=np.int64, count=len(rows))
+            vectors = [vector for _, vector in rows]
+            self._reset()
+            self._engines = {}
+            self.attributes.clear()
+            if vectors:
+                self._append(ids, np.vstack(vectors))
+            self._loaded_ids = sorted_ids(ids)
+            self._loaded = True
+            logger.info(f"Vector index loaded with {self._size} embeddings")
+
+    def ensure_attributes_loaded(self, repo) -> None:
+        '''Build the metadata bitmaps from the repository on first use; the index must be loaded.'''
+        if self.attributes.loaded:
+            return
+        with self._lock:
+            if not self.attributes.loaded:
+                self.attributes.load(self.ids, repo.list_attributes())
+
+    def filter_mask(self, expression: Dict[str, Any]) -> np.ndarray:
+        '''Boolean row mask of a validated metadata filter; the attributes must be loaded.'''
+        mask = self.attributes.mask(expression)
+        if len(mask) < len(self):
+            # Linhas que chegaram sem passar pelo add não têm metadados: ficam fora do filtro
+            mask = np.concatenate([mask, np.zeros(len(self) - len(mask), dtype=bool)])
+        return mask[:len(self)]
+
+    def add(self,
+            ids: Sequence[int],
+            embeddings: np.ndarray,
+            attributes: Sequence[Dict[str, Any] | None] | None = None) -> None:
+        '''Append freshly committed embeddings (and their metadata) to the resident index.
+
+        While the index has not been loaded yet the call is a no-op: the
+        rows are already in the database and will be picked up by the load.
+        '''
+        with self._lock:
+            if not self._loaded or len(ids) == 0:
+                return
+            ids = np.asarray(ids, dtype=np.int64)
+            if self._store is None:
+                embeddings = np.asarray(embeddings).reshape(len(ids), -1)
+                fresh = unseen(self._loaded_ids, ids)
+                if not fresh.all():
+                    logger.debug(f"Skipping {int((~fresh).sum())} embeddings already read by the index load")
+                    ids, embeddings = ids[fresh], embeddings[fresh]
+                    attributes = [item for item, keep in zip(attributes, fresh) if keep] if attributes else None
+                    if len(ids) == 0:
+                        return
+                start = self._size
+                self._append(ids, embeddings)
+                rows = np.arange(start, self._size)
+            else:
+                # O repositório já gravou no arquivo, fora deste lock: outras ingestões podem ter
+                # gravado antes ou depois, então as linhas vêm do store e não do tamanho atual
+                rows = np.array([self._store.row_of(doc_id) for doc_id in ids], dtype=np.int64)
+            for engine in self._engines.values():
+                # Cada engine lembra até onde indexou; linhas de adds concorrentes entram uma vez só
+                if engine.size < len(self):
+                    engine.add(self.matrix, engine.size)
+            if self.attributes.loaded:
+                self.attributes.set_rows(rows, attributes or [None] * len(ids))
+            logger.debug(f"Appended {len(ids)} embeddings to vector index, size: {len(self)}")
+
+    def engine(self, name: str):
+        '''Approximate engine registered under `name`, built over the matrix on first use.'''
+        engine = self._engines.get(name)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    if self._store is None and name in COMPRESSED_ENGINES:
+                        logger.warning(
+                            f"Engine {name} keeps its codes next to the resident float32 matrix; "
+                            f"it only saves memory with VECTOR_STORE_BACKEND=mmap"
+                        )
+                    engine = create_search_engine(name)
+                    engine.build(self.matrix)
+                    self._engines[name] = engine
+        return engine
+
+    def save(self) -> None:
+        '''Persist engines that keep an on-disk copy (e.g. the HNSW graph).'''
+        with self._lock:
+            for engine in self._engines.values():
+                if hasattr(engine, "save"):
+                    engine.save()
+
+    def clear(self) -> None:
+        '''Drop all vectors and mark the index as not loaded.'''
+        with self._lock:
+            self._reset()
+            self._engines = {}
+            self.attributes.clear()
+            self._loaded = False
+
+    def _reset(self) -> None:
+        self._loaded_ids = np.empty(0, dtype=np.int64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = None
+        self._size = 0
+
+    def _append(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        needed = self._size + len(ids)
+        if self._matrix is None:
+            capacity = max(self._INITIAL_CAPACITY, needed)
+            self._matrix = np.empty((capacity, vectors.shape[1]), dtype=self.dtype)
+            self._ids = np.empty(capacity, dtype=np.int64)
+        elif vectors.shape[1] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._matrix.shape[1]}"
+            )
+        elif needed > len(self._matrix):
+            # Crescimento geométrico para manter o append amortizado O(1)
+            capacity = max(needed, 2 * len(self._matrix))
+            matrix = np.empty((capacity, self._matrix.shape[1]), dtype=self.dtype)
+            matrix[:self._size] = self._matrix[:self._size]
+            ids_buf = np.empty(capacity, dtype=np.int64)
+            ids_buf[:self._size] = self._ids[:self._size]
+            self._matrix, self._ids = matrix, ids_buf
+        self._matrix[self._size:needed] = vectors
+        self._ids[self._size:needed] = ids
+        self._size = needed
+
+@lru_cache
+def get_vector_index() -> VectorIndex:
+    return VectorIndex(store=get_vector_store(), dtype=matrix_dtype(settings.embedding_storage_dtype))
+
+@lru_cache
+def get_chunk_index() -> VectorIndex:
+    '''Resident index of chunk embeddings; its ids are chunk ids, not document ids.'''
+    return VectorIndex(dtype=matrix_dtype(settings.embedding_storage_dtype))
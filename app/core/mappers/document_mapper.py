@@ -1,16 +1,29 @@
+from app.infrastructure.settings import settings
 from app.infrastructure.persistence.models.document import DocumentModel
-from app.api.schemas.document import DocumentCreate, DocumentRead
+from app.infrastructure.persistence.embedding_codec import encode_embedding
+from app.api.schemas.document import DocumentCreate, DocumentRead, DocumentSummary
 
 class DocumentMapper:
     '''Mapper to convert between Document DTOs and ORM models.'''
 
     @staticmethod
-    def to_model(dto: DocumentCreate, embeddings) -> DocumentModel:
-        '''Converts a DocumentCreate DTO to a DocumentModel for persistence.'''
+    def to_model(dto: DocumentCreate, embeddings, storage_dtype: str | None = None) -> DocumentModel:
+        '''Converts a DocumentCreate DTO to a DocumentModel for persistence.
+
+        Arrays are encoded in `storage_dtype` (EMBEDDING_STORAGE_DTYPE by
+        default); raw bytes are stored as given and treated as float32.
+        '''
+        if not hasattr(embeddings, 'tobytes'):
+            return DocumentModel(
+                title=dto.title, content=dto.content, embedding=embeddings, attributes=dto.metadata or None
+            )
+        storage_dtype = storage_dtype or settings.embedding_storage_dtype
         return DocumentModel(
             title=dto.title,
             content=dto.content,
-            embedding=embeddings.tobytes() if hasattr(embeddings, 'tobytes') else embeddings,
+            embedding=encode_embedding(embeddings, storage_dtype),
+            embedding_dtype=storage_dtype,
+            attributes=dto.metadata or None,
         )
     
     @staticmethod
@@ -19,6 +32,14 @@ class DocumentMapper:
         return DocumentRead(
             id=model.id,
             title=model.title,
-            content=model.content
+            content=model.content,
+            metadata=model.attributes or {},
         )
     
+
+    @staticmethod
+    def to_listing(row) -> DocumentRead | DocumentSummary:
+        '''Converts a listing row to DocumentRead, or DocumentSummary when content was not selected.'''
+        if "content" in row._fields:
+            return DocumentRead(id=row.id, title=row.title, content=row.content, metadata=row.metadata)
+        return DocumentSummary(id=row.id, title=row.title)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.repositories.async_document_repository import AsyncDocumentRepository
+from app.core.services.embedding_service import EmbeddingService
+from app.core.services.inference_executor import run_inference
+from app.core.services.query_service import QueryService
+from app.core.index.vector_index import VectorIndex
+from app.core.index.bm25 import BM25Index
+from app.core.index.sharding import ShardedIndex
+from app.core.index.fusion import LEXICAL, SEMANTIC
+from app.api.schemas.query import DocumentQueryResult
+
+logger = logging.getLogger(__name__)
+
+class AsyncQueryService(QueryService):
+    '''QueryService for the async request path.
+
+    The query embedding is awaited through the micro-batcher (or encoded on
+    the inference pool when batching is off), index loads and scoring run
+    on worker threads, and titles are hydrated with an async statement, so
+    the event loop only awaits.
+    '''
+
+    def __init__(self,
+                 repo: AsyncDocumentRepository,
+                 embedding_service: EmbeddingService,
+                 index: VectorIndex | None = None,
+                 lexical_index: BM25Index | None = None,
+                 shards: ShardedIndex | None = None):
+        super().__init__(repo, embedding_service, index, lexical_index=lexical_index, shards=shards)
+
+    async def search(self,
+                     query: str,
+                     top_k: int | None = None,
+                     nprobe: int | None = None,
+                     ef_search: int | None = None,
+                     engine: str | None = None,
+                     mode: str | None = None,
+                     fusion: str | None = None,
+                     alpha: float | None = None,
+                     prefilter: bool = False,
+                     must_match: str | None = None,
+                     metadata_filter: Dict[str, Any] | None = None) -> List[DocumentQueryResult]:
+        top_k = top_k or settings.default_query_top_k
+        engine = engine or settings.search_engine
+        mode = mode or SEMANTIC
+        logger.debug(f"Performing async search with query: '{query}', top_k: {top_k}, engine: {engine}, mode: {mode}")
+
+        allowed = None
+        if must_match:
+            allowed = np.asarray(await self.repo.match_ids(must_match, settings.fts_max_candidates), dtype=np.int64)
+            if len(allowed) == 0:
+                return []
+        # Aqui o índice (ou as shards) é sempre carregado: rank_candidates roda numa thread, sem acesso à sessão async
+        documents = self.shards if self.shards is not None else self.index
+        if mode != LEXICAL:
+            await self.repo.load_index(documents)
+        mask = None
+        if metadata_filter and self.shards is not None:
+            await self.repo.load_index(self.shards)
+            allowed = await asyncio.to_thread(self.shards.filter_ids, metadata_filter, allowed)
+            if len(allowed) == 0:
+                return []
+        elif metadata_filter:
+            await self.repo.load_index(self.index)
+            await self.repo.load_attributes(self.index)
+            mask = self._filter_mask(metadata_filter, allowed)
+            allowed = self.index.ids[:len(mask)][mask]
+            if len(allowed) == 0:
+                return []
+        if mode != SEMANTIC or prefilter:
+            await self.repo.load_index(self.lexical_index)
+        if len(documents if mode != LEXICAL else self.lexical_index) == 0:
+            logger.warning("No documents found in repository")
+            return []
+
+        query_embedding = await self.embedding_service.embed_query_async(query) if mode != LEXICAL else None
+        ids, scores, _ = await asyncio.to_thread(
+            self.retrieve, query, query_embedding, top_k, engine, mode,
+            fusion=fusion, alpha=alpha, prefilter=prefilter, allowed=allowed, mask=mask,
+            nprobe=nprobe, ef_search=ef_search,
+        )
+        titles = await self.repo.get_titles_by_ids([int(i) for i in ids])
+        return self._to_results(ids, scores, titles)
+
+    async def search_batch(self,
+                           queries: Sequence[str],
+                           top_ks: Sequence[int | None],
+                           nprobe: int | None = None,
+                           ef_search: int | None = None,
+                           engine: str | None = None) -> List[List[DocumentQueryResult]]:
+        top_ks = [top_k or settings.default_query_top_k for top_k in top_ks]
+        engine = engine or settings.search_engine
+        logger.debug(f"Performing async batch search with {len(queries)} queries, engine: {engine}")
+
+        documents = self.shards if self.shards is not None else self.index
+        await self.repo.load_index(documents)
+        if len(documents) == 0:
+            logger.warning("No documents found in repository")
+            return [[] for _ in queries]
+
+        query_embeddings = await run_inference(self.embedding_service.embed_queries, list(queries))
+        ranked = await asyncio.to_thread(
+            self.rank_batch, query_embeddings, top_ks, engine, nprobe=nprobe, ef_search=ef_search
+        )
+        titles = await self.repo.get_titles_by_ids(sorted({int(i) for ids, _ in ranked for i in ids}))
+        return [self._to_results(ids, scores, titles) for ids, scores in ranked]
@@ -0,0 +1,49 @@
+import re
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+import numpy as np
+
+_WORD = re.compile(r"\S+")
+
+
+def word_offsets(text: str) -> List[Tuple[int, int]]:
+    '''Character spans of whitespace-separated words, for models without a fast tokenizer.'''
+    return [match.span() for match in _WORD.finditer(text)]
+
+
+def split_text(text: str,
+               offsets: Sequence[Tuple[int, int]],
+               max_tokens: int,
+               overlap: int) -> List[Tuple[int, int]]:
+    '''Cut a text into windows of `max_tokens` tokens, consecutive windows sharing `overlap` tokens.
+
+    `offsets` are the (start, end) characters of each token. Returns the
+    character span of every window; a text that fits in one window (or has
+    no tokens) is a single span covering all of it.
+    '''
+    if len(offsets) <= max_tokens:
+        return [(0, len(text))]
+    step = max(1, max_tokens - overlap)
+    spans = []
+    for first in range(0, len(offsets), step):
+        last = min(first + max_tokens, len(offsets)) - 1
+        spans.append((offsets[first][0], offsets[last][1]))
+        if last == len(offsets) - 1:
+            break
+    return spans
+
+
+@dataclass
+class ChunkBatch:
+    '''Chunks of a batch of documents, flattened in document order.'''
+    owners: np.ndarray                 # índice do documento dono de cada chunk
+    positions: np.ndarray              # posição do chunk dentro do documento
+    spans: List[Tuple[int, int]]
+    embeddings: np.ndarray
+
+
+def mean_document_embeddings(owners: np.ndarray, embeddings: np.ndarray, documents: int) -> np.ndarray:
+    '''Normalized mean of each document's chunk embeddings.'''
+    sums = np.zeros((documents, embeddings.shape[1]), dtype=np.float32)
+    np.add.at(sums, owners, embeddings)
+    return sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-10)
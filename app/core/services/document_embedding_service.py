@@ -0,0 +1,89 @@
+import hashlib
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.persistence.repositories.embedding_cache_repository import EmbeddingCacheRepository
+from app.core.services.embedding_service import EmbeddingService
+from app.core.services.inference_executor import run_inference
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _missing_texts(hashes: List[str], texts: List[str], cached: Dict[str, np.ndarray]) -> Dict[str, str]:
+    # Conteúdos repetidos no mesmo lote são codificados uma vez só
+    return {h: text for h, text in zip(hashes, texts) if h not in cached}
+
+
+def _assemble(hashes: List[str],
+              cached: Dict[str, np.ndarray],
+              computed: Dict[str, np.ndarray]) -> Tuple[np.ndarray, int]:
+    hits = sum(1 for h in hashes if h in cached)
+    logger.debug(f"Embedding cache served {hits} of {len(hashes)} texts, encoded {len(computed)}")
+    vectors = {**cached, **computed}
+    return np.vstack([vectors[h] for h in hashes]).astype(np.float32, copy=False), hits
+
+
+class DocumentEmbeddingService:
+    '''Embed document contents, reusing vectors cached by content hash.
+
+    Only texts whose (model name, SHA-256) is not in the persistent cache are
+    sent to the model, once per distinct content; new vectors are stored
+    for the next ingestion.
+    '''
+
+    def __init__(self, embedding_service: EmbeddingService, cache_repo: EmbeddingCacheRepository | None = None):
+        self.embedding_service = embedding_service
+        self.cache_repo = cache_repo
+
+    def embed_documents(self, texts: List[str]) -> Tuple[np.ndarray, int]:
+        '''Return (embeddings, number of texts served from the cache).'''
+        if self.cache_repo is None or not texts:
+            return self.embedding_service.embed_texts(texts), 0
+
+        model_name = self.embedding_service.model_name
+        hashes = [content_hash(text) for text in texts]
+        cached = self.cache_repo.get_many(model_name, hashes)
+        missing = _missing_texts(hashes, texts, cached)
+        computed = {}
+        if missing:
+            vectors = self.embedding_service.embed_texts(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self.cache_repo.put_many(model_name, computed)
+        return _assemble(hashes, cached, computed)
+
+
+class AsyncDocumentEmbeddingService:
+    '''DocumentEmbeddingService for the async routes.
+
+    The cache is read and written through the AsyncSession (reusing
+    EmbeddingCacheRepository via `run_sync`); only the encode runs on the
+    inference pool. With `db=None` the cache is skipped.
+    '''
+
+    def __init__(self, embedding_service: EmbeddingService, db: AsyncSession | None = None):
+        self.embedding_service = embedding_service
+        self.db = db
+
+    async def embed_documents(self, texts: List[str]) -> Tuple[np.ndarray, int]:
+        '''Return (embeddings, number of texts served from the cache).'''
+        if self.db is None or not texts:
+            return await run_inference(self.embedding_service.embed_texts, texts), 0
+
+        model_name = self.embedding_service.model_name
+        hashes = [content_hash(text) for text in texts]
+        cached = await self.db.run_sync(lambda session: EmbeddingCacheRepository(session).get_many(model_name, hashes))
+        missing = _missing_texts(hashes, texts, cached)
+        computed = {}
+        if missing:
+            vectors = await run_inference(self.embedding_service.embed_texts, list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            # Só é gravado no commit dos documentos, como no caminho síncrono
+            await self.db.run_sync(lambda session: EmbeddingCacheRepository(session).put_many(model_name, computed))
+        return _assemble(hashes, cached, computed)
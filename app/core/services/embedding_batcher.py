@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List
+import numpy as np
+
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+@dataclass
+class _PendingText:
+    text: str
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EmbeddingBatcher:
+    '''Coalesce concurrent single-text embedding calls into batched encodes.
+
+    Callers block in `submit` (typically from FastAPI's threadpool) while a
+    worker thread collects texts for up to `max_wait_ms` after the first one
+    arrives, or until `max_batch_size` texts are queued, encodes them with a
+    single `embed_fn` call and hands each caller its own row. Coroutines use
+    `enqueue` and await the returned future instead, so they hold no thread
+    while they wait.
+    '''
+
+    def __init__(self,
+                 embed_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = Histogram(_BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(_QUEUE_WAIT_MS_BUCKETS)
+        self._queue: queue.Queue[_PendingText | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, text: str, timeout: float | None = None) -> np.ndarray:
+        '''Embed one text as part of the next batch and wait for its row.'''
+        return self.enqueue(text).result(timeout=timeout)
+
+    def enqueue(self, text: str) -> Future:
+        '''Queue one text for the next batch; the future resolves to its row.'''
+        pending = _PendingText(text)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is closed")
+            if self._worker is None:
+                # Thread iniciada só no primeiro uso, para não existir em testes que não fazem busca
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            self._queue.put(pending)
+        return pending.future
+
+    def close(self) -> None:
+        '''Stop the worker after it drains the texts already queued.'''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._queue.put(None)
+        if worker is not None:
+            worker.join()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stop = False
+            deadline = first.enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[_PendingText]) -> None:
+        started = time.monotonic()
+        for pending in batch:
+            self.queue_wait_ms.observe((started - pending.enqueued_at) * 1000.0)
+        self.batch_sizes.observe(len(batch))
+        # Textos repetidos no mesmo lote são codificados uma vez
+        texts = list(dict.fromkeys(pending.text for pending in batch))
+        try:
+            embeddings = self.embed_fn(texts)
+        except Exception as exc:
+            logger.error(f"Batched embedding of {len(texts)} texts failed: {exc}")
+            for pending in batch:
+                pending.future.set_exception(exc)
+            return
+        rows = {text: embeddings[i] for i, text in enumerate(texts)}
+        for pending in batch:
+            pending.future.set_result(rows[pending.text])
+        logger.debug(f"Encoded batch of {len(texts)} texts for {len(batch)} callers")
@@ -0,0 +1,80 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List
+import numpy as np
+
+from app.core.services.length_bucketing import encode_bucketed
+
+logger = logging.getLogger(__name__)
+
+# Modelo carregado uma vez por processo worker, no initializer
+_worker_model = None
+_worker_bucketing = (0, 1)
+
+
+def load_sentence_transformer(model_name: str):
+    # Import tardio: o processo pai não precisa do torch só para criar o pool
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    '''L2-normalize rows as float32.'''
+    embeddings = embeddings.astype(np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / (norms + 1e-10)
+
+
+def _init_worker(model_loader: Callable[[str], Any],
+                 model_name: str,
+                 threads: int,
+                 token_budget: int,
+                 max_batch_size: int) -> None:
+    global _worker_model, _worker_bucketing
+    if threads > 0:
+        import torch
+        # Evita que N workers disputem todos os núcleos com threads intra-op
+        torch.set_num_threads(threads)
+    _worker_model = model_loader(model_name)
+    _worker_bucketing = (token_budget, max_batch_size)
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return normalize_embeddings(encode_bucketed(_worker_model, texts, *_worker_bucketing))
+
+
+class EmbeddingWorkerPool:
+    '''Process pool where each worker holds its own copy of the model.
+
+    `embed` splits a batch into one contiguous shard per worker and
+    reassembles the results in input order. Workers are started with
+    `spawn` (torch is not fork-safe) and load the model on first use.
+    '''
+
+    def __init__(self,
+                 model_name: str,
+                 workers: int,
+                 threads_per_worker: int = 1,
+                 token_budget: int = 0,
+                 max_batch_size: int = 32,
+                 model_loader: Callable[[str], Any] = load_sentence_transformer):
+        self.model_name = model_name
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_loader, model_name, threads_per_worker, token_budget, max_batch_size),
+        )
+        logger.info(f"Embedding worker pool configured with {workers} processes for {model_name}")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        '''Encode texts across the workers; rows come back in input order.'''
+        bounds = np.linspace(0, len(texts), min(self.workers, len(texts)) + 1).astype(int)
+        shards = [texts[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        logger.debug(f"Encoding {len(texts)} texts in {len(shards)} shards")
+        return np.vstack(list(self._executor.map(_encode_shard, shards)))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
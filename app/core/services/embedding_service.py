@@ -1,10 +1,18 @@
+import asyncio
 import logging
+import unicodedata
 from functools import lru_cache
-from typing import List
+from typing import List, Tuple
 import numpy as np
 
 from sentence_transformers import SentenceTransformer
 from app.infrastructure.settings import settings
+from app.core.cache.lru_cache import LRUCache
+from app.core.services.embedding_batcher import EmbeddingBatcher
+from app.core.services.inference_executor import run_inference
+from app.core.services.embedding_pool import EmbeddingWorkerPool, normalize_embeddings
+from app.core.services.length_bucketing import encode_bucketed
+from app.core.services.chunking import word_offsets
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +24,22 @@ class EmbeddingService:
         logger.info(f"Loading embedding model: {self.model_name}")
         self._model = SentenceTransformer(self.model_name)
         logger.info(f"Embedding model loaded successfully")
+        self.query_cache = LRUCache(
+            max_size=settings.query_cache_size,
+            ttl_seconds=settings.query_cache_ttl_seconds,
+        )
+        self.batcher = EmbeddingBatcher(
+            self.embed_texts,
+            max_batch_size=settings.query_batch_max_size,
+            max_wait_ms=settings.query_batch_max_wait_ms,
+        ) if settings.query_batching_enabled else None
+        self.pool = EmbeddingWorkerPool(
+            self.model_name,
+            workers=settings.embedding_pool_workers,
+            threads_per_worker=settings.embedding_pool_threads_per_worker,
+            token_budget=settings.embedding_token_budget,
+            max_batch_size=settings.embedding_max_batch_size,
+        ) if settings.embedding_pool_workers > 0 else None
 
     @property
     def model(self) -> SentenceTransformer:
@@ -24,18 +48,108 @@ class EmbeddingService:
         return self._model
     
     def embed_texts(self, texts: List[str]) -> np.ndarray:
-        '''Generate normalized embeddings for a list of texts.'''
+        '''Generate normalized embeddings for a list of texts.
+
+        Texts are encoded in length-sorted buckets of at most
+        EMBEDDING_TOKEN_BUDGET padded tokens. Batches of at least
+        EMBEDDING_POOL_MIN_BATCH texts are sharded across the worker pool
+        when it is enabled.
+        '''
+        if self.pool is not None and len(texts) >= settings.embedding_pool_min_batch:
+            logger.debug(f"Encoding {len(texts)} texts on the worker pool")
+            return self.pool.embed(texts)
+
         logger.debug(f"Encoding {len(texts)} texts with model {self.model_name}")
         
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        embeddings = embeddings.astype(np.float32)
-
-        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        embeddings = embeddings / (norms + 1e-10)
+        embeddings = encode_bucketed(
+            self.model, texts, settings.embedding_token_budget, settings.embedding_max_batch_size
+        )
+        embeddings = normalize_embeddings(embeddings)
         logger.debug(f"Generated normalized embeddings with shape {embeddings.shape}")
         
         return embeddings
 
+    def token_offsets(self, text: str) -> List[Tuple[int, int]]:
+        '''Character span of every model token in `text`, without truncation.
+
+        Falls back to whitespace words when the tokenizer cannot map offsets.
+        '''
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+            return word_offsets(text)
+        encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        return [tuple(span) for span in encoded["offset_mapping"]]
+
+    def close(self) -> None:
+        '''Stop the worker pool, if any.'''
+        if self.pool is not None:
+            self.pool.close()
+
+    def embed_query(self, text: str) -> np.ndarray:
+        '''Embed a single search query, served from the LRU cache when repeated.
+
+        Cache misses are coalesced with concurrent queries by the batcher.
+        '''
+        key = (self.model_name, normalize_query(text))
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            if self.batcher is not None:
+                embedding = self.batcher.submit(key[1])
+            else:
+                embedding = self.embed_texts([key[1]])[0]
+            embedding = self._cache_query(key, embedding)
+        return embedding
+
+    async def embed_query_async(self, text: str) -> np.ndarray:
+        '''embed_query for the event loop.
+
+        A cache miss awaits the batcher's future, so concurrent async queries
+        are coalesced without each holding an inference thread; without the
+        batcher the text is encoded on the inference pool.
+        '''
+        key = (self.model_name, normalize_query(text))
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            if self.batcher is not None:
+                embedding = await asyncio.wrap_future(self.batcher.enqueue(key[1]))
+            else:
+                embedding = (await run_inference(self.embed_texts, [key[1]]))[0]
+            embedding = self._cache_query(key, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        '''Embed many search queries with one model call for all cache misses.
+
+        Shares the LRU cache with embed_query; repeated queries in the same
+        call are encoded once. Returns a (len(texts), dim) float32 matrix.
+        '''
+        keys = [(self.model_name, normalize_query(text)) for text in texts]
+        found = {key: self.query_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, embedding in found.items() if embedding is None]
+        if missing:
+            logger.debug(f"Encoding {len(missing)} of {len(found)} distinct queries")
+            for key, embedding in zip(missing, self.embed_texts([text for _, text in missing])):
+                # Cópia por linha: o cache não prende a matriz do lote inteiro
+                embedding = embedding.copy()
+                embedding.setflags(write=False)
+                self.query_cache.put(key, embedding)
+                found[key] = embedding
+        return np.vstack([found[key] for key in keys])
+
+    def _cache_query(self, key: Tuple[str, str], embedding: np.ndarray) -> np.ndarray:
+        # Somente leitura: o mesmo array é devolvido para todas as requisições
+        embedding.setflags(write=False)
+        self.query_cache.put(key, embedding)
+        return embedding
+
+
+def normalize_query(text: str) -> str:
+    '''Canonical form used as cache key: NFC, trimmed, inner whitespace collapsed.
+
+    Case is preserved because cased models embed "Apple" and "apple" differently.
+    '''
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
 @lru_cache
 def get_embedding_service() -> EmbeddingService:
     return EmbeddingService()
\ No newline at end of file
@@ -0,0 +1,19 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable
+
+from app.infrastructure.settings import settings
+
+
+@lru_cache
+def get_inference_executor() -> ThreadPoolExecutor:
+    '''Dedicated bounded pool for model inference, separate from the event loop and Starlette's threadpool.'''
+    return ThreadPoolExecutor(max_workers=settings.inference_max_workers, thread_name_prefix="inference")
+
+
+async def run_inference(fn: Callable[..., Any], *args: Any) -> Any:
+    '''Run a blocking model call on the inference pool and await its result.'''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), functools.partial(fn, *args))
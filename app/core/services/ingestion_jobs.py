@@ -0,0 +1,158 @@
+import logging
+import queue
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from typing import Callable, List, Sequence
+from sqlalchemy.orm import Session
+
+from app.api.schemas.document import DocumentCreate
+from app.core.services.embedding_service import EmbeddingService, get_embedding_service
+from app.core.services.ingestion_service import IngestionService
+from app.core.index.vector_index import VectorIndex, get_chunk_index, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.db.session import SessionLocal
+from app.infrastructure.persistence.models.ingestion_job import COMPLETED, FAILED, IngestionJobModel
+from app.infrastructure.persistence.repositories.ingestion_job_repository import IngestionJobRepository, utcnow
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobQueue:
+    '''Worker pool that drains ingestion jobs persisted in the database.
+
+    Jobs and their pending documents live in SQLite, so `start` re-queues
+    whatever was queued or running when the process stopped. Each batch is
+    embedded, then the documents, the job progress and the removal of the
+    consumed items are committed together, so a resumed job neither skips
+    nor duplicates documents.
+
+    Several app processes share the database and each one re-queues the
+    same unfinished jobs, so a worker first claims the job with a single
+    conditional UPDATE and skips it when the claim fails. The claim is a
+    lease of `lease_seconds`, renewed with every batch: a job left running
+    by a process that died is taken over once its lease expires, on the
+    next start of any process.
+    '''
+
+    def __init__(self,
+                 session_factory: Callable[[], Session],
+                 embedding_service_factory: Callable[[], EmbeddingService],
+                 index: VectorIndex,
+                 vector_store: MmapVectorStore | None = None,
+                 workers: int = 1,
+                 batch_size: int = 256,
+                 chunk_index: VectorIndex | None = None,
+                 lexical_index: BM25Index | None = None,
+                 lease_seconds: float = 600):
+        self.session_factory = session_factory
+        self.embedding_service_factory = embedding_service_factory
+        self.index = index
+        self.vector_store = vector_store
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_index = chunk_index
+        self.lexical_index = lexical_index
+        self.lease_seconds = lease_seconds
+        self._queue: queue.Queue[int | None] = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        '''Re-queue unfinished jobs and start the worker threads.'''
+        self._stopping.clear()
+        with self.session_factory() as db:
+            pending = IngestionJobRepository(db).list_unfinished_ids()
+        for job_id in pending:
+            self._queue.put(job_id)
+        if pending:
+            logger.info(f"Resuming {len(pending)} unfinished ingestion jobs")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        '''Stop the workers after their current batch; unfinished jobs resume on next start.'''
+        self._stopping.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, db: Session, documents: Sequence[DocumentCreate]) -> IngestionJobModel:
+        '''Persist a new job and hand it to the workers.'''
+        job = IngestionJobRepository(db).create([(doc.title, doc.content, doc.metadata) for doc in documents])
+        self._queue.put(job.id)
+        logger.info(f"Queued ingestion job {job.id} with {job.total} documents")
+        return job
+
+    def process(self, job_id: int) -> None:
+        '''Ingest the remaining documents of one job in batches.'''
+        with self.session_factory() as db:
+            repo = IngestionJobRepository(db)
+            if not repo.claim(job_id, self.lease_seconds):
+                logger.debug(f"Ingestion job {job_id} is finished or owned by another worker, skipping")
+                return
+            job = repo.get(job_id)
+            job.started_at = job.started_at or utcnow()
+            db.commit()
+            try:
+                service = IngestionService(
+                    db, self.embedding_service_factory(), self.index,
+                    vector_store=self.vector_store, chunk_index=self.chunk_index,
+                    lexical_index=self.lexical_index,
+                )
+                while items := repo.next_items(job_id, self.batch_size):
+                    documents = [
+                        DocumentCreate(title=item.title, content=item.content, metadata=item.attributes or {})
+                        for item in items
+                    ]
+                    embeddings, cached, chunks = service.embed(documents)
+                    job.processed += len(items)
+                    job.cached += cached
+                    repo.delete_items(items)
+                    job.lease_expires_at = utcnow() + timedelta(seconds=self.lease_seconds)
+                    # Um commit só: documentos, progresso do job e remoção dos itens
+                    service.store(documents, embeddings, chunks)
+                    if self._stopping.is_set():
+                        # Libera o lease para que o próximo start retome o job na hora
+                        job.lease_expires_at = None
+                        db.commit()
+                        logger.info(f"Pausing ingestion job {job_id} at {job.processed}/{job.total} documents")
+                        return
+                job.status = COMPLETED
+            except Exception as exc:
+                db.rollback()
+                logger.error(f"Ingestion job {job_id} failed after {job.processed} documents: {exc}")
+                job.status = FAILED
+                job.error = str(exc)
+            job.finished_at = utcnow()
+            job.lease_expires_at = None
+            db.commit()
+            logger.info(f"Ingestion job {job_id} {job.status}: {job.processed}/{job.total} documents")
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            self.process(job_id)
+
+
+@lru_cache
+def get_ingestion_job_queue() -> IngestionJobQueue:
+    return IngestionJobQueue(
+        session_factory=SessionLocal,
+        # O modelo só é carregado quando um job roda
+        embedding_service_factory=get_embedding_service,
+        index=get_vector_index(),
+        vector_store=get_vector_store(),
+        workers=settings.ingest_job_workers,
+        batch_size=settings.ingest_job_batch_size,
+        lease_seconds=settings.ingest_job_lease_seconds,
+        chunk_index=get_chunk_index(),
+        lexical_index=get_lexical_index(),
+    )
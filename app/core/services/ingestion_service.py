@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from typing import List, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.schemas.document import DocumentCreate
+from app.core.services.embedding_service import EmbeddingService
+from app.core.services.document_embedding_service import AsyncDocumentEmbeddingService, DocumentEmbeddingService
+from app.core.services.chunking import ChunkBatch, mean_document_embeddings, split_text
+from app.core.mappers.document_mapper import DocumentMapper
+from app.core.index.vector_index import VectorIndex, get_chunk_index
+from app.core.index.bm25 import BM25Index, document_text, get_lexical_index
+from app.core.index.sharding import ShardedIndex, get_sharded_index
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.async_document_repository import AsyncDocumentRepository
+from app.infrastructure.persistence.repositories.chunk_repository import ChunkRepository
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.repositories.embedding_cache_repository import EmbeddingCacheRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore
+
+logger = logging.getLogger(__name__)
+
+def add_to_indexes(saved_docs: List[DocumentModel],
+                   documents: List[DocumentCreate],
+                   embeddings: np.ndarray,
+                   index: VectorIndex,
+                   lexical_index: BM25Index,
+                   shards: ShardedIndex | None = None) -> None:
+    '''Append freshly committed documents to the resident vector, lexical and sharded indexes.'''
+    ids = [doc.id for doc in saved_docs]
+    attributes = [doc.metadata for doc in documents]
+    index.add(ids, embeddings, attributes)
+    if shards is not None:
+        shards.add(ids, embeddings, attributes)
+    lexical_index.add(ids, [document_text(doc.title, doc.content) for doc in documents])
+
+
+class IngestionService:
+    '''Embed, persist and index one batch of documents.
+
+    Shared by the bulk endpoint and the streaming endpoint, which calls it
+    once per chunk so memory stays bounded by the chunk size. With
+    CHUNKING_ENABLED each content is split into overlapping token windows
+    that are embedded and indexed on their own; the document vector is then
+    the normalized mean of its chunks instead of a truncated encoding.
+    '''
+
+    def __init__(self,
+                 db: Session,
+                 embedding_service: EmbeddingService,
+                 index: VectorIndex,
+                 vector_store: MmapVectorStore | None = None,
+                 chunk_index: VectorIndex | None = None,
+                 lexical_index: BM25Index | None = None,
+                 shards: ShardedIndex | None = None):
+        self.repo = DocumentRepository(db, vector_store=vector_store)
+        cache_repo = EmbeddingCacheRepository(db) if settings.embedding_cache_enabled else None
+        self.embedding_service = embedding_service
+        self.embedder = DocumentEmbeddingService(embedding_service, cache_repo)
+        self.index = index
+        self.chunk_repo = ChunkRepository(db)
+        self.chunk_index = chunk_index if chunk_index is not None else get_chunk_index()
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.shards = shards if shards is not None else get_sharded_index()
+
+    def ingest(self, documents: List[DocumentCreate]) -> Tuple[List[DocumentModel], int]:
+        '''Return the saved documents and how many embeddings came from the cache.'''
+        if not documents:
+            return [], 0
+        embeddings, cached, chunks = self.embed(documents)
+        return self.store(documents, embeddings, chunks), cached
+
+    def embed(self, documents: List[DocumentCreate]) -> Tuple[np.ndarray, int, ChunkBatch | None]:
+        '''Embed the contents, returning (embeddings, number served from the cache, chunks).'''
+        if settings.chunking_enabled:
+            return self._embed_chunks(documents)
+        contents = [doc.content for doc in documents]
+        logger.debug(f"Generating embeddings for {len(contents)} texts")
+        embeddings, cached = self.embedder.embed_documents(contents)
+        return embeddings, cached, None
+
+    def store(self,
+              documents: List[DocumentCreate],
+              embeddings: np.ndarray,
+              chunks: ChunkBatch | None = None) -> List[DocumentModel]:
+        '''Persist the documents (and chunks) in one commit and add them to the resident indexes.
+
+        Pending changes made on the same session (e.g. job progress) are
+        committed atomically with the documents.
+        '''
+        models = [
+            DocumentMapper.to_model(doc, emb)
+            for doc, emb in zip(documents, embeddings)
+        ]
+        chunk_ids: List[int] = []
+
+        def insert_chunks(saved: List[DocumentModel]) -> None:
+            owners = np.array([saved[owner].id for owner in chunks.owners], dtype=np.int64)
+            chunk_ids.extend(self.chunk_repo.insert_many(owners, chunks.positions, chunks.spans, chunks.embeddings))
+
+        saved_docs = self.repo.create_many(models, before_commit=insert_chunks if chunks is not None else None)
+        add_to_indexes(saved_docs, documents, embeddings, self.index, self.lexical_index, self.shards)
+        if chunk_ids:
+            self.chunk_index.add(chunk_ids, chunks.embeddings)
+        return saved_docs
+
+    def backfill_chunks(self, batch_size: int | None = None) -> int:
+        '''Chunk documents stored before CHUNKING_ENABLED was turned on; returns how many were chunked.
+
+        Chunk search only sees documents that have chunks, so this runs at
+        startup. The document vectors are kept as they were stored.
+        '''
+        batch_size = batch_size or settings.ingest_chunk_size
+        total = 0
+        after = None
+        while rows := self.chunk_repo.documents_without_chunks(batch_size, after):
+            chunks, _ = self._split([row.content for row in rows])
+            owners = np.array([rows[owner].id for owner in chunks.owners], dtype=np.int64)
+            self.chunk_repo.insert_many(owners, chunks.positions, chunks.spans, chunks.embeddings)
+            self.chunk_repo.db.commit()
+            total += len(rows)
+            after = rows[-1].id
+            logger.info(f"Backfilled chunks for {total} documents")
+        return total
+
+    def _embed_chunks(self, documents: List[DocumentCreate]) -> Tuple[np.ndarray, int, ChunkBatch]:
+        chunks, cached = self._split([doc.content for doc in documents])
+        return mean_document_embeddings(chunks.owners, chunks.embeddings, len(documents)), cached, chunks
+
+    def _split(self, contents: List[str]) -> Tuple[ChunkBatch, int]:
+        spans = [
+            split_text(
+                content,
+                self.embedding_service.token_offsets(content),
+                settings.chunk_max_tokens,
+                settings.chunk_overlap_tokens,
+            )
+            for content in contents
+        ]
+        counts = [len(content_spans) for content_spans in spans]
+        texts = [content[start:end] for content, content_spans in zip(contents, spans) for start, end in content_spans]
+        logger.debug(f"Generating embeddings for {len(texts)} chunks of {len(contents)} documents")
+        embeddings, cached = self.embedder.embed_documents(texts)
+        chunks = ChunkBatch(
+            owners=np.repeat(np.arange(len(contents)), counts),
+            positions=np.concatenate([np.arange(count) for count in counts]),
+            spans=[span for content_spans in spans for span in content_spans],
+            embeddings=embeddings,
+        )
+        return chunks, cached
+
+
+class AsyncIngestionService:
+    '''IngestionService for the async routes.
+
+    Documents and cached embeddings are written through the AsyncSession;
+    only the encode runs on the inference pool, and the resident index
+    updates run on a worker thread. Chunking is not supported here: async
+    mode refuses CHUNKING_ENABLED at startup.
+    '''
+
+    def __init__(self,
+                 db: AsyncSession,
+                 embedding_service: EmbeddingService,
+                 index: VectorIndex,
+                 vector_store: MmapVectorStore | None = None,
+                 lexical_index: BM25Index | None = None,
+                 shards: ShardedIndex | None = None):
+        self.repo = AsyncDocumentRepository(db, vector_store=vector_store)
+        self.embedder = AsyncDocumentEmbeddingService(embedding_service, db if settings.embedding_cache_enabled else None)
+        self.index = index
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.shards = shards if shards is not None else get_sharded_index()
+
+    async def ingest(self, documents: List[DocumentCreate]) -> Tuple[List[DocumentModel], int]:
+        '''Return the saved documents and how many embeddings came from the cache.'''
+        if not documents:
+            return [], 0
+        logger.debug(f"Generating embeddings for {len(documents)} texts")
+        embeddings, cached = await self.embedder.embed_documents([doc.content for doc in documents])
+        models = [DocumentMapper.to_model(doc, emb) for doc, emb in zip(documents, embeddings)]
+        saved_docs = await self.repo.create_many(models)
+        await asyncio.to_thread(
+            add_to_indexes, saved_docs, documents, embeddings, self.index, self.lexical_index, self.shards
+        )
+        return saved_docs, cached
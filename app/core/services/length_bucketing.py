@@ -0,0 +1,67 @@
+import logging
+from typing import Any, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def token_lengths(model: Any, texts: List[str]) -> np.ndarray:
+    '''Tokens per text after truncation; character counts when the model has no tokenizer.'''
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return np.array([len(text) for text in texts], dtype=np.int64)
+    encoded = tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=getattr(model, "max_seq_length", None),
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    return np.array([len(ids) for ids in encoded["input_ids"]], dtype=np.int64)
+
+
+def plan_buckets(sorted_lengths: np.ndarray, token_budget: int, max_batch_size: int) -> List[slice]:
+    '''Split ascending lengths into batches whose padded size stays within the token budget.
+
+    A batch is padded to its longest (last) text, so it grows while
+    `size * longest <= token_budget`: many short texts or few long ones.
+    Every batch holds at least one text.
+    '''
+    buckets: List[slice] = []
+    start, n = 0, len(sorted_lengths)
+    while start < n:
+        end = start + 1
+        while (end < n and end - start < max_batch_size
+               and (end + 1 - start) * sorted_lengths[end] <= token_budget):
+            end += 1
+        buckets.append(slice(start, end))
+        start = end
+    return buckets
+
+
+def encode_bucketed(model: Any, texts: List[str], token_budget: int, max_batch_size: int) -> np.ndarray:
+    '''Encode texts in length-homogeneous batches and return rows in input order.
+
+    Sorting by token length means short texts are no longer padded to the
+    longest text of a mixed batch. A batch that fits in one bucket is
+    encoded with a single plain call.
+    '''
+    if len(texts) <= 1 or token_budget <= 0:
+        return model.encode(texts, convert_to_numpy=True)
+    lengths = token_lengths(model, texts)
+    order = np.argsort(lengths, kind="stable")
+    buckets = plan_buckets(lengths[order], token_budget, max_batch_size)
+    if len(buckets) == 1:
+        return model.encode(texts, convert_to_numpy=True)
+
+    logger.debug(f"Encoding {len(texts)} texts in {len(buckets)} length buckets")
+    embeddings = None
+    for bucket in buckets:
+        rows = order[bucket]
+        batch = model.encode([texts[i] for i in rows], batch_size=len(rows), convert_to_numpy=True)
+        if embeddings is None:
+            embeddings = np.empty((len(texts), batch.shape[1]), dtype=batch.dtype)
+        # Devolve cada linha à posição original do texto
+        embeddings[rows] = batch
+    return embeddings
@@ -1,60 +1,434 @@
 import logging
-from typing import List
+from typing import Any, Dict, List, Sequence, Tuple
 import numpy as np
 
 from app.infrastructure.settings import settings
 from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.repositories.chunk_repository import ChunkRepository
 from app.core.services.embedding_service import EmbeddingService
+from app.core.index.vector_index import VectorIndex, get_chunk_index, get_vector_index
+from app.core.index.topk import chunked_top_k, chunked_top_k_rows, rerank_exact, top_k_indices
+from app.core.index.engines import EXACT
+from app.core.index.bm25 import BM25Index, get_lexical_index
+from app.core.index.sharding import ShardedIndex, get_sharded_index
+from app.core.index.fusion import HYBRID, LEXICAL, SEMANTIC, WEIGHTED, reciprocal_rank_fusion, weighted_fusion
+from app.core.index.aggregation import aggregate_chunks
 from app.api.schemas.query import DocumentQueryResult
 
 logger = logging.getLogger(__name__)
 
 class QueryService:
-    '''Service to perform semantic search queries.'''
+    '''Service to perform semantic search queries.
+
+    With CHUNKING_ENABLED and a chunk repository, queries are scored against
+    the chunk index and the best candidate chunks are folded into document
+    scores (max, or mean of the top-n chunks); each result carries the
+    character span of its best chunk.
+
+    Besides the default semantic mode, `lexical` ranks with the BM25 index
+    and `hybrid` fuses the BM25 and dense rankings (RRF or weighted). With
+    `prefilter` the dense side only scores the top BM25 candidates.
+
+    `must_match` is a hard constraint evaluated by the SQLite FTS5 mirror:
+    only the matching documents are ranked, and when the resident index
+    is not loaded their embeddings are gathered from the repository
+    instead of loading the whole matrix.
+
+    `metadata_filter` is evaluated against the attribute bitmaps of the
+    resident index into a row mask that is applied before top-k
+    selection: selective filters only read the rows that pass, broad ones
+    mask the regular block scan.
+
+    With INDEX_SHARDS the unfiltered dense ranking is a scatter-gather over
+    the shard processes instead of a scan of the resident matrix, and
+    candidate scoring uses the shards when they are loaded. Metadata
+    filters are evaluated by the shards into the allowed ids, so the
+    resident index is never loaded.
+    '''
 
     def __init__(self, 
                  repo: DocumentRepository, 
-                 embedding_service: EmbeddingService):
+                 embedding_service: EmbeddingService,
+                 index: VectorIndex | None = None,
+                 chunk_index: VectorIndex | None = None,
+                 chunk_repo: ChunkRepository | None = None,
+                 lexical_index: BM25Index | None = None,
+                 shards: ShardedIndex | None = None):
         self.repo = repo
         self.embedding_service = embedding_service
+        self.index = index if index is not None else get_vector_index()
+        self.chunk_index = chunk_index if chunk_index is not None else get_chunk_index()
+        self.chunk_repo = chunk_repo
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.shards = shards if shards is not None else get_sharded_index()
         logger.debug("QueryService initialized")
 
-    def search(self, query: str, top_k: int | None = None) -> List[DocumentQueryResult]:
+    def search(self,
+               query: str,
+               top_k: int | None = None,
+               nprobe: int | None = None,
+               ef_search: int | None = None,
+               engine: str | None = None,
+               mode: str | None = None,
+               fusion: str | None = None,
+               alpha: float | None = None,
+               prefilter: bool = False,
+               must_match: str | None = None,
+               metadata_filter: Dict[str, Any] | None = None) -> List[DocumentQueryResult]:
         top_k = top_k or settings.default_query_top_k
-        logger.debug(f"Performing search with query: '{query}', top_k: {top_k}")
+        engine = engine or settings.search_engine
+        mode = mode or SEMANTIC
+        logger.debug(f"Performing search with query: '{query}', top_k: {top_k}, engine: {engine}, mode: {mode}")
 
-        documents = self.repo.list_all()
-        logger.debug(f"Retrieved {len(documents)} documents from repository")
-
-        if not documents:
+        allowed = None
+        if must_match:
+            allowed = np.asarray(self.repo.match_ids(must_match, settings.fts_max_candidates), dtype=np.int64)
+            logger.debug(f"must_match '{must_match}' kept {len(allowed)} documents")
+        mask = None
+        if metadata_filter and self.shards is not None:
+            # Cada shard avalia o filtro nos próprios bitmaps; a matriz local não é carregada
+            self.shards.ensure_loaded(self.repo)
+            allowed = self.shards.filter_ids(metadata_filter, allowed)
+            logger.debug(f"Metadata filter kept {len(allowed)} documents on the shards")
+        elif metadata_filter:
+            self.index.ensure_loaded(self.repo)
+            self.index.ensure_attributes_loaded(self.repo)
+            mask = self._filter_mask(metadata_filter, allowed)
+            allowed = self.index.ids[:len(mask)][mask]
+            logger.debug(f"Metadata filter kept {len(allowed)} documents")
+        if mode == LEXICAL:
+            searched = self.lexical_index
+        elif allowed is not None:
+            # As candidatas bastam: não carrega a matriz inteira só por causa desta busca
+            searched = allowed
+        else:
+            searched = self._load_index()
+        if mode != SEMANTIC or prefilter:
+            self.lexical_index.ensure_loaded(self.repo)
+        if len(searched) == 0:
             logger.warning("No documents found in repository")
             return []
 
-        doc_embeddings = np.vstack([
-            np.frombuffer(doc.embedding, dtype=np.float32) for doc in documents
-        ])
+        query_embedding = self.embedding_service.embed_query(query) if mode != LEXICAL else None
+        ids, scores, chunks = self.retrieve(
+            query, query_embedding, top_k, engine, mode, fusion=fusion, alpha=alpha,
+            prefilter=prefilter, allowed=allowed, mask=mask, nprobe=nprobe, ef_search=ef_search,
+        )
+        titles = self.repo.get_titles_by_ids([int(i) for i in ids])
+        return self._to_results(ids, scores, titles, chunks)
+
+    def retrieve(self,
+                 query: str,
+                 query_embedding: np.ndarray | None,
+                 top_k: int,
+                 engine: str,
+                 mode: str = SEMANTIC,
+                 fusion: str | None = None,
+                 alpha: float | None = None,
+                 prefilter: bool = False,
+                 allowed: np.ndarray | None = None,
+                 mask: np.ndarray | None = None,
+                 nprobe: int | None = None,
+                 ef_search: int | None = None) -> Tuple[np.ndarray, np.ndarray, Dict[int, Tuple[int, int]] | None]:
+        '''Rank documents for one query in the given mode; returns (ids, scores, chunk spans or None).
+
+        `allowed` restricts every ranking to those document ids; `mask`, when
+        given, is the same restriction as a row mask over the document index.
+        '''
+        if mode == LEXICAL:
+            ids, scores = self.lexical_index.search(query, top_k, allowed=allowed)
+            return ids, scores, None
+        # Na fusão cada lista traz mais que top_k, senão a união não tem o que reordenar
+        depth = top_k if mode == SEMANTIC else max(top_k, settings.hybrid_depth)
+        ids, scores, chunks = self._dense(
+            query, query_embedding, depth, engine, prefilter, allowed, mask, nprobe, ef_search
+        )
+        if mode == HYBRID:
+            lexical_ids, lexical_scores = self.lexical_index.search(query, depth, allowed=allowed)
+            ids, scores = self._fuse(ids, scores, lexical_ids, lexical_scores, top_k, fusion, alpha)
+        return ids, scores, chunks
+
+    def rank(self,
+             query_embedding: np.ndarray,
+             top_k: int,
+             engine: str,
+             nprobe: int | None = None,
+             ef_search: int | None = None,
+             index: VectorIndex | ShardedIndex | None = None,
+             mask: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''Score a resident index (the document index by default) and return (ids, scores), best first.
+
+        With a boolean row `mask` only the selected rows can win. When at most
+        FILTER_GATHER_FRACTION of the rows are selected they are gathered and
+        scored directly; otherwise the block scan runs with masked rows set
+        to -inf. Approximate engines have no filtered search and take this
+        exact path. With shards configured the document index is searched on
+        them, always exactly.
+        '''
+        if mask is None and self._sharded(index):
+            if engine != EXACT:
+                logger.debug(f"Shards search exactly, ignoring engine {engine}")
+            return self.shards.search(query_embedding, [top_k])[0]
+        index = index if index is not None else self.index
+        doc_ids, doc_embeddings = index.snapshot()
+        if mask is not None:
+            # Linhas adicionadas depois do filtro não foram avaliadas por ele
+            doc_ids, doc_embeddings = doc_ids[:len(mask)], doc_embeddings[:len(mask)]
+            mask = mask[:len(doc_ids)]
+        logger.debug(f"Scoring against {len(doc_ids)} resident embeddings")
+
+        if mask is not None:
+            selected = int(np.count_nonzero(mask))
+            if engine != EXACT:
+                logger.debug(f"Engine {engine} does not filter, scoring the {selected} filtered rows exactly")
+            if selected <= settings.filter_gather_fraction * len(mask):
+                # Filtro seletivo: lê só as linhas aprovadas em vez de varrer a matriz
+                query = np.asarray(query_embedding, dtype=np.float32).ravel()
+                indices, scores = rerank_exact(doc_embeddings, np.flatnonzero(mask), query, top_k)
+            else:
+                indices, scores = chunked_top_k(
+                    doc_embeddings,
+                    top_k,
+                    lambda block: self._cosine_similarities(block, query_embedding),
+                    block_size=settings.search_block_size,
+                    mask=mask,
+                )
+        elif engine == EXACT:
+            # similaridade coseno, pontuada em blocos com top-k parcial
+            indices, scores = chunked_top_k(
+                doc_embeddings,
+                top_k,
+                lambda block: self._cosine_similarities(block, query_embedding),
+                block_size=settings.search_block_size,
+            )
+        else:
+            indices, scores = index.engine(engine).search(
+                doc_embeddings, query_embedding, top_k, nprobe=nprobe, ef_search=ef_search
+            )
+        logger.debug(f"Selected {len(indices)} candidates with engine {engine}")
+        return doc_ids[indices], scores
+
+    def rank_candidates(self,
+                        query_embedding: np.ndarray,
+                        candidate_ids: np.ndarray,
+                        top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''Exact cosine over only the given document ids (BM25 or FTS5 candidates).
+
+        Rows come from the shards or the resident index when loaded, otherwise
+        only the candidates' embeddings are read from the repository.
+        '''
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        if self.shards is not None and self.shards.loaded:
+            return self.shards.search(query, [top_k], allowed=np.asarray(candidate_ids, dtype=np.int64))[0]
+        if not self.index.loaded:
+            logger.debug(f"Gathering {len(candidate_ids)} candidate embeddings from the repository")
+            return self._score_pairs(self.repo.get_embeddings(candidate_ids), query, top_k)
+        doc_ids, doc_embeddings = self.index.snapshot()
+        rows = np.flatnonzero(np.isin(doc_ids, candidate_ids))
+        rows, scores = rerank_exact(doc_embeddings, rows, query, top_k)
+        logger.debug(f"Scored {len(rows)} of {len(candidate_ids)} candidates")
+        return doc_ids[rows], scores
+
+    def search_batch(self,
+                     queries: Sequence[str],
+                     top_ks: Sequence[int | None],
+                     nprobe: int | None = None,
+                     ef_search: int | None = None,
+                     engine: str | None = None) -> List[List[DocumentQueryResult]]:
+        '''Run many queries at once: one embedding call, one scoring pass, one title lookup.'''
+        top_ks = [top_k or settings.default_query_top_k for top_k in top_ks]
+        engine = engine or settings.search_engine
+        logger.debug(f"Performing batch search with {len(queries)} queries, engine: {engine}")
 
-        # similaridade coseno
-        query_embedding = self.embedding_service.embed_texts([query])[0]
-        sims = self._cosine_similarities(doc_embeddings, query_embedding)
-        logger.debug(f"Computed similarity scores, max: {sims.max():.4f}, min: {sims.min():.4f}")
+        index = self._load_index()
+        if len(index) == 0:
+            logger.warning("No documents found in repository")
+            return [[] for _ in queries]
+
+        query_embeddings = self.embedding_service.embed_queries(list(queries))
+        ranked = self.rank_batch(
+            query_embeddings, [self._candidates(top_k) for top_k in top_ks], engine,
+            nprobe=nprobe, ef_search=ef_search, index=index,
+        )
+        if index is self.chunk_index:
+            return self._chunk_results(ranked, top_ks)
+        titles = self.repo.get_titles_by_ids(sorted({int(i) for ids, _ in ranked for i in ids}))
+        return [self._to_results(ids, scores, titles) for ids, scores in ranked]
+
+    def rank_batch(self,
+                   query_embeddings: np.ndarray,
+                   top_ks: Sequence[int],
+                   engine: str,
+                   nprobe: int | None = None,
+                   ef_search: int | None = None,
+                   index: VectorIndex | ShardedIndex | None = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        '''rank for a (queries, dim) matrix; returns one (document ids, scores) pair per query.
+
+        The exact engine scores every query in a single matrix-matrix product
+        per block of documents and selects each row's top-k vectorized; the
+        approximate engines have per-query search paths and are looped.
+        '''
+        if self._sharded(index):
+            return self.shards.search(query_embeddings, top_ks)
+        index = index if index is not None else self.index
+        if engine != EXACT:
+            return [
+                self.rank(query, top_k, engine, nprobe=nprobe, ef_search=ef_search, index=index)
+                for query, top_k in zip(query_embeddings, top_ks)
+            ]
+        doc_ids, doc_embeddings = index.snapshot()
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        # Limita o bloco de pontuações (consultas x documentos) a um tamanho fixo
+        block_size = max(1, settings.batch_query_score_block // len(queries))
+        indices, scores = chunked_top_k_rows(
+            doc_embeddings,
+            max(top_ks),
+            lambda block: queries @ block.astype(np.float32, copy=False).T,
+            block_size=block_size,
+        )
+        logger.debug(f"Scored {len(queries)} queries against {len(doc_ids)} resident embeddings")
+        return [(doc_ids[row[:k]], row_scores[:k]) for row, row_scores, k in zip(indices, scores, top_ks)]
+
+    def _chunked(self) -> bool:
+        return settings.chunking_enabled and self.chunk_repo is not None
+
+    def _sharded(self, index: VectorIndex | ShardedIndex | None) -> bool:
+        return self.shards is not None and (index is None or index is self.shards)
+
+    def _load_index(self) -> VectorIndex | ShardedIndex:
+        '''The index searched by this service (chunks, shards or the resident matrix), loaded on first use.'''
+        if self._chunked():
+            self.chunk_index.ensure_loaded(self.chunk_repo)
+            return self.chunk_index
+        if self.shards is not None:
+            self.shards.ensure_loaded(self.repo)
+            return self.shards
+        self.index.ensure_loaded(self.repo)
+        return self.index
+
+    def _filter_mask(self, metadata_filter: Dict[str, Any], allowed: np.ndarray | None) -> np.ndarray:
+        '''Row mask of the document index for a filter, intersected with `allowed` ids.'''
+        mask = self.index.filter_mask(metadata_filter)
+        if allowed is not None:
+            mask &= np.isin(self.index.ids[:len(mask)], allowed)
+        return mask
+
+    def _candidates(self, top_k: int) -> int:
+        # Vários chunks podem ser do mesmo documento: busca mais candidatos que top_k
+        return top_k * settings.chunk_candidates if self._chunked() else top_k
+
+    def _dense(self,
+               query: str,
+               query_embedding: np.ndarray,
+               top_k: int,
+               engine: str,
+               prefilter: bool,
+               allowed: np.ndarray | None,
+               mask: np.ndarray | None,
+               nprobe: int | None,
+               ef_search: int | None) -> Tuple[np.ndarray, np.ndarray, Dict[int, Tuple[int, int]] | None]:
+        if self._chunked():
+            if prefilter:
+                logger.debug("Lexical prefilter does not apply to chunk search, scoring every chunk")
+            if allowed is not None:
+                # Só os chunks dos documentos permitidos, lidos do banco
+                ranked = self._score_pairs(
+                    self.chunk_repo.get_embeddings_for_documents(allowed),
+                    np.asarray(query_embedding, dtype=np.float32).ravel(),
+                    self._candidates(top_k),
+                )
+            else:
+                ranked = self.rank(
+                    query_embedding, self._candidates(top_k), engine,
+                    nprobe=nprobe, ef_search=ef_search, index=self.chunk_index,
+                )
+            return self._fold_chunks([ranked], [top_k])[0]
+        if prefilter:
+            lexical, _ = self.lexical_index.search(query, settings.lexical_prefilter_candidates, allowed=allowed)
+            if len(lexical):
+                return (*self.rank_candidates(query_embedding, lexical, top_k), None)
+            logger.debug("No lexical candidates, scoring without the prefilter")
+        if mask is not None:
+            return (*self.rank(query_embedding, top_k, engine, mask=mask), None)
+        if allowed is not None:
+            return (*self.rank_candidates(query_embedding, allowed, top_k), None)
+        return (*self.rank(query_embedding, top_k, engine, nprobe=nprobe, ef_search=ef_search), None)
+
+    @staticmethod
+    def _score_pairs(pairs: List[Tuple[int, np.ndarray]],
+                     query: np.ndarray,
+                     top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''Exact cosine over gathered (id, embedding) pairs.'''
+        if not pairs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids = np.array([pair[0] for pair in pairs], dtype=np.int64)
+        scores = np.vstack([pair[1] for pair in pairs]) @ query
+        best = top_k_indices(scores, top_k)
+        return ids[best], scores[best]
+
+    @staticmethod
+    def _fuse(dense_ids: np.ndarray,
+              dense_scores: np.ndarray,
+              lexical_ids: np.ndarray,
+              lexical_scores: np.ndarray,
+              top_k: int,
+              fusion: str | None,
+              alpha: float | None) -> Tuple[np.ndarray, np.ndarray]:
+        if (fusion or settings.hybrid_fusion) == WEIGHTED:
+            alpha = settings.hybrid_alpha if alpha is None else alpha
+            return weighted_fusion(dense_ids, dense_scores, lexical_ids, lexical_scores, top_k, alpha)
+        return reciprocal_rank_fusion([dense_ids, lexical_ids], top_k, k=settings.hybrid_rrf_k)
+
+    def _fold_chunks(self,
+                     ranked: List[Tuple[np.ndarray, np.ndarray]],
+                     top_ks: Sequence[int]) -> List[Tuple[np.ndarray, np.ndarray, Dict[int, Tuple[int, int]]]]:
+        '''Fold candidate chunks into (document ids, scores, best chunk span per document).'''
+        spans = self.chunk_repo.get_spans(sorted({int(i) for ids, _ in ranked for i in ids}))
+        folded = []
+        for (chunk_ids, scores), top_k in zip(ranked, top_ks):
+            known = np.array([int(i) in spans for i in chunk_ids], dtype=bool)
+            chunk_ids, scores = chunk_ids[known], scores[known]
+            owners = np.array([spans[int(i)][0] for i in chunk_ids], dtype=np.int64)
+            ids, doc_scores, best = aggregate_chunks(
+                owners, scores, top_k, settings.chunk_aggregation, settings.chunk_aggregation_top_n
+            )
+            offsets = {int(doc_id): spans[int(chunk_ids[row])][1:] for doc_id, row in zip(ids, best)}
+            folded.append((ids, doc_scores, offsets))
+        return folded
 
-        top_k = min(top_k, len(documents))
-        indices = np.argsort(-sims)[:top_k]
+    def _chunk_results(self,
+                       ranked: List[Tuple[np.ndarray, np.ndarray]],
+                       top_ks: Sequence[int]) -> List[List[DocumentQueryResult]]:
+        '''Fold candidate chunks into document results, one title lookup for all queries.'''
+        folded = self._fold_chunks(ranked, top_ks)
+        titles = self.repo.get_titles_by_ids(sorted({int(i) for ids, _, _ in folded for i in ids}))
+        return [self._to_results(ids, scores, titles, offsets) for ids, scores, offsets in folded]
 
+    @staticmethod
+    def _to_results(ids: np.ndarray,
+                    scores: np.ndarray,
+                    titles: Dict[int, str],
+                    chunks: Dict[int, Tuple[int, int]] | None = None) -> List[DocumentQueryResult]:
+        '''Pair the winning ids with their hydrated titles, preserving rank order.'''
         results: List[DocumentQueryResult] = []
-        for idx in indices:
-            doc = documents[idx]
+        for doc_id, score in zip(ids, scores):
+            doc_id = int(doc_id)
+            if doc_id not in titles:
+                continue
+            chunk_start, chunk_end = (chunks or {}).get(doc_id, (None, None))
             results.append(
                 DocumentQueryResult(
-                    id=doc.id,
-                    title=doc.title,
-                    score=float(sims[idx]),
+                    id=doc_id,
+                    title=titles[doc_id],
+                    score=float(score),
+                    chunk_start=chunk_start,
+                    chunk_end=chunk_end,
                 )
             )
         logger.info(f"Search completed, returning {len(results)} results")
         return results
     
     def _cosine_similarities(self, doc_embeddings: np.ndarray, query_embedding: np.ndarray) -> np.ndarray:
-        q = query_embedding.reshape(1, -1)
-        return (doc_embeddings @ q.T).ravel()
\ No newline at end of file
+        # Blocos float16 são convertidos aqui, um bloco por vez
+        q = query_embedding.reshape(1, -1).astype(np.float32, copy=False)
+        return (doc_embeddings.astype(np.float32, copy=False) @ q.T).ravel()
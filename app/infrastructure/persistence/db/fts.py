@@ -0,0 +1,48 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.infrastructure.persistence.models.document import CREATE_FTS, FTS_TABLE
+from app.infrastructure.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FullTextUnavailableError(RuntimeError):
+    pass
+
+
+def fts_enabled(bind: Engine | Connection) -> bool:
+    '''Whether the FTS5 mirror is maintained for this database.'''
+    return settings.fts_enabled and bind.dialect.name == "sqlite"
+
+
+def match_expression(query: str) -> str:
+    '''Quote every whitespace-separated term, so user input is never parsed as FTS5 syntax.
+
+    Terms are ANDed; a quoted term is a phrase, so `E-1042` matches the
+    adjacent tokens `e` and `1042`.
+    '''
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def sync_fts_table(engine: Engine) -> bool:
+    '''Create and backfill the mirror on databases that predate it, or drop it when disabled.
+
+    Returns True when the mirror was (re)built.
+    '''
+    if engine.dialect.name != "sqlite":
+        return False
+    exists = inspect(engine).has_table(FTS_TABLE)
+    with engine.begin() as conn:
+        if settings.fts_enabled and not exists:
+            conn.execute(text(CREATE_FTS))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            logger.info(f"Built full-text table {FTS_TABLE} from existing documents")
+            return True
+        if not settings.fts_enabled and exists:
+            # Sem manutenção o espelho ficaria defasado; é reconstruído ao reativar
+            conn.execute(text(f"DROP TABLE {FTS_TABLE}"))
+            logger.info(f"Dropped full-text table {FTS_TABLE} (FTS_ENABLED is off)")
+    return False
+
@@ -0,0 +1,31 @@
+import logging
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.infrastructure.persistence.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    '''Add nullable model columns that are missing from existing tables.
+
+    Stopgap until proper migrations: `create_all` only creates new tables,
+    so columns added to an existing model would otherwise break old databases.
+    '''
+    inspector = inspect(engine)
+    added: List[str] = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+                logger.info(f"Added missing column {table.name}.{column.name}")
+    return added
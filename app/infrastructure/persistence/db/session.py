@@ -1,4 +1,6 @@
+import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.infrastructure.settings import settings
@@ -16,4 +18,12 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def database_sidecar_path(suffix: str) -> str | None:
+    '''Path next to the SQLite database file, or None when there is no database file.'''
+    database = make_url(settings.database_url).database
+    if not database or database == ":memory:":
+        return None
+    return f"{os.path.splitext(database)[0]}{suffix}"
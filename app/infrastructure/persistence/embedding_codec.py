@@ -0,0 +1,47 @@
+import numpy as np
+
+FLOAT32 = "float32"
+FLOAT16 = "float16"
+BFLOAT16 = "bfloat16"
+
+STORAGE_DTYPES = (FLOAT32, FLOAT16, BFLOAT16)
+
+
+def encode_embedding(embedding: np.ndarray, storage_dtype: str = FLOAT32) -> bytes:
+    '''Serialize an embedding to bytes in the given storage dtype.'''
+    vector = np.asarray(embedding, dtype=np.float32)
+    if storage_dtype == FLOAT32:
+        return vector.tobytes()
+    if storage_dtype == FLOAT16:
+        return vector.astype(np.float16).tobytes()
+    if storage_dtype == BFLOAT16:
+        # bfloat16 = 16 bits altos do float32, com arredondamento para o par mais próximo
+        bits = np.ascontiguousarray(vector).view(np.uint32)
+        rounding = ((bits >> 16) & 1) + 0x7FFF
+        return ((bits + rounding) >> 16).astype(np.uint16).tobytes()
+    raise ValueError(f"Unsupported embedding storage dtype: {storage_dtype}")
+
+
+def decode_embedding(blob: bytes, storage_dtype: str | None = None) -> np.ndarray:
+    '''Deserialize an embedding blob to float32.
+
+    Rows written before the dtype was recorded (`None`) are float32.
+    '''
+    if storage_dtype in (None, FLOAT32):
+        return np.frombuffer(blob, dtype=np.float32)
+    if storage_dtype == FLOAT16:
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    if storage_dtype == BFLOAT16:
+        return (np.frombuffer(blob, dtype=np.uint16).astype(np.uint32) << 16).view(np.float32)
+    raise ValueError(f"Unsupported embedding storage dtype: {storage_dtype}")
+
+
+def matrix_dtype(storage_dtype: str) -> np.dtype:
+    '''In-memory dtype for a storage dtype.
+
+    NumPy has no bfloat16, so 16-bit storage is held as float16 in memory;
+    for unit-norm embeddings float16 keeps more precision than bfloat16.
+    '''
+    if storage_dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported embedding storage dtype: {storage_dtype}")
+    return np.dtype(np.float32) if storage_dtype == FLOAT32 else np.dtype(np.float16)
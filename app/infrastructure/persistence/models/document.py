@@ -1,5 +1,13 @@
-from sqlalchemy import Column, Integer, String, LargeBinary
+from sqlalchemy import DDL, JSON, Column, Integer, String, LargeBinary, event
 from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.settings import settings
+
+FTS_TABLE = "documents_fts"
+# Tabela external-content: o FTS5 guarda só o índice, o texto continua em documents
+CREATE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, content, content='documents', content_rowid='id')"
+)
 
 class DocumentModel(Base):
     __tablename__ = "documents"
@@ -7,4 +15,17 @@ class DocumentModel(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     content = Column(String, nullable=False)
-    embedding = Column(LargeBinary, nullable=False)
\ No newline at end of file
+    # NULL quando o vetor vive no vector store mmap
+    embedding = Column(LargeBinary, nullable=True)
+    # NULL em linhas antigas, que são float32
+    embedding_dtype = Column(String(16), nullable=True)
+    # Metadados tipados (str, número, bool) usados nos filtros de busca
+    attributes = Column(JSON(none_as_null=True), nullable=True)
+
+
+# Bancos novos: o espelho FTS5 é criado junto com a tabela documents (só SQLite)
+event.listen(
+    DocumentModel.__table__,
+    "after_create",
+    DDL(CREATE_FTS).execute_if(dialect="sqlite", callable_=lambda *args, **kwargs: settings.fts_enabled),
+)
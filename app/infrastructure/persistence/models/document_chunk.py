@@ -0,0 +1,15 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, LargeBinary
+from app.infrastructure.persistence.db.base import Base
+
+class DocumentChunkModel(Base):
+    '''Token window of a document's content, embedded on its own.'''
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    # Offsets em caracteres dentro de DocumentModel.content
+    start_char = Column(Integer, nullable=False)
+    end_char = Column(Integer, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)
+    embedding_dtype = Column(String(16), nullable=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, LargeBinary
+from app.infrastructure.persistence.db.base import Base
+
+class EmbeddingCacheModel(Base):
+    __tablename__ = "embedding_cache"
+
+    model_name = Column(String(255), primary_key=True)
+    # SHA-256 do conteúdo em hexadecimal
+    content_hash = Column(String(64), primary_key=True)
+    embedding = Column(LargeBinary, nullable=False)
+    embedding_dtype = Column(String(16), nullable=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String
+from app.infrastructure.persistence.db.base import Base
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+class IngestionJobModel(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(16), nullable=False, default=QUEUED, index=True)
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    cached = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Até quando o worker que rodou o job por último é dono dele
+    lease_expires_at = Column(DateTime, nullable=True)
+
+class IngestionJobItemModel(Base):
+    '''Documents still waiting to be ingested; rows are deleted as batches commit.'''
+    __tablename__ = "ingestion_job_items"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("ingestion_jobs.id"), nullable=False, index=True)
+    title = Column(String(255), nullable=False)
+    content = Column(String, nullable=False)
+    attributes = Column(JSON(none_as_null=True), nullable=True)
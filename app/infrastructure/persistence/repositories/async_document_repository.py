@@ -0,0 +1,90 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Sequence
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository, match_query, page_query
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore
+
+
+class AsyncDocumentRepository:
+    '''AsyncSession-based repository for the async request path.
+
+    Reads and the FTS5 lookup are issued as native async statements;
+    `create_many` reuses DocumentRepository through `AsyncSession.run_sync`,
+    so the vector store handling lives in a single place. Loading a
+    resident index decodes every row, so it runs on a worker thread with
+    the sync session `sync_db` instead of on the event loop.
+    '''
+    def __init__(self,
+                 db: AsyncSession,
+                 vector_store: MmapVectorStore | None = None,
+                 sync_db: Session | None = None):
+        self.db = db
+        self.vector_store = vector_store
+        self.sync_db = sync_db
+
+    async def create_many(self, docs: List[DocumentModel]) -> List[DocumentModel]:
+        '''Create multiple DocumentModel instances in the database.'''
+        return await self.db.run_sync(lambda session: self._sync(session).create_many(docs))
+
+    async def list_all(self) -> List[DocumentModel]:
+        '''List all DocumentModel instances from the database.'''
+        result = await self.db.execute(select(DocumentModel))
+        return list(result.scalars())
+
+    async def list_page(self, limit: int, after: int | None = None, include_content: bool = True) -> List[Row]:
+        '''Return up to `limit` (id, title[, content]) rows with id greater than `after`.'''
+        result = await self.db.execute(page_query(after, limit, include_content))
+        return list(result)
+
+    async def iter_rows(self,
+                        after: int | None = None,
+                        limit: int | None = None,
+                        include_content: bool = True,
+                        batch_size: int = 1000) -> AsyncIterator[Row]:
+        '''Yield rows from a server-side cursor, fetching `batch_size` at a time.'''
+        result = await self.db.stream(page_query(after, limit, include_content).execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            for row in partition:
+                yield row
+
+    async def get_titles_by_ids(self, document_ids: Sequence[int]) -> Dict[int, str]:
+        '''Map the given document ids to their titles.'''
+        if not document_ids:
+            return {}
+        result = await self.db.execute(
+            select(DocumentModel.id, DocumentModel.title).where(DocumentModel.id.in_(list(document_ids)))
+        )
+        return {row.id: row.title for row in result}
+
+    async def match_ids(self, query: str, limit: int) -> List[int]:
+        '''Ids of documents whose title or content contain every term, best FTS5 rank first.'''
+        statement = match_query(self.db.get_bind(), query, limit)
+        if statement is None:
+            return []
+        result = await self.db.execute(statement)
+        return [row[0] for row in result]
+
+    async def get_by_id(self, document_id: int) -> DocumentModel | None:
+        '''Get a DocumentModel instance by its ID.'''
+        return await self.db.get(DocumentModel, document_id)
+
+    async def load_index(self, index) -> None:
+        '''Load a resident index (VectorIndex, BM25Index or the shards) if it has not been loaded yet.'''
+        if not index.loaded:
+            await asyncio.to_thread(index.ensure_loaded, self._sync(self._require_sync_db()))
+
+    async def load_attributes(self, index) -> None:
+        '''Build the metadata bitmaps of a loaded VectorIndex if they are not built yet.'''
+        if not index.attributes.loaded:
+            await asyncio.to_thread(index.ensure_attributes_loaded, self._sync(self._require_sync_db()))
+
+    def _require_sync_db(self) -> Session:
+        if self.sync_db is None:
+            raise RuntimeError("Loading a resident index needs the sync session (sync_db)")
+        return self.sync_db
+
+    def _sync(self, session) -> DocumentRepository:
+        return DocumentRepository(session, vector_store=self.vector_store)
@@ -0,0 +1,97 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import Row, exists, insert
+from sqlalchemy.orm import Session
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.models.document_chunk import DocumentChunkModel
+from app.infrastructure.persistence.embedding_codec import decode_embedding, encode_embedding
+
+# Abaixo do limite de variáveis por statement do SQLite
+_LOOKUP_BATCH = 500
+
+
+class ChunkRepository:
+    '''Repository for document chunks and their embeddings.'''
+    def __init__(self, db: Session):
+        self.db = db
+
+    def insert_many(self,
+                    document_ids: Sequence[int],
+                    positions: Sequence[int],
+                    spans: Sequence[Tuple[int, int]],
+                    embeddings: np.ndarray) -> List[int]:
+        '''Insert chunk rows without committing and return their ids in input order.
+
+        Meant to run inside the transaction that stores the documents.
+        '''
+        if len(document_ids) == 0:
+            return []
+        storage_dtype = settings.embedding_storage_dtype
+        rows = [
+            {
+                "document_id": int(document_id),
+                "position": int(position),
+                "start_char": int(start),
+                "end_char": int(end),
+                "embedding": encode_embedding(embedding, storage_dtype),
+                "embedding_dtype": storage_dtype,
+            }
+            for document_id, position, (start, end), embedding in zip(document_ids, positions, spans, embeddings)
+        ]
+        result = self.db.execute(
+            insert(DocumentChunkModel).returning(DocumentChunkModel.id, sort_by_parameter_order=True),
+            rows,
+        )
+        return list(result.scalars())
+
+    def documents_without_chunks(self, limit: int, after: int | None = None) -> List[Row]:
+        '''(id, content) of up to `limit` documents with no chunk rows, ordered by id after `after`.'''
+        query = (
+            self.db.query(DocumentModel.id, DocumentModel.content)
+            .filter(~exists().where(DocumentChunkModel.document_id == DocumentModel.id))
+        )
+        if after is not None:
+            query = query.filter(DocumentModel.id > after)
+        return query.order_by(DocumentModel.id).limit(limit).all()
+
+    def list_embeddings(self) -> List[Tuple[int, np.ndarray]]:
+        '''List (chunk id, float32 embedding) pairs, as VectorIndex expects.'''
+        rows = (
+            self.db.query(DocumentChunkModel.id, DocumentChunkModel.embedding, DocumentChunkModel.embedding_dtype)
+            .order_by(DocumentChunkModel.id)
+            .all()
+        )
+        return [(row.id, decode_embedding(row.embedding, row.embedding_dtype)) for row in rows]
+
+    def get_embeddings_for_documents(self, document_ids: Sequence[int]) -> List[Tuple[int, np.ndarray]]:
+        '''(chunk id, float32 embedding) pairs of every chunk of the given documents.'''
+        ids = list(dict.fromkeys(int(i) for i in document_ids))
+        pairs: List[Tuple[int, np.ndarray]] = []
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            rows = (
+                self.db.query(DocumentChunkModel.id, DocumentChunkModel.embedding, DocumentChunkModel.embedding_dtype)
+                .filter(DocumentChunkModel.document_id.in_(ids[start:start + _LOOKUP_BATCH]))
+                .all()
+            )
+            pairs.extend((row.id, decode_embedding(row.embedding, row.embedding_dtype)) for row in rows)
+        return pairs
+
+    def get_spans(self, chunk_ids: Sequence[int]) -> Dict[int, Tuple[int, int, int]]:
+        '''Map chunk ids to (document id, start char, end char).'''
+        ids = list(dict.fromkeys(int(i) for i in chunk_ids))
+        spans: Dict[int, Tuple[int, int, int]] = {}
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            rows = (
+                self.db.query(
+                    DocumentChunkModel.id,
+                    DocumentChunkModel.document_id,
+                    DocumentChunkModel.start_char,
+                    DocumentChunkModel.end_char,
+                )
+                .filter(DocumentChunkModel.id.in_(ids[start:start + _LOOKUP_BATCH]))
+                .all()
+            )
+            for row in rows:
+                spans[row.id] = (row.document_id, row.start_char, row.end_char)
+        return spans
@@ -1,33 +1,239 @@
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import JSON, Row, Select, TextClause, func, insert, literal_column, select, text, type_coerce, update
 from sqlalchemy.orm import Session
+from app.infrastructure.persistence.db.fts import FTS_TABLE, FullTextUnavailableError, fts_enabled, match_expression
 from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.embedding_codec import decode_embedding
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore
+
+
+# Abaixo do limite de variáveis por statement do SQLite
+_LOOKUP_BATCH = 500
+
+
+def page_query(after: int | None = None, limit: int | None = None, include_content: bool = True) -> Select:
+    '''Keyset query over documents ordered by id, starting after the given id.'''
+    columns = [DocumentModel.id, DocumentModel.title]
+    if include_content:
+        # {} em vez de null, para a listagem em stream bater com a paginada
+        metadata = func.coalesce(DocumentModel.attributes, literal_column("'{}'"))
+        columns += [DocumentModel.content, type_coerce(metadata, JSON).label("metadata")]
+    stmt = select(*columns).order_by(DocumentModel.id)
+    if after is not None:
+        stmt = stmt.where(DocumentModel.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def match_query(bind, query: str, limit: int) -> TextClause | None:
+    '''FTS5 statement selecting the ids that match every term, or None when the query has no terms.'''
+    if not fts_enabled(bind):
+        raise FullTextUnavailableError("must_match needs the SQLite FTS5 mirror (FTS_ENABLED)")
+    expression = match_expression(query)
+    if not expression:
+        return None
+    return text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :expression ORDER BY rank LIMIT :limit"
+    ).bindparams(expression=expression, limit=limit)
 
 
 class DocumentRepository:
     '''Repository to manage DocumentModel persistence.'''
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, vector_store: MmapVectorStore | None = None):
         self.db = db
+        self.vector_store = vector_store
 
     # Acabei não usando esse método por enquanto
     def create(self, doc: DocumentModel) -> DocumentModel:
         '''Create a single DocumentModel instance in the database.'''
-        self.db.add(doc)
-        self.db.commit()
-        self.db.refresh(doc)
-        return doc
+        return self.create_many([doc])[0]
+
+    def create_many(self,
+                    docs: List[DocumentModel],
+                    before_commit: Callable[[List[DocumentModel]], None] | None = None) -> List[DocumentModel]:
+        '''Create multiple DocumentModel instances in the database.
 
-    def create_many(self, docs: List[DocumentModel]) -> List[DocumentModel]:
-        '''Create multiple DocumentModel instances in the database.'''
-        self.db.add_all(docs)
+        Rows are written with a single Core `INSERT ... RETURNING id`, which
+        SQLAlchemy sends as batched multi-row statements, and the generated
+        ids are set on the given instances instead of refreshing each one.
+        Pending changes on the session are committed in the same transaction,
+        as is whatever `before_commit` writes once the ids are known. On
+        SQLite the rows are mirrored into the FTS5 table in that transaction.
+        With a vector store the embeddings are committed as blobs first and
+        cleared only once the store append succeeded.
+        '''
+        if not docs:
+            return docs
+        rows = [
+            {
+                "title": doc.title,
+                "content": doc.content,
+                "embedding": doc.embedding,
+                "embedding_dtype": doc.embedding_dtype,
+                "attributes": doc.attributes,
+            }
+            for doc in docs
+        ]
+        result = self.db.execute(
+            insert(DocumentModel).returning(DocumentModel.id, sort_by_parameter_order=True),
+            rows,
+        )
+        for doc, doc_id in zip(docs, result.scalars()):
+            doc.id = doc_id
+        if fts_enabled(self.db.get_bind()):
+            self.db.execute(
+                text(f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (:id, :title, :content)"),
+                [{"id": doc.id, "title": doc.title, "content": doc.content} for doc in docs],
+            )
+        if before_commit is not None:
+            before_commit(docs)
         self.db.commit()
-        for d in docs:
-            self.db.refresh(d)
+        if self.vector_store is not None:
+            self._move_to_vector_store(docs)
         return docs
 
+    def _move_to_vector_store(self, docs: List[DocumentModel]) -> None:
+        # O blob fica no SQLite até o append terminar: se o processo cair no meio,
+        # sync_vector_store ainda encontra o vetor no próximo start
+        vectors = np.vstack([decode_embedding(doc.embedding, doc.embedding_dtype) for doc in docs])
+        ids = [doc.id for doc in docs]
+        self.vector_store.append(ids, vectors)
+        self._clear_blobs(ids)
+        self.db.commit()
+        for doc in docs:
+            doc.embedding = None
+            doc.embedding_dtype = None
+
+    def _clear_blobs(self, ids: Sequence[int]) -> None:
+        '''Null the SQLite blobs of rows now held by the vector store, in IN lists of _LOOKUP_BATCH ids.'''
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            self.db.execute(
+                update(DocumentModel)
+                .where(DocumentModel.id.in_(ids[start:start + _LOOKUP_BATCH]))
+                .values(embedding=None, embedding_dtype=None)
+            )
+
     def list_all(self) -> List[DocumentModel]:
         '''List all DocumentModel instances from the database.'''
         return self.db.query(DocumentModel).all()
+
+    def list_page(self, limit: int, after: int | None = None, include_content: bool = True) -> List[Row]:
+        '''Return up to `limit` (id, title[, content]) rows with id greater than `after`.'''
+        return list(self.db.execute(page_query(after, limit, include_content)))
+
+    def iter_rows(self,
+                  after: int | None = None,
+                  limit: int | None = None,
+                  include_content: bool = True,
+                  batch_size: int = 1000) -> Iterator[Row]:
+        '''Yield rows from a server-side cursor, fetching `batch_size` at a time.'''
+        result = self.db.execute(
+            page_query(after, limit, include_content).execution_options(yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            yield from partition
+
+    def list_embeddings(self, id_filter: Callable[[Any], Any] | None = None) -> List[Tuple[int, np.ndarray]]:
+        '''List (id, float32 embedding) pairs without hydrating full ORM rows.
+
+        `id_filter` maps the id column (or the vector store's id array) to a
+        condition, e.g. `lambda ids: ids % 4 == 1`, to list a subset only.
+        '''
+        if self.vector_store is not None:
+            ids, vectors = self.vector_store.ids, self.vector_store.vectors
+            if id_filter is not None:
+                rows = np.flatnonzero(id_filter(ids))
+                ids, vectors = ids[rows], vectors[rows]
+            return [(int(doc_id), np.asarray(vector, dtype=np.float32)) for doc_id, vector in zip(ids, vectors)]
+        query = self.db.query(DocumentModel.id, DocumentModel.embedding, DocumentModel.embedding_dtype)
+        if id_filter is not None:
+            query = query.filter(id_filter(DocumentModel.id))
+        rows = query.order_by(DocumentModel.id).all()
+        return [(row.id, decode_embedding(row.embedding, row.embedding_dtype)) for row in rows]
+
+    def id_range(self) -> Tuple[int | None, int | None]:
+        '''Lowest and highest document id, (None, None) when the table is empty.'''
+        lowest, highest = self.db.query(func.min(DocumentModel.id), func.max(DocumentModel.id)).one()
+        return lowest, highest
+
+    def get_embeddings(self, document_ids: Sequence[int]) -> List[Tuple[int, np.ndarray]]:
+        '''(id, float32 embedding) pairs for the given documents only, in no particular order.'''
+        ids = list(dict.fromkeys(int(i) for i in document_ids))
+        if self.vector_store is not None:
+            return [(doc_id, np.asarray(vector, dtype=np.float32))
+                    for doc_id in ids if (vector := self.vector_store.get(doc_id)) is not None]
+        pairs: List[Tuple[int, np.ndarray]] = []
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            rows = (
+                self.db.query(DocumentModel.id, DocumentModel.embedding, DocumentModel.embedding_dtype)
+                .filter(DocumentModel.id.in_(ids[start:start + _LOOKUP_BATCH]))
+                .filter(DocumentModel.embedding.isnot(None))
+                .all()
+            )
+            pairs.extend((row.id, decode_embedding(row.embedding, row.embedding_dtype)) for row in rows)
+        return pairs
+
+    def match_ids(self, query: str, limit: int) -> List[int]:
+        '''Ids of documents whose title or content contain every term, best FTS5 rank first.'''
+        statement = match_query(self.db.get_bind(), query, limit)
+        if statement is None:
+            return []
+        return [row[0] for row in self.db.execute(statement)]
+
+    def list_attributes(self, id_filter: Callable[[Any], Any] | None = None) -> List[Tuple[int, Dict[str, Any]]]:
+        '''(id, metadata) pairs of the documents that have metadata; `id_filter` as in `list_embeddings`.'''
+        query = self.db.query(DocumentModel.id, DocumentModel.attributes).filter(DocumentModel.attributes.isnot(None))
+        if id_filter is not None:
+            query = query.filter(id_filter(DocumentModel.id))
+        return [(row.id, row.attributes) for row in query.order_by(DocumentModel.id).all()]
+
+    def get_embedding(self, document_id: int) -> np.ndarray | None:
+        '''Get a document vector, as a zero-copy view when backed by the mmap store.'''
+        if self.vector_store is not None:
+            return self.vector_store.get(document_id)
+        row = (
+            self.db.query(DocumentModel.embedding, DocumentModel.embedding_dtype)
+            .filter(DocumentModel.id == document_id)
+            .first()
+        )
+        if row is None or row.embedding is None:
+            return None
+        return decode_embedding(row.embedding, row.embedding_dtype)
+
+    def sync_vector_store(self) -> int:
+        '''Move embeddings still stored as SQLite blobs into the vector store.'''
+        if self.vector_store is None:
+            return 0
+        rows = (
+            self.db.query(DocumentModel.id, DocumentModel.embedding, DocumentModel.embedding_dtype)
+            .filter(DocumentModel.embedding.isnot(None))
+            .order_by(DocumentModel.id)
+            .all()
+        )
+        pending = [row for row in rows if row.id not in self.vector_store]
+        if pending:
+            self.vector_store.append(
+                [row.id for row in pending],
+                np.vstack([decode_embedding(row.embedding, row.embedding_dtype) for row in pending]),
+            )
+        if rows:
+            self._clear_blobs([row.id for row in rows])
+            self.db.commit()
+        return len(pending)
+
+    def get_titles_by_ids(self, document_ids: Sequence[int]) -> Dict[int, str]:
+        '''Map the given document ids to their titles.'''
+        if not document_ids:
+            return {}
+        rows = (
+            self.db.query(DocumentModel.id, DocumentModel.title)
+            .filter(DocumentModel.id.in_(list(document_ids)))
+            .all()
+        )
+        return {row.id: row.title for row in rows}
     
     def get_by_id(self, document_id: int) -> DocumentModel | None:
         '''Get a DocumentModel instance by its ID.'''
-        return self.db.query(DocumentModel).filter(DocumentModel.id == document_id).first()
\ No newline at end of file
+        return self.db.query(DocumentModel).filter(DocumentModel.id == document_id).first()
@@ -0,0 +1,72 @@
+from typing import Dict, Sequence
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.models.embedding_cache import EmbeddingCacheModel
+from app.infrastructure.persistence.embedding_codec import decode_embedding, encode_embedding
+
+# Abaixo do limite de variáveis por statement do SQLite
+_LOOKUP_BATCH = 500
+
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class EmbeddingCacheRepository:
+    '''Repository for embeddings keyed by (model name, content hash).'''
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_many(self, model_name: str, content_hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        '''Return the cached float32 embeddings found for the given hashes.'''
+        hashes = list(dict.fromkeys(content_hashes))
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(hashes), _LOOKUP_BATCH):
+            rows = (
+                self.db.query(
+                    EmbeddingCacheModel.content_hash,
+                    EmbeddingCacheModel.embedding,
+                    EmbeddingCacheModel.embedding_dtype,
+                )
+                .filter(
+                    EmbeddingCacheModel.model_name == model_name,
+                    EmbeddingCacheModel.content_hash.in_(hashes[start:start + _LOOKUP_BATCH]),
+                )
+                .all()
+            )
+            for row in rows:
+                found[row.content_hash] = decode_embedding(row.embedding, row.embedding_dtype)
+        return found
+
+    def put_many(self, model_name: str, embeddings: Dict[str, np.ndarray]) -> int:
+        '''Stage embeddings for hashes not cached yet; returns how many were added.
+
+        Does not commit: the rows are saved with the caller's transaction.
+        Hashes cached meanwhile by a concurrent request are skipped by the
+        database (`ON CONFLICT DO NOTHING`) instead of failing the insert.
+        '''
+        if not embeddings:
+            return 0
+        storage_dtype = settings.embedding_storage_dtype
+        rows = [
+            {
+                "model_name": model_name,
+                "content_hash": content_hash,
+                "embedding": encode_embedding(embedding, storage_dtype),
+                "embedding_dtype": storage_dtype,
+            }
+            for content_hash, embedding in embeddings.items()
+        ]
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            # Sem upsert no dialeto: filtra o que já existe, ainda sujeito à corrida
+            existing = self.get_many(model_name, list(embeddings))
+            rows = [row for row in rows if row["content_hash"] not in existing]
+            if rows:
+                self.db.execute(insert(EmbeddingCacheModel), rows)
+            return len(rows)
+        statement = _UPSERT_INSERTS[dialect](EmbeddingCacheModel).on_conflict_do_nothing()
+        # Pela conexão da sessão (mesma transação) para ter o rowcount do executemany
+        result = self.db.connection().execute(statement, rows)
+        return result.rowcount
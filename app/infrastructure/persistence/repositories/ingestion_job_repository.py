@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.infrastructure.persistence.models.ingestion_job import (
+    IngestionJobItemModel,
+    IngestionJobModel,
+    QUEUED,
+    RUNNING,
+)
+
+
+def utcnow() -> datetime:
+    # SQLite não guarda fuso: gravamos UTC sem tzinfo
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class IngestionJobRepository:
+    '''Repository to manage ingestion jobs and their pending documents.'''
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(self, documents: Sequence[Tuple[str, str, Dict[str, Any] | None]]) -> IngestionJobModel:
+        '''Persist a queued job with its (title, content, metadata) triples.'''
+        job = IngestionJobModel(status=QUEUED, total=len(documents), processed=0, cached=0, created_at=utcnow())
+        self.db.add(job)
+        self.db.flush()
+        self.db.add_all([
+            IngestionJobItemModel(job_id=job.id, title=title, content=content, attributes=metadata or None)
+            for title, content, metadata in documents
+        ])
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get(self, job_id: int) -> IngestionJobModel | None:
+        return self.db.get(IngestionJobModel, job_id)
+
+    def list_unfinished_ids(self) -> List[int]:
+        '''Ids of jobs that were queued or running, oldest first.'''
+        rows = (
+            self.db.query(IngestionJobModel.id)
+            .filter(IngestionJobModel.status.in_([QUEUED, RUNNING]))
+            .order_by(IngestionJobModel.id)
+            .all()
+        )
+        return [row.id for row in rows]
+
+    def claim(self, job_id: int, lease_seconds: float) -> bool:
+        '''Atomically take a queued job, or a running one whose lease expired, and commit.
+
+        Returns False when another worker (possibly in another process) owns
+        the job or it already finished.
+        '''
+        now = utcnow()
+        claimed = self.db.query(IngestionJobModel).filter(
+            IngestionJobModel.id == job_id,
+            or_(
+                IngestionJobModel.status == QUEUED,
+                (IngestionJobModel.status == RUNNING) & or_(
+                    IngestionJobModel.lease_expires_at.is_(None),
+                    IngestionJobModel.lease_expires_at < now,
+                ),
+            ),
+        ).update(
+            {"status": RUNNING, "lease_expires_at": now + timedelta(seconds=lease_seconds)},
+            synchronize_session=False,
+        )
+        self.db.commit()
+        return claimed == 1
+
+    def next_items(self, job_id: int, limit: int) -> List[IngestionJobItemModel]:
+        return (
+            self.db.query(IngestionJobItemModel)
+            .filter(IngestionJobItemModel.job_id == job_id)
+            .order_by(IngestionJobItemModel.id)
+            .limit(limit)
+            .all()
+        )
+
+    def delete_items(self, items: Sequence[IngestionJobItemModel]) -> None:
+        '''Mark items as consumed; takes effect with the next commit.'''
+        self.db.query(IngestionJobItemModel).filter(
+            IngestionJobItemModel.id.in_([item.id for item in items])
+        ).delete(synchronize_session=False)
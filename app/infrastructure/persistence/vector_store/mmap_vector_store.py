@@ -0,0 +1,178 @@
+import logging
+import os
+import struct
+import threading
+from functools import lru_cache
+from typing import Dict, Sequence
+import numpy as np
+
+from app.infrastructure.settings import settings
+from app.infrastructure.persistence.db.session import database_sidecar_path
+from app.infrastructure.persistence.embedding_codec import matrix_dtype
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"SSVS"
+_VERSION = 1
+# magic, version, dim, dtype: mantém os dados alinhados em 16 bytes
+_HEADER = struct.Struct("<4sIII")
+# Arquivos antigos gravavam 0 no campo reservado, que continua significando float32
+_DTYPE_CODES = {np.dtype(np.float32): 0, np.dtype(np.float16): 1}
+_DTYPES = {code: dtype for dtype, code in _DTYPE_CODES.items()}
+
+
+class MmapVectorStore:
+    '''Append-only vector file served through a read-only memory map.
+
+    Vectors are written to `<path>` (a small header followed by row-major
+    float32 or float16 rows) and the matching document ids to `<path>.ids`.
+    Readers get zero-copy views backed by the OS page cache instead of
+    SQLite blobs. The dtype of an existing file always wins over `dtype`.
+    '''
+
+    def __init__(self, path: str, dim: int | None = None, dtype=np.float32):
+        self.path = path
+        self.ids_path = f"{path}.ids"
+        self._lock = threading.Lock()
+        self._dim = dim
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in _DTYPE_CODES:
+            raise ValueError(f"Unsupported vector store dtype: {self.dtype}")
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors: np.ndarray | None = None
+        self._rows: Dict[int, int] = {}
+        self._open()
+
+    @property
+    def dim(self) -> int | None:
+        return self._dim
+
+    @property
+    def ids(self) -> np.ndarray:
+        '''Document ids aligned with the rows of `vectors`.'''
+        return self._ids
+
+    @property
+    def vectors(self) -> np.ndarray:
+        '''Read-only (n, dim) memory-mapped view over every stored vector.'''
+        if self._vectors is None:
+            return np.empty((0, self._dim or 0), dtype=self.dtype)
+        return self._vectors
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, document_id: int) -> bool:
+        return int(document_id) in self._rows
+
+    def row_of(self, document_id: int) -> int | None:
+        '''Row offset of a document in the vector file.'''
+        return self._rows.get(int(document_id))
+
+    def get(self, document_id: int) -> np.ndarray | None:
+        '''Zero-copy view of a single document vector.'''
+        row = self.row_of(document_id)
+        return None if row is None else self.vectors[row]
+
+    def append(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        '''Append vectors for newly created documents and remap the file.'''
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype).reshape(len(ids), -1)
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._write_header()
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match vector store dimension {self._dim}"
+                )
+            duplicated = [int(i) for i in ids if int(i) in self._rows]
+            if duplicated:
+                raise ValueError(f"Vectors already stored for ids: {duplicated[:10]}")
+
+            # Vetores primeiro, ids depois: um crash no meio deixa apenas linhas órfãs no fim do arquivo
+            with open(self.path, "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.ids_path, "ab") as f:
+                f.write(ids.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            start = len(self._ids)
+            self._rows.update((int(doc_id), start + offset) for offset, doc_id in enumerate(ids))
+            self._ids = np.concatenate([self._ids, ids])
+            self._remap()
+        logger.debug(f"Appended {len(ids)} vectors to {self.path}, total: {len(self._ids)}")
+
+    def _open(self) -> None:
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= _HEADER.size:
+            with open(self.path, "rb") as f:
+                magic, version, dim, dtype_code = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION or dtype_code not in _DTYPES:
+                raise ValueError(f"{self.path} is not a vector store file")
+            self.dtype = _DTYPES[dtype_code]
+            if self._dim is not None and self._dim != dim:
+                raise ValueError(f"Vector store dimension {dim} does not match expected {self._dim}")
+            self._dim = dim
+        elif self._dim is not None:
+            self._write_header()
+
+        ids = np.fromfile(self.ids_path, dtype=np.int64) if os.path.exists(self.ids_path) else np.empty(0, dtype=np.int64)
+        rows = self._stored_rows()
+        if rows != len(ids):
+            # Descarta a cauda de uma escrita interrompida para manter ids e vetores alinhados
+            count = min(rows, len(ids))
+            logger.warning(f"Vector store {self.path} has {rows} vectors and {len(ids)} ids, truncating to {count}")
+            ids = ids[:count]
+            self._truncate(count)
+        self._ids = ids
+        self._rows = {int(doc_id): row for row, doc_id in enumerate(ids)}
+        self._remap()
+        logger.info(f"Opened vector store {self.path} with {len(self._ids)} vectors")
+
+    def _stored_rows(self) -> int:
+        if not self._dim or not os.path.exists(self.path):
+            return 0
+        return (os.path.getsize(self.path) - _HEADER.size) // (self.dtype.itemsize * self._dim)
+
+    def _truncate(self, count: int) -> None:
+        if self._dim and os.path.exists(self.path):
+            os.truncate(self.path, _HEADER.size + count * self.dtype.itemsize * self._dim)
+        if os.path.exists(self.ids_path):
+            os.truncate(self.ids_path, count * 8)
+
+    def _write_header(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self._dim, _DTYPE_CODES[self.dtype]))
+
+    def _remap(self) -> None:
+        count = len(self._ids)
+        if count == 0 or not self._dim:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(
+            self.path, dtype=self.dtype, mode="r", offset=_HEADER.size, shape=(count, self._dim)
+        )
+
+
+def default_vector_store_path() -> str:
+    '''Place the vector file next to the SQLite database file.'''
+    if settings.vector_store_path:
+        return settings.vector_store_path
+    path = database_sidecar_path(".vectors")
+    if path is None:
+        raise ValueError("VECTOR_STORE_PATH must be set when the database is not a SQLite file")
+    return path
+
+
+@lru_cache
+def get_vector_store() -> MmapVectorStore | None:
+    '''Process-wide vector store, or None when embeddings live in SQLite.'''
+    if settings.vector_store_backend != "mmap":
+        return None
+    return MmapVectorStore(default_vector_store_path(), dtype=matrix_dtype(settings.embedding_storage_dtype))
@@ -8,6 +8,69 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./documents.db"
     embedding_model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"
     default_query_top_k: int = 5
+    search_block_size: int = 65536
+    batch_query_max_queries: int = 1024
+    batch_query_score_block: int = 4_194_304
+    vector_store_backend: str = "sqlite"
+    vector_store_path: str | None = None
+    embedding_storage_dtype: str = "float32"
+    query_cache_size: int = 1024
+    query_cache_ttl_seconds: float | None = None
+    embedding_cache_enabled: bool = True
+    query_batching_enabled: bool = True
+    query_batch_max_size: int = 32
+    query_batch_max_wait_ms: float = 2.0
+    async_mode: bool = False
+    ingest_chunk_size: int = 256
+    ingest_max_line_bytes: int = 1_048_576
+    ingest_job_workers: int = 1
+    ingest_job_batch_size: int = 256
+    ingest_job_lease_seconds: float = 600
+    list_page_size: int = 100
+    list_max_page_size: int = 1000
+    list_stream_batch_size: int = 1000
+    inference_max_workers: int = 2
+    embedding_token_budget: int = 16384
+    chunking_enabled: bool = False
+    chunk_max_tokens: int = 120
+    chunk_overlap_tokens: int = 20
+    chunk_aggregation: str = "max"
+    chunk_aggregation_top_n: int = 3
+    chunk_candidates: int = 10
+    embedding_max_batch_size: int = 128
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    hybrid_fusion: str = "rrf"
+    hybrid_rrf_k: int = 60
+    hybrid_alpha: float = 0.5
+    hybrid_depth: int = 100
+    lexical_prefilter_candidates: int = 1000
+    lexical_index_preload: bool = False
+    fts_enabled: bool = True
+    fts_max_candidates: int = 10000
+    vector_index_preload: bool = True
+    filter_gather_fraction: float = 0.05
+    index_shards: int = 0
+    shard_partition: str = "hash"
+    embedding_pool_workers: int = 0
+    embedding_pool_threads_per_worker: int = 1
+    embedding_pool_min_batch: int = 256
+    search_engine: str = "exact"
+    ivf_nlist: int = 1024
+    ivf_nprobe: int = 8
+    ivf_retrain_growth: float = 2.0
+    ivf_background_retrain: bool = True
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef_search: int = 64
+    hnsw_index_path: str | None = None
+    hnsw_save_interval: int = 1000
+    hnsw_background_inserts: bool = True
+    pq_m: int = 48
+    pq_rerank: bool = True
+    pq_rerank_factor: int = 4
+    binary_oversample: int = 10
+    binary_block_size: int = 65536
     log_level: str = "INFO"
 
     class Config:
@@ -1,15 +1,50 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from app.api.v1 import documents, query
+from app.api.v1 import documents, query, metrics, ingest, jobs, async_documents, async_query
 from app.infrastructure.persistence.db.base import Base
-from app.infrastructure.persistence.db.session import engine
+from app.infrastructure.persistence.db.session import engine, SessionLocal
+from app.infrastructure.persistence.db.migrations import add_missing_columns
+from app.infrastructure.persistence.db.fts import sync_fts_table
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.repositories.chunk_repository import ChunkRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import get_vector_store
+from app.core.index.vector_index import get_chunk_index, get_vector_index
+from app.core.index.bm25 import get_lexical_index
+from app.core.index.sharding import get_sharded_index
+from app.core.services.inference_executor import get_inference_executor
+from app.core.services.embedding_service import get_embedding_service
+from app.core.services.ingestion_jobs import get_ingestion_job_queue
+from app.core.services.ingestion_service import IngestionService
+from app.infrastructure.persistence.db.async_session import get_async_engine
 from app.core.logging import setup_logging
 from app.infrastructure.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs persistidos que ficaram pendentes são retomados aqui
+    get_ingestion_job_queue().start()
+    yield
+    logger.info("Stopping ingestion workers")
+    get_ingestion_job_queue().stop(timeout=30)
+    # Grava índices persistentes (ex.: grafo HNSW) para não reconstruir no próximo start
+    logger.info("Saving search indexes")
+    get_vector_index().save()
+    # Só encerra o pool se o serviço chegou a ser criado
+    if get_embedding_service.cache_info().currsize:
+        get_embedding_service().close()
+    if get_sharded_index.cache_info().currsize and get_sharded_index() is not None:
+        logger.info("Stopping index shards")
+        get_sharded_index().close()
+    if settings.async_mode:
+        get_inference_executor().shutdown(wait=False)
+        await get_async_engine().dispose()
+
+
 def create_app() -> FastAPI:
     # Configure logging
     setup_logging(settings.log_level)
@@ -17,15 +52,50 @@ def create_app() -> FastAPI:
     logger.info(f"Starting {settings.app_name}")
     logger.debug(f"Log level set to: {settings.log_level}")
     
-    app = FastAPI(title="Semantic Search API")
+    if settings.async_mode and settings.chunking_enabled:
+        # As rotas async de busca não pontuam chunks: melhor falhar do que buscar pela metade
+        raise ValueError("CHUNKING_ENABLED is not supported with ASYNC_MODE; the async query routes do not search chunks")
+
+    app = FastAPI(title="Semantic Search API", lifespan=lifespan)
 
     # Lembrar de usar migrations depois, alembic
     logger.info("Creating database tables")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    sync_fts_table(engine)
+
+    logger.info("Loading vector index")
+    with SessionLocal() as db:
+        repo = DocumentRepository(db, vector_store=get_vector_store())
+        migrated = repo.sync_vector_store()
+        if migrated:
+            logger.info(f"Moved {migrated} embeddings from SQLite into the vector store")
+        # Sem preload a matriz só é carregada na primeira busca sem must_match
+        if settings.vector_index_preload:
+            # Com shards cada processo shard carrega a sua parte; o processo da API não guarda a matriz
+            (get_sharded_index() or get_vector_index()).ensure_loaded(repo)
+        if settings.chunking_enabled:
+            # Documentos anteriores ao CHUNKING_ENABLED não têm chunks e sumiriam da busca
+            backfilled = IngestionService(db, get_embedding_service(), get_vector_index(),
+                                          vector_store=get_vector_store()).backfill_chunks()
+            if backfilled:
+                logger.info(f"Chunked {backfilled} documents stored before chunking was enabled")
+            get_chunk_index().ensure_loaded(ChunkRepository(db))
+        # Sem preload o BM25 é montado na primeira busca lexical ou híbrida
+        if settings.lexical_index_preload:
+            get_lexical_index().ensure_loaded(repo)
 
     logger.info("Registering API routers")
-    app.include_router(documents.router)
-    app.include_router(query.router)
+    if settings.async_mode:
+        logger.info("Async mode enabled: using AsyncSession and the inference pool")
+        app.include_router(async_documents.router)
+        app.include_router(async_query.router)
+    else:
+        app.include_router(documents.router)
+        app.include_router(query.router)
+    app.include_router(ingest.router)
+    app.include_router(jobs.router)
+    app.include_router(metrics.router)
 
     logger.info(f"{settings.app_name} startup complete")
     return app
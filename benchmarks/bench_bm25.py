@@ -0,0 +1,92 @@
+"""Benchmark the BM25 index: build, memory, query latency and lexical prefiltering of dense scoring.
+
+Uses a synthetic Zipf-distributed corpus and random unit vectors, so no model is needed.
+
+Usage:
+    python -m benchmarks.bench_bm25 --docs 100000 --dim 384 --candidates 1000
+"""
+import argparse
+from time import perf_counter
+from unittest.mock import Mock
+import numpy as np
+
+from app.core.index.bm25 import BM25Index
+from app.core.index.topk import chunked_top_k, rerank_exact
+
+
+def _corpus(n: int, vocabulary: int, length: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = np.minimum(rng.zipf(1.2, size=n * length), vocabulary) - 1
+    lengths = rng.integers(length // 2, length * 3 // 2, size=n)
+    texts, start = [], 0
+    for size in lengths:
+        texts.append(" ".join(f"w{w}" for w in words[start:start + size]))
+        start = (start + size) % (len(words) - 2 * length)
+    return texts
+
+
+def _measure(fn, repeats):
+    fn()  # aquecimento
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn()
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--length", type=int, default=60)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = _corpus(args.docs, args.vocabulary, args.length)
+    repo = Mock()
+    repo.iter_rows.return_value = [Mock(id=i + 1, title="", content=text) for i, text in enumerate(texts)]
+    index = BM25Index()
+    start = perf_counter()
+    index.ensure_loaded(repo)
+    build = perf_counter() - start
+    postings = len(index._rows)
+    print(f"{args.docs} docs, {index.vocabulary_size} terms, {postings} postings")
+    print(f"build {build:.2f}s, {index.nbytes / 2**20:.1f} MB ({index.nbytes / postings:.1f} bytes/posting)")
+
+    start = perf_counter()
+    index.add(list(range(args.docs + 1, args.docs + 1001)), texts[:1000])
+    print(f"incremental add of 1000 docs: {(perf_counter() - start) * 1000:.1f} ms")
+
+    # Consultas de frequência média: nem stopwords, nem termos raríssimos
+    queries = ["w40 w310", "w120 w900 w2500", "w75"]
+    for query in queries:
+        elapsed, (ids, _) = _measure(lambda: index.search(query, args.top_k), args.repeats)
+        print(f"bm25 '{query}': {elapsed * 1000:.2f} ms, {len(ids)} results")
+
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((len(index), args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    doc_ids = np.arange(1, len(index) + 1)
+    query_vector = matrix[0]
+
+    full, _ = _measure(
+        lambda: chunked_top_k(matrix, args.top_k, lambda block: block @ query_vector, block_size=65536),
+        args.repeats,
+    )
+
+    def prefiltered():
+        candidates, _ = index.search(queries[1], args.candidates)
+        rows = np.flatnonzero(np.isin(doc_ids, candidates))
+        return rerank_exact(matrix, rows, query_vector, args.top_k)
+
+    filtered, _ = _measure(prefiltered, args.repeats)
+    print(f"dense full scan {full * 1000:.2f} ms, bm25 prefilter ({args.candidates}) + dense {filtered * 1000:.2f} ms "
+          f"({full / filtered:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
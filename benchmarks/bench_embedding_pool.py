@@ -0,0 +1,70 @@
+"""Benchmark embedding throughput in-process against the multi-process worker pool.
+
+Needs the embedding model (downloaded on first run). Run it on the target
+host: the speed-up is bounded by the number of physical cores.
+
+Usage:
+    python -m benchmarks.bench_embedding_pool --texts 4096 --workers 1 2 4 8
+"""
+import argparse
+import os
+from time import perf_counter
+import numpy as np
+
+from app.core.services.embedding_pool import EmbeddingWorkerPool, load_sentence_transformer, normalize_embeddings
+from app.infrastructure.settings import settings
+
+_WORDS = (
+    "semantic search embeddings vector index query document ranking retrieval model "
+    "python database cosine similarity neural network language text corpus batch"
+).split()
+
+
+def _synthetic_texts(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(8, 96, size=n)
+    return [" ".join(rng.choice(_WORDS, size=length)) for length in lengths]
+
+
+def _measure(fn, texts, repeats):
+    fn(texts[:64])  # aquecimento: carrega o modelo nos workers
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn(texts)
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_name)
+    parser.add_argument("--texts", type=int, default=4096)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = _synthetic_texts(args.texts)
+    print(f"{os.cpu_count()} CPUs, {args.texts} texts, model {args.model}")
+    print(f"{'mode':<22} {'seconds':>9} {'texts/s':>10} {'speed-up':>9}")
+
+    model = load_sentence_transformer(args.model)
+    baseline, reference = _measure(
+        lambda batch: normalize_embeddings(model.encode(batch, convert_to_numpy=True)), texts, args.repeats
+    )
+    print(f"{'in-process':<22} {baseline:>9.2f} {args.texts / baseline:>10.1f} {1.0:>9.2f}")
+
+    for workers in args.workers:
+        pool = EmbeddingWorkerPool(args.model, workers, threads_per_worker=args.threads_per_worker)
+        try:
+            elapsed, result = _measure(pool.embed, texts, args.repeats)
+        finally:
+            pool.close()
+        match = "" if np.allclose(result, reference, atol=1e-4) else "  (MISMATCH)"
+        label = f"pool {workers}x{args.threads_per_worker} threads"
+        print(f"{label:<22} {elapsed:>9.2f} {args.texts / elapsed:>10.1f} {baseline / elapsed:>9.2f}{match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark metadata-filtered search against unfiltered and post-filtered search.
+
+Uses random unit vectors with a low-cardinality `tenant` attribute and a
+numeric `year`, so no model or database is needed.
+
+Usage:
+    python -m benchmarks.bench_filter --docs 200000 --dim 384
+"""
+import argparse
+from time import perf_counter
+from unittest.mock import Mock
+import numpy as np
+
+from app.core.index.vector_index import VectorIndex
+from app.core.services.query_service import QueryService
+from app.infrastructure.settings import settings
+
+
+def _time(fn, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn()
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--tenants", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((args.docs, args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = np.arange(1, args.docs + 1)
+    tenants = rng.integers(0, args.tenants, args.docs)
+    years = rng.integers(2000, 2025, args.docs)
+
+    repo = Mock()
+    repo.list_embeddings.return_value = list(zip(ids.tolist(), matrix))
+    repo.list_attributes.return_value = [
+        (int(i), {"tenant": f"t{t}", "lang": "pt" if t % 2 else "en", "year": int(y)})
+        for i, t, y in zip(ids, tenants, years)
+    ]
+    repo.get_titles_by_ids.side_effect = lambda found: {i: str(i) for i in found}
+    embedding_service = Mock()
+    embedding_service.embed_query.return_value = matrix[0]
+
+    index = VectorIndex()
+    index.ensure_loaded(repo)
+    load, _ = _time(lambda: (index.attributes.clear(), index.ensure_attributes_loaded(repo)), 1)
+    service = QueryService(repo, embedding_service, index)
+    print(f"attribute bitmaps: {load:.1f}s to build, {index.attributes.nbytes / 2**20:.1f} MB")
+
+    unfiltered, _ = _time(lambda: service.search("q", top_k=args.top_k), args.repeats)
+    print(f"{'unfiltered':<40} {unfiltered * 1000:>9.2f} ms")
+    filters = {
+        f"tenant (~{100 / args.tenants:.0f}%)": {"tenant": "t7"},
+        "tenant + year range": {"tenant": "t7", "year": {"$gte": 2020}},
+        "lang (~50%)": {"lang": "pt"},
+        "not tenant (~99%)": {"tenant": {"$ne": "t7"}},
+    }
+    for name, expression in filters.items():
+        filtered, _ = _time(lambda: service.search("q", top_k=args.top_k, metadata_filter=expression), args.repeats)
+        mask, _ = _time(lambda: index.filter_mask(expression), args.repeats)
+        print(f"{'filter ' + name:<40} {filtered * 1000:>9.2f} ms  (mask {mask * 1000:.2f} ms)")
+
+    # Referência: busca sem filtro com sobra e descarte no cliente
+    selected = set(ids[tenants == 7].tolist())
+    fetch = int(args.top_k * args.tenants * 2)
+    post, results = _time(
+        lambda: [r for r in service.search("q", top_k=fetch) if r.id in selected][:args.top_k], args.repeats
+    )
+    print(f"{'post-filter, over-fetch ' + str(fetch):<40} {post * 1000:>9.2f} ms  ({len(results)} kept)")
+    print(f"gather threshold: FILTER_GATHER_FRACTION={settings.filter_gather_fraction}")
+
+
+if __name__ == "__main__":
+    main()
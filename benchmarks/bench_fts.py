@@ -0,0 +1,90 @@
+"""Benchmark must_match (FTS5 candidates, gathered embeddings) against loading the resident index.
+
+Builds a throwaway SQLite database with synthetic documents and random unit vectors.
+
+Usage:
+    python -m benchmarks.bench_fts --docs 100000 --dim 384
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+from unittest.mock import Mock
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.index.vector_index import VectorIndex
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.persistence.embedding_codec import encode_embedding
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+
+
+def _populate(db, n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((n, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Termo raro (1 em 1000), comum (1 em 10) e um código de produto por documento
+    repo = DocumentRepository(db)
+    for start in range(0, n, 10_000):
+        repo.create_many([
+            DocumentModel(
+                title=f"Item {i}",
+                content=f"{'rare' if i % 1000 == 0 else 'plain'} {'common' if i % 10 == 0 else 'text'} sku-{i}",
+                embedding=encode_embedding(matrix[i], "float32"),
+                embedding_dtype="float32",
+            )
+            for i in range(start, min(start + 10_000, n))
+        ])
+    return matrix
+
+
+def _time(fn, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn()
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            start = perf_counter()
+            matrix = _populate(db, args.docs, args.dim)
+            print(f"inserted {args.docs} documents with FTS5 mirror in {perf_counter() - start:.1f}s")
+
+            embedding_service = Mock()
+            embedding_service.embed_query.return_value = matrix[1]
+            repo = DocumentRepository(db)
+
+            index = VectorIndex()
+            load, _ = _time(lambda: (index.clear(), index.ensure_loaded(repo)), 1)
+            loaded = QueryService(repo, embedding_service, index)
+            cold = QueryService(repo, embedding_service, VectorIndex())
+            print(f"resident index load: {load * 1000:.0f} ms")
+
+            full, _ = _time(lambda: loaded.search("q", top_k=10), args.repeats)
+            print(f"{'unconstrained, resident index':<42} {full * 1000:>9.2f} ms")
+            for term in ["sku-4242", "rare", "common"]:
+                matched = len(repo.match_ids(term, limit=args.docs))
+                gathered, _ = _time(lambda: cold.search("q", top_k=10, must_match=term), args.repeats)
+                resident, _ = _time(lambda: loaded.search("q", top_k=10, must_match=term), args.repeats)
+                print(f"{'must_match ' + term + f' ({matched} docs), gathered':<42} {gathered * 1000:>9.2f} ms")
+                print(f"{'must_match ' + term + ', resident rows':<42} {resident * 1000:>9.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark fixed-size batches against token-budget length buckets on a mixed-length corpus.
+
+Reports padded tokens (what the model actually computes) and texts/s.
+Needs the embedding model (downloaded on first run).
+
+Usage:
+    python -m benchmarks.bench_length_buckets --texts 2048 --budgets 4096 16384 65536
+"""
+import argparse
+from time import perf_counter
+import numpy as np
+
+from app.core.services.embedding_pool import load_sentence_transformer
+from app.core.services.length_bucketing import encode_bucketed, plan_buckets, token_lengths
+from app.infrastructure.settings import settings
+
+_WORDS = (
+    "semantic search embeddings vector index query document ranking retrieval model "
+    "python database cosine similarity neural network language text corpus batch"
+).split()
+
+
+def _mixed_corpus(n: int, seed: int = 0):
+    '''Mostly short texts with a long tail, like titles mixed with articles.'''
+    rng = np.random.default_rng(seed)
+    lengths = np.where(rng.random(n) < 0.8, rng.integers(3, 24, size=n), rng.integers(100, 400, size=n))
+    return [" ".join(rng.choice(_WORDS, size=length)) for length in lengths]
+
+
+def _padded_tokens(lengths: np.ndarray, batches) -> int:
+    return int(sum(len(rows) * lengths[rows].max() for rows in batches))
+
+
+def _measure(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn()
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.embedding_model_name)
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[4096, 16384, 65536])
+    parser.add_argument("--max-batch-size", type=int, default=settings.embedding_max_batch_size)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model = load_sentence_transformer(args.model)
+    texts = _mixed_corpus(args.texts)
+    lengths = token_lengths(model, texts)
+    real = int(lengths.sum())
+    model.encode(texts[:64], convert_to_numpy=True)  # aquecimento
+    print(f"{args.texts} texts, {real} real tokens, lengths {lengths.min()}-{lengths.max()}")
+    print(f"{'mode':<28} {'padded tokens':>14} {'efficiency':>11} {'seconds':>9} {'texts/s':>9}")
+
+    arrival = [np.arange(start, min(start + args.batch_size, len(texts)))
+               for start in range(0, len(texts), args.batch_size)]
+    # O sentence-transformers já ordena por caracteres dentro de uma chamada; aqui a ordem de chegada pura
+    elapsed, reference = _measure(
+        lambda: np.vstack([model.encode([texts[i] for i in rows], batch_size=len(rows)) for rows in arrival]),
+        args.repeats,
+    )
+    padded = _padded_tokens(lengths, arrival)
+    print(f"{'arrival order, ' + str(args.batch_size) + '/batch':<28} {padded:>14} {real / padded:>11.1%} "
+          f"{elapsed:>9.2f} {args.texts / elapsed:>9.1f}")
+
+    elapsed, _ = _measure(lambda: model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True), args.repeats)
+    print(f"{'encode(), ' + str(args.batch_size) + '/batch':<28} {'-':>14} {'-':>11} "
+          f"{elapsed:>9.2f} {args.texts / elapsed:>9.1f}")
+
+    order = np.argsort(lengths, kind="stable")
+    for budget in args.budgets:
+        buckets = [order[b] for b in plan_buckets(lengths[order], budget, args.max_batch_size)]
+        elapsed, result = _measure(lambda: encode_bucketed(model, texts, budget, args.max_batch_size), args.repeats)
+        padded = _padded_tokens(lengths, buckets)
+        match = "" if np.allclose(result, reference, atol=1e-4) else "  (MISMATCH)"
+        print(f"{'buckets, budget ' + str(budget):<28} {padded:>14} {real / padded:>11.1%} "
+              f"{elapsed:>9.2f} {args.texts / elapsed:>9.1f}{match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark product quantization: compression ratio, recall and latency.
+
+Usage:
+    python -m benchmarks.bench_pq --vectors 100000 --dim 384 --m 48 --top-k 10
+"""
+import argparse
+from time import perf_counter
+import numpy as np
+
+from app.core.index.pq import PQIndex
+
+
+def _clustered_corpus(n: int, dim: int, n_clusters: int = 256, seed: int = 0):
+    # Embeddings reais se agrupam por tópico; dados gaussianos puros subestimam o recall do PQ
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    matrix = centers[rng.integers(0, n_clusters, size=n)] + 0.5 * rng.standard_normal((n, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def _recall(found: np.ndarray, expected: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(expected.tolist())) / len(expected)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--m", type=int, nargs="+", default=[24, 48, 96])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    matrix = _clustered_corpus(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    queries = matrix[rng.choice(len(matrix), size=args.queries, replace=False)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [np.argsort(-(matrix @ q))[:args.top_k] for q in queries]
+
+    print(f"{'m':>4} {'bytes/vec':>10} {'ratio':>7} {'rerank':>7} {'recall@k':>9} {'median ms':>10} {'train s':>8}")
+    for m in args.m:
+        for rerank in (False, True):
+            index = PQIndex(m=m, rerank=rerank, rerank_factor=args.rerank_factor)
+            start = perf_counter()
+            index.build(matrix)
+            train_s = perf_counter() - start
+            recalls, timings = [], []
+            for q, expected in zip(queries, truth):
+                start = perf_counter()
+                rows, _ = index.search(matrix, q, args.top_k)
+                timings.append(perf_counter() - start)
+                recalls.append(_recall(rows, expected))
+            ratio = matrix.nbytes / index.codes.nbytes
+            print(
+                f"{index.quantizer.m:>4} {index.quantizer.m:>10} {ratio:>6.1f}x {str(rerank):>7} "
+                f"{np.mean(recalls):>9.3f} {np.median(timings) * 1000:>10.2f} {train_s:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
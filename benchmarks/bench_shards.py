@@ -0,0 +1,83 @@
+"""Benchmark scatter-gather search over shard processes against the single resident matrix.
+
+Shards generate their partition of the same random unit vectors, so no
+database or model is needed. Speedups need as many free cores as shards.
+
+Usage:
+    python -m benchmarks.bench_shards --docs 400000 --dim 384 --shards 1 2 4
+"""
+import argparse
+from functools import partial
+from time import perf_counter
+import numpy as np
+
+from app.core.index.sharding import HASH, ShardedIndex, ShardPartition
+from app.core.index.topk import chunked_top_k, chunked_top_k_rows
+from app.infrastructure.settings import settings
+
+
+def synthetic_rows(partition: ShardPartition, shard: int, docs: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    # Gera em blocos para cada shard não precisar da matriz inteira de uma vez
+    for start in range(0, docs, 50_000):
+        block = rng.standard_normal((min(50_000, docs - start), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        ids = np.arange(start + 1, start + len(block) + 1)
+        keep = partition.selects(shard, ids)
+        rows.extend(zip(ids[keep].tolist(), block[keep]))
+    return rows
+
+
+def _time(fn, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = fn()
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=400_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(ShardPartition(1), 0, args.docs, args.dim)
+    ids = np.array([doc_id for doc_id, _ in rows])
+    matrix = np.vstack([vector for _, vector in rows])
+    del rows
+    rng = np.random.default_rng(1)
+    query = matrix[rng.integers(len(matrix))]
+    batch = rng.standard_normal((args.batch, args.dim)).astype(np.float32)
+
+    single, (best, _) = _time(
+        lambda: chunked_top_k(matrix, args.top_k, lambda block: block @ query, block_size=settings.search_block_size),
+        args.repeats,
+    )
+    block_size = max(1, settings.batch_query_score_block // args.batch)
+    batched, _ = _time(lambda: chunked_top_k_rows(matrix, args.top_k, lambda block: batch @ block.T, block_size), 1)
+    expected = ids[best]
+    print(f"{'resident matrix':<24} {single * 1000:>9.2f} ms/query  {batched * 1000:>9.1f} ms/{args.batch} queries"
+          f"  {matrix.nbytes / 2**20:.0f} MB in one process")
+
+    for shards in args.shards:
+        index = ShardedIndex(
+            ShardPartition(shards, HASH), loader=partial(synthetic_rows, docs=args.docs, dim=args.dim)
+        )
+        load, _ = _time(index.ensure_loaded, 1)
+        search, merged = _time(lambda: index.search(query, [args.top_k]), args.repeats)
+        scatter, _ = _time(lambda: index.search(batch, [args.top_k] * args.batch), 1)
+        exact = np.array_equal(merged[0][0], expected)
+        print(f"{f'{shards} shards':<24} {search * 1000:>9.2f} ms/query  {scatter * 1000:>9.1f} ms/{args.batch} queries"
+              f"  {matrix.nbytes / shards / 2**20:.0f} MB per shard, loaded in {load:.1f}s, exact: {exact}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark full-argsort ranking against partial and chunked top-k selection.
+
+Usage:
+    python -m benchmarks.bench_topk --sizes 10000 100000 1000000 --dim 384 --top-k 5
+"""
+import argparse
+import tracemalloc
+from time import perf_counter
+import numpy as np
+
+from app.core.index.topk import top_k_indices, chunked_top_k
+
+
+def _random_corpus(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((n, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = rng.standard_normal(dim, dtype=np.float32)
+    return matrix, query / np.linalg.norm(query)
+
+
+def _full_argsort(matrix, query, k, block_size):
+    sims = matrix @ query
+    idx = np.argsort(-sims)[:k]
+    return idx, sims[idx]
+
+
+def _argpartition(matrix, query, k, block_size):
+    sims = matrix @ query
+    idx = top_k_indices(sims, k)
+    return idx, sims[idx]
+
+
+def _chunked(matrix, query, k, block_size):
+    return chunked_top_k(matrix, k, lambda block: block @ query, block_size=block_size)
+
+
+STRATEGIES = {
+    "argsort (current)": _full_argsort,
+    "argpartition": _argpartition,
+    "chunked": _chunked,
+}
+
+
+def _measure(fn, matrix, query, k, block_size, repeats):
+    fn(matrix, query, k, block_size)  # aquecimento
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        fn(matrix, query, k, block_size)
+        timings.append(perf_counter() - start)
+    tracemalloc.start()
+    result = fn(matrix, query, k, block_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(timings)), peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--block-size", type=int, default=65536)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'vectors':>10}  {'strategy':<18} {'median ms':>10} {'peak extra MB':>14}")
+    for n in args.sizes:
+        matrix, query = _random_corpus(n, args.dim)
+        reference = None
+        for name, fn in STRATEGIES.items():
+            elapsed, peak, (idx, _) = _measure(fn, matrix, query, args.top_k, args.block_size, args.repeats)
+            if reference is None:
+                reference = idx
+            match = "" if np.array_equal(idx, reference) else "  (MISMATCH)"
+            print(f"{n:>10}  {name:<18} {elapsed * 1000:>10.2f} {peak / 2**20:>14.2f}{match}")
+        del matrix
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """Pytest configuration and shared fixtures."""
 import pytest
 from typing import Generator
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
@@ -9,7 +9,9 @@ from fastapi.testclient import TestClient
 from fastapi import FastAPI
 
 from app.infrastructure.persistence.db.base import Base
-from app.api.v1 import documents, query
+from app.api.v1 import documents, query, metrics, ingest, jobs
+from app.core.cache.lru_cache import LRUCache
+from app.core.services.chunking import word_offsets
 
 
 # Test database URL (using SQLite in memory)
@@ -50,21 +52,69 @@ def mock_embedding_service():
     """Create a mocked embedding service for tests."""
     import numpy as np
     mock = Mock()
+    mock.model_name = "test-model"
     # Default behavior: return normalized embeddings
     mock.embed_texts.return_value = np.random.rand(1, 384).astype(np.float32)
+    mock.embed_query.side_effect = lambda text: mock.embed_texts([text])[0]
+    mock.embed_queries.side_effect = lambda texts: mock.embed_texts(texts)
+    mock.embed_query_async = AsyncMock(side_effect=lambda text: mock.embed_texts([text])[0])
+    mock.token_offsets.side_effect = word_offsets
+    mock.query_cache = LRUCache(max_size=8)
+    mock.batcher = None
     return mock
 
 
 @pytest.fixture(scope="function")
-def client(db_session, mock_embedding_service) -> Generator[TestClient, None, None]:
+def vector_index():
+    """Fresh resident index per test so vectors never leak between databases."""
+    from app.core.index.vector_index import VectorIndex
+    return VectorIndex()
+
+
+@pytest.fixture(scope="function")
+def chunk_index():
+    """Fresh resident chunk index per test."""
+    from app.core.index.vector_index import VectorIndex
+    return VectorIndex()
+
+
+@pytest.fixture(scope="function")
+def lexical_index():
+    """Fresh BM25 index per test."""
+    from app.core.index.bm25 import BM25Index
+    return BM25Index()
+
+
+@pytest.fixture(scope="function")
+def job_queue(db_engine, mock_embedding_service, vector_index, chunk_index, lexical_index):
+    """Ingestion job queue on the test database, without worker threads."""
+    from app.core.services.ingestion_jobs import IngestionJobQueue
+    return IngestionJobQueue(
+        session_factory=sessionmaker(autocommit=False, autoflush=False, bind=db_engine),
+        embedding_service_factory=lambda: mock_embedding_service,
+        index=vector_index,
+        batch_size=2,
+        chunk_index=chunk_index,
+        lexical_index=lexical_index,
+    )
+
+
+@pytest.fixture(scope="function")
+def client(db_session, mock_embedding_service, vector_index, chunk_index, lexical_index, job_queue) -> Generator[TestClient, None, None]:
     """Create a test client with database dependency override."""
     from app.infrastructure.persistence.db.session import get_db
     from app.core.services.embedding_service import get_embedding_service
+    from app.core.index.vector_index import get_chunk_index, get_vector_index
+    from app.core.index.bm25 import get_lexical_index
+    from app.core.services.ingestion_jobs import get_ingestion_job_queue
     
     # Create a minimal FastAPI app for testing
     app = FastAPI(title="Test Semantic Search API")
     app.include_router(documents.router)
     app.include_router(query.router)
+    app.include_router(ingest.router)
+    app.include_router(jobs.router)
+    app.include_router(metrics.router)
     
     def override_get_db():
         try:
@@ -75,6 +125,10 @@ def client(db_session, mock_embedding_service) -> Generator[TestClient, None, No
     # Override dependencies to use test database and mocked services
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_embedding_service] = lambda: mock_embedding_service
+    app.dependency_overrides[get_vector_index] = lambda: vector_index
+    app.dependency_overrides[get_chunk_index] = lambda: chunk_index
+    app.dependency_overrides[get_lexical_index] = lambda: lexical_index
+    app.dependency_overrides[get_ingestion_job_queue] = lambda: job_queue
     
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,45 @@
+"""Lightweight model stand-ins and synthetic data shared by tests, importable by spawned worker processes."""
+import os
+import zlib
+import numpy as np
+
+
+class FakeModel:
+    """Picklable stand-in for SentenceTransformer: encodes "n" as [n, 1, worker pid]."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def encode(self, texts, convert_to_numpy=True):
+        return np.array([[float(text), 1.0, float(os.getpid())] for text in texts], dtype=np.float64)
+
+
+def normalized(rows, dim, seed=0):
+    """Seeded random unit vectors, (rows, dim) float32."""
+    matrix = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def unit_embeddings(texts, dim=8):
+    """Stand-in for embed_texts: one unit vector per text, the same for a text in any batch."""
+    rows = np.array(
+        [np.random.default_rng(zlib.crc32(text.encode())).standard_normal(dim) for text in texts], dtype=np.float32
+    ).reshape(len(texts), dim)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def synthetic_shard_rows(partition, shard, n=600, dim=16):
+    """Deterministic unit vectors for ids 1..n, keeping only the rows of one shard."""
+    rng = np.random.default_rng(7)
+    matrix = rng.standard_normal((n, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = np.arange(1, n + 1)
+    keep = partition.selects(shard, ids)
+    return list(zip(ids[keep].tolist(), matrix[keep]))
+
+
+def synthetic_shard_attributes(partition, shard, n=600):
+    """Metadata {"parity": "even" | "odd", "n": id} for ids 1..n, keeping only the ids of one shard."""
+    ids = np.arange(1, n + 1)
+    keep = partition.selects(shard, ids)
+    return [(i, {"parity": "even" if i % 2 == 0 else "odd", "n": i}) for i in ids[keep].tolist()]
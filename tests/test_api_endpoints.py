@@ -1,8 +1,10 @@
 """Integration tests for API endpoints."""
 import json
+import pytest
 import numpy as np
 
 from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.settings import settings
 
 
 class TestDocumentsEndpoints:
@@ -95,6 +97,46 @@ class TestDocumentsEndpoints:
         assert all("title" in doc for doc in data)
         assert all("content" in doc for doc in data)
 
+    def test_list_documents_keyset_pagination(self, client, mock_embedding_service):
+        """Test limit/after walk the documents page by page."""
+        mock_embedding_service.embed_texts.return_value = np.eye(5, dtype=np.float32)
+        client.post("/api/v1/documents/", json=[
+            {"title": f"Doc {i}", "content": f"Content {i}"} for i in range(5)
+        ])
+
+        titles, params = [], {"limit": 2}
+        while True:
+            response = client.get("/api/v1/documents/", params=params)
+            titles += [doc["title"] for doc in response.json()]
+            if "X-Next-After" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-After"]
+
+        assert titles == [f"Doc {i}" for i in range(5)]
+
+    def test_list_documents_without_content(self, client, mock_embedding_service):
+        """Test include_content=false omits the content field."""
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        client.post("/api/v1/documents/", json=[{"title": "Doc", "content": "Long content"}])
+
+        response = client.get("/api/v1/documents/", params={"include_content": False})
+
+        assert response.json() == [{"id": 1, "title": "Doc"}]
+
+    def test_list_documents_stream(self, client, mock_embedding_service, monkeypatch):
+        """Test stream=true returns every document after the cursor as one JSON array."""
+        monkeypatch.setattr(settings, "list_stream_batch_size", 2)
+        mock_embedding_service.embed_texts.return_value = np.eye(5, dtype=np.float32)
+        client.post("/api/v1/documents/", json=[
+            {"title": f"Doc {i}", "content": f"Content {i}"} for i in range(5)
+        ])
+
+        response = client.get("/api/v1/documents/", params={"stream": True, "after": 1, "include_content": False})
+
+        assert response.headers["content-type"] == "application/json"
+        assert [doc["id"] for doc in response.json()] == [2, 3, 4, 5]
+        assert all("content" not in doc for doc in response.json())
+
     def test_get_document_by_id_success(self, client, mock_embedding_service):
         """Test getting a specific document by ID."""
         # Configure embeddings
@@ -231,6 +273,82 @@ class TestQueryEndpoints:
         # Scores should be in descending order
         assert results[0]["score"] >= results[1]["score"]
 
+    def test_query_hybrid_mode_matches_identifier(self, client, mock_embedding_service):
+        """Test hybrid mode ranks an exact identifier match above the nearest vector."""
+        import json
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        client.post("/api/v1/documents/", json=[
+            {"title": "Returns policy", "content": "how to return an item"},
+            {"title": "Part SKU-4471", "content": "replacement hinge"},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        def ask(body):
+            return client.request(
+                "GET", "/api/v1/query/", content=json.dumps(body), headers={"Content-Type": "application/json"}
+            )
+
+        lexical = ask({"query": "sku-4471", "top_k": 2, "mode": "lexical"})
+        hybrid = ask({"query": "sku-4471", "top_k": 1, "mode": "hybrid", "fusion": "weighted", "alpha": 0.2})
+        invalid = ask({"query": "sku-4471", "mode": "fuzzy"})
+
+        assert [r["title"] for r in lexical.json()["results"]] == ["Part SKU-4471"]
+        assert [r["title"] for r in hybrid.json()["results"]] == ["Part SKU-4471"]
+        assert invalid.status_code == 422
+
+    def test_query_must_match_filters_candidates(self, client, mock_embedding_service):
+        """Test must_match keeps only documents containing the terms."""
+        import json
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        client.post("/api/v1/documents/", json=[
+            {"title": "Closest", "content": "general overview"},
+            {"title": "Constrained", "content": "firmware 4.2 release notes"},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        response = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "overview", "top_k": 2, "must_match": "firmware 4.2"}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        assert [r["title"] for r in response.json()["results"]] == ["Constrained"]
+
+    def test_query_filter_scopes_results(self, client, mock_embedding_service):
+        """Test metadata is stored, returned and applied as a filter before top_k."""
+        import json
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.6, 0.8, 0.0]], dtype=np.float32
+        )
+        created = client.post("/api/v1/documents/", json=[
+            {"title": "Tenant A", "content": "shared text a", "metadata": {"tenant": "a", "version": 2}},
+            {"title": "Tenant B", "content": "shared text b", "metadata": {"tenant": "b", "version": 3}},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        def query(body):
+            return client.request(
+                "GET", "/api/v1/query/", content=json.dumps(body), headers={"Content-Type": "application/json"}
+            )
+
+        scoped = query({"query": "text", "top_k": 1, "filter": {"tenant": "b"}})
+        ranged = query({"query": "text", "filter": {"version": {"$gte": 3}}})
+        invalid = query({"query": "text", "filter": {"tenant": {"$regex": "b"}}})
+        bad_metadata = client.post("/api/v1/documents/", json=[{"title": "T", "content": "C", "metadata": {"k": [1]}}])
+
+        assert created.json()[1]["metadata"] == {"tenant": "b", "version": 3}
+        assert client.get("/api/v1/documents/").json()[0]["metadata"] == {"tenant": "a", "version": 2}
+        assert [r["title"] for r in scoped.json()["results"]] == ["Tenant B"]
+        assert [r["title"] for r in ranged.json()["results"]] == ["Tenant B"]
+        assert invalid.status_code == 422
+        assert bad_metadata.status_code == 422
+
     def test_query_without_top_k_uses_default(self, client, mock_embedding_service):
         """Test that query uses default top_k when not specified."""
         # Create document
@@ -281,3 +399,137 @@ class TestQueryEndpoints:
         
         data = response.json()
         assert len(data["results"]) == 3
+
+    def test_query_accepts_nprobe(self, client, mock_embedding_service):
+        """Test nprobe is accepted and validated as a positive integer."""
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        client.post("/api/v1/documents/", json=[{"title": "Doc", "content": "Content"}])
+
+        ok = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "test", "nprobe": 4}),
+            headers={"Content-Type": "application/json"}
+        )
+        invalid = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "test", "nprobe": 0}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert ok.status_code == 200
+        assert invalid.status_code == 422
+
+    def test_query_accepts_engine(self, client, mock_embedding_service):
+        """Test the search engine can be chosen per query and is validated."""
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        client.post("/api/v1/documents/", json=[{"title": "Doc", "content": "Content"}])
+
+        ok = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "test", "engine": "binary"}),
+            headers={"Content-Type": "application/json"}
+        )
+        invalid = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "test", "engine": "annoy"}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert ok.status_code == 200
+        assert ok.json()["results"][0]["title"] == "Doc"
+        assert invalid.status_code == 422
+
+    def test_query_batch(self, client, mock_embedding_service):
+        """Test the batch endpoint answers every query with its own top_k."""
+        mock_embedding_service.embed_texts.return_value = np.eye(3, dtype=np.float32)
+        client.post("/api/v1/documents/", json=[
+            {"title": f"Doc {i}", "content": f"Content {i}"} for i in range(3)
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[0.0, 0.0, 1.0], [1.0, 0.0, 0.0]], dtype=np.float32
+        )
+
+        response = client.post("/api/v1/query/batch", json={"queries": [
+            {"query": "third", "top_k": 1},
+            {"query": "first", "top_k": 3},
+        ]})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["query"] == "third"
+        assert [r["title"] for r in results[0]["results"]] == ["Doc 2"]
+        assert results[1]["results"][0]["title"] == "Doc 0"
+        assert len(results[1]["results"]) == 3
+
+    def test_query_batch_validation(self, client):
+        """Test empty batches and unknown engines are rejected."""
+        assert client.post("/api/v1/query/batch", json={"queries": []}).status_code == 422
+        invalid = client.post("/api/v1/query/batch", json={"queries": [{"query": "q"}], "engine": "nope"})
+        assert invalid.status_code == 422
+
+    def test_query_with_chunking_returns_best_chunk(self, client, mock_embedding_service, monkeypatch):
+        """Test chunked documents are returned once, with the span of their best chunk."""
+        monkeypatch.setattr(settings, "chunking_enabled", True)
+        monkeypatch.setattr(settings, "chunk_max_tokens", 2)
+        monkeypatch.setattr(settings, "chunk_overlap_tokens", 0)
+        mock_embedding_service.embed_texts.side_effect = lambda texts: np.array(
+            [[1.0, 0.0] if "alpha" in text else [0.0, 1.0] for text in texts], dtype=np.float32
+        )
+        content = "beta beta beta beta alpha beta"
+        client.post("/api/v1/documents/", json=[{"title": "Long", "content": content}])
+
+        response = client.request(
+            "GET", "/api/v1/query/",
+            content=json.dumps({"query": "alpha", "top_k": 5}),
+            headers={"Content-Type": "application/json"},
+        )
+
+        results = response.json()["results"]
+        assert len(results) == 1
+        assert content[results[0]["chunk_start"]:results[0]["chunk_end"]] == "alpha beta"
+        assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    def test_metrics_exposes_query_cache_counters(self, client, mock_embedding_service):
+        """Test the metrics endpoint reports query embedding cache counters."""
+        mock_embedding_service.query_cache.put(("model", "q"), np.zeros(3, dtype=np.float32))
+        mock_embedding_service.query_cache.get(("model", "q"))
+
+        response = client.get("/api/v1/metrics/")
+
+        assert response.status_code == 200
+        cache = response.json()["query_embedding_cache"]
+        assert cache["hits"] == 1
+        assert cache["size"] == 1
+
+    def test_create_documents_reports_cached_embeddings(self, client, mock_embedding_service):
+        """Test re-ingesting a document reuses its cached embedding."""
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        payload = [{"title": "Doc", "content": "Same content"}]
+
+        first = client.post("/api/v1/documents/", json=payload)
+        second = client.post("/api/v1/documents/", json=payload)
+
+        assert first.headers["X-Embeddings-Cached"] == "0"
+        assert second.headers["X-Embeddings-Cached"] == "1"
+        assert mock_embedding_service.embed_texts.call_count == 1
+
+    def test_create_documents_ids_only(self, client, mock_embedding_service):
+        """Test ids_only returns just the new ids instead of the documents."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        payload = [
+            {"title": "Doc 1", "content": "Content 1"},
+            {"title": "Doc 2", "content": "Content 2"},
+        ]
+
+        response = client.post("/api/v1/documents/", params={"ids_only": True}, json=payload)
+
+        assert response.status_code == 201
+        ids = response.json()["ids"]
+        assert len(ids) == 2
+        assert client.get(f"/api/v1/documents/{ids[1]}").json()["title"] == "Doc 2"
@@ -0,0 +1,233 @@
+"""Integration tests for the async request path."""
+import json
+import threading
+import pytest
+import numpy as np
+from typing import Generator
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import async_documents, async_query
+from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.persistence.db.async_session import async_database_url, get_async_db
+from app.infrastructure.persistence.db.session import get_db
+from app.core.services.embedding_service import get_embedding_service
+from app.core.services.inference_executor import run_inference
+from app.core.index.vector_index import VectorIndex, get_vector_index
+from app.core.index.bm25 import BM25Index, get_lexical_index
+
+
+@pytest.fixture
+def async_client(tmp_path, mock_embedding_service) -> Generator[TestClient, None, None]:
+    """Create a test client for the async routers backed by aiosqlite."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_sessions = sessionmaker(sync_engine, autoflush=False)
+    engine = create_async_engine(async_database_url(url))
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    app = FastAPI(title="Test Async Semantic Search API")
+    app.include_router(async_documents.router)
+    app.include_router(async_query.router)
+
+    async def override_get_async_db():
+        async with sessions() as db:
+            yield db
+
+    def override_get_db():
+        with sync_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_embedding_service] = lambda: mock_embedding_service
+    vector_index = VectorIndex()
+    app.dependency_overrides[get_vector_index] = lambda: vector_index
+    lexical_index = BM25Index()
+    app.dependency_overrides[get_lexical_index] = lambda: lexical_index
+
+    with TestClient(app) as test_client:
+        yield test_client
+        test_client.portal.call(engine.dispose)
+    sync_engine.dispose()
+
+    app.dependency_overrides.clear()
+
+
+class TestAsyncAPI:
+    """Integration tests for the async documents and query endpoints."""
+
+    def test_create_list_and_get(self, async_client, mock_embedding_service):
+        """Test documents round-trip through the AsyncSession repository."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+
+        created = async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "Content 1"},
+            {"title": "Doc 2", "content": "Content 2"},
+        ])
+        listed = async_client.get("/api/v1/documents/")
+        fetched = async_client.get(f"/api/v1/documents/{created.json()[1]['id']}")
+        missing = async_client.get("/api/v1/documents/999")
+
+        assert created.status_code == 201
+        assert created.headers["X-Embeddings-Cached"] == "0"
+        assert [doc["title"] for doc in listed.json()] == ["Doc 1", "Doc 2"]
+        assert fetched.json()["title"] == "Doc 2"
+        assert missing.status_code == 404
+
+    def test_list_documents_pages_and_streams(self, async_client, mock_embedding_service):
+        """Test keyset pages and the streamed listing on the async router."""
+        mock_embedding_service.embed_texts.return_value = np.eye(3, dtype=np.float32)
+        async_client.post("/api/v1/documents/", json=[
+            {"title": f"Doc {i}", "content": f"Content {i}"} for i in range(3)
+        ])
+
+        first = async_client.get("/api/v1/documents/", params={"limit": 2, "include_content": False})
+        rest = async_client.get("/api/v1/documents/", params={"after": first.headers["X-Next-After"]})
+        streamed = async_client.get("/api/v1/documents/", params={"stream": True})
+
+        assert first.json() == [{"id": 1, "title": "Doc 0"}, {"id": 2, "title": "Doc 1"}]
+        assert [doc["title"] for doc in rest.json()] == ["Doc 2"]
+        assert [doc["content"] for doc in streamed.json()] == ["Content 0", "Content 1", "Content 2"]
+
+    def test_query_ranks_documents(self, async_client, mock_embedding_service):
+        """Test the async query endpoint returns ranked results."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "Content 1"},
+            {"title": "Doc 2", "content": "Content 2"},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[0.0, 1.0, 0.0]], dtype=np.float32)
+
+        response = async_client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "second", "top_k": 2}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["title"] for r in results] == ["Doc 2", "Doc 1"]
+        assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    def test_query_batch(self, async_client, mock_embedding_service):
+        """Test the async batch endpoint scores all queries together."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "Content 1"},
+            {"title": "Doc 2", "content": "Content 2"},
+        ])
+
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]], dtype=np.float32
+        )
+        response = async_client.post("/api/v1/query/batch", json={"queries": [
+            {"query": "second", "top_k": 1},
+            {"query": "first", "top_k": 1},
+        ]})
+
+        assert response.status_code == 200
+        assert [r["results"][0]["title"] for r in response.json()["results"]] == ["Doc 2", "Doc 1"]
+
+    def test_query_lexical_mode(self, async_client, mock_embedding_service):
+        """Test the async query endpoint ranks with BM25 in lexical mode."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "error E-1042 in installer"},
+            {"title": "Doc 2", "content": "Content 2"},
+        ])
+
+        response = async_client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "E-1042", "mode": "lexical"}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        assert [r["title"] for r in response.json()["results"]] == ["Doc 1"]
+
+    def test_query_must_match(self, async_client, mock_embedding_service):
+        """Test the async query endpoint applies the FTS5 constraint."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "Content 1"},
+            {"title": "Doc 2", "content": "firmware notes"},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        response = async_client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "first", "must_match": "firmware"}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        assert [r["title"] for r in response.json()["results"]] == ["Doc 2"]
+
+    def test_query_filter(self, async_client, mock_embedding_service):
+        """Test the async query endpoint applies metadata filters."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        async_client.post("/api/v1/documents/", json=[
+            {"title": "Doc 1", "content": "Content 1", "metadata": {"lang": "en"}},
+            {"title": "Doc 2", "content": "Content 2", "metadata": {"lang": "pt"}},
+        ])
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        response = async_client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "first", "filter": {"lang": "pt"}}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        assert [r["title"] for r in response.json()["results"]] == ["Doc 2"]
+
+    def test_query_empty_database(self, async_client):
+        """Test the async query endpoint on an empty database."""
+        response = async_client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "anything"}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+    def test_inference_runs_off_the_event_loop(self, async_client, mock_embedding_service):
+        """Test model calls execute on the dedicated inference pool."""
+        threads = []
+
+        def record(texts):
+            threads.append(threading.current_thread().name)
+            return np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        mock_embedding_service.embed_texts.side_effect = record
+
+        async_client.post("/api/v1/documents/", json=[{"title": "Doc", "content": "Content"}])
+
+        assert threads and threads[0].startswith("inference")
+
+    def test_run_inference_returns_result(self, async_client):
+        """Test run_inference awaits the function result."""
+        assert async_client.portal.call(run_inference, sum, [1, 2, 3]) == 6
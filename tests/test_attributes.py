@@ -0,0 +1,213 @@
+"""Tests for metadata attributes, bitmap filters and filtered vector search."""
+import pytest
+import numpy as np
+
+from app.api.schemas.document import DocumentCreate
+from app.core.index.attributes import AttributeIndex, validate_filter
+from app.core.index.topk import chunked_top_k
+from app.core.services.ingestion_service import IngestionService
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.settings import settings
+
+
+def _metadata(i):
+    """Synthetic metadata with a string, a boolean and a number; some rows have none."""
+    if i % 7 == 0:
+        return None
+    return {"lang": ["en", "pt", "es"][i % 3], "public": i % 2 == 0, "year": 2000 + i % 25}
+
+
+def _matches(metadata, expression):
+    """Reference evaluation of a filter over one metadata dict."""
+    metadata = metadata or {}
+    for key, condition in expression.items():
+        if key == "$and":
+            ok = all(_matches(metadata, item) for item in condition)
+        elif key == "$or":
+            ok = any(_matches(metadata, item) for item in condition)
+        elif key == "$not":
+            ok = not _matches(metadata, condition)
+        else:
+            value = metadata.get(key)
+            ops = condition if isinstance(condition, dict) else {"$eq": condition}
+            ok = all({
+                "$eq": lambda v: value == v and type(value) is type(v),
+                "$ne": lambda v: not (value == v and type(value) is type(v)),
+                "$in": lambda v: value in v,
+                "$nin": lambda v: value not in v,
+                "$gt": lambda v: value is not None and value > v,
+                "$gte": lambda v: value is not None and value >= v,
+                "$lt": lambda v: value is not None and value < v,
+                "$lte": lambda v: value is not None and value <= v,
+            }[op](arg) for op, arg in ops.items())
+        if not ok:
+            return False
+    return True
+
+
+FILTERS = [
+    {"lang": "pt"},
+    {"lang": {"$in": ["en", "es"]}, "public": True},
+    {"year": {"$gte": 2010, "$lt": 2020}},
+    {"$or": [{"lang": "es"}, {"year": {"$lte": 2003}}]},
+    {"$not": {"public": False}},
+    {"lang": {"$ne": "en"}},
+    {"missing": "x"},
+]
+
+
+class TestValidateFilter:
+    """Tests for the filter grammar."""
+
+    def test_accepts_nested_expressions(self):
+        """Test every operator is accepted and the expression is returned as is."""
+        for expression in FILTERS:
+            assert validate_filter(expression) is expression
+
+    @pytest.mark.parametrize("expression", [
+        {},
+        {"$xor": [{"a": 1}]},
+        {"lang": {"$regex": "p.*"}},
+        {"year": {"$gt": "2010"}},
+        {"lang": {"$in": "pt"}},
+        {"$or": []},
+        {"lang": ["pt"]},
+    ])
+    def test_rejects_invalid_expressions(self, expression):
+        """Test unknown operators and mistyped operands raise ValueError."""
+        with pytest.raises(ValueError):
+            validate_filter(expression)
+
+
+class TestAttributeIndex:
+    """Tests for the packed bitmaps and numeric columns."""
+
+    @pytest.fixture
+    def metadata(self):
+        return [_metadata(i) for i in range(1, 2001)]
+
+    @pytest.fixture
+    def loaded(self, metadata):
+        """Index rows hold document ids in shuffled order, as a loaded VectorIndex may."""
+        ids = np.random.default_rng(0).permutation(np.arange(1, 2001))
+        attributes = AttributeIndex()
+        attributes.load(ids, [(i, metadata[i - 1]) for i in range(1, 2001) if metadata[i - 1] is not None])
+        return ids, attributes
+
+    @pytest.mark.parametrize("expression", FILTERS)
+    def test_mask_matches_reference(self, metadata, loaded, expression):
+        """Test the bitmap evaluation agrees with a row-by-row evaluation."""
+        ids, attributes = loaded
+
+        expected = np.array([_matches(metadata[doc_id - 1], expression) for doc_id in ids])
+
+        np.testing.assert_array_equal(attributes.mask(expression), expected)
+
+    def test_booleans_and_numbers_are_distinct(self):
+        """Test true does not match 1 and 1 matches 1.0."""
+        attributes = AttributeIndex()
+        attributes.load(np.array([1, 2]), [(1, {"flag": True}), (2, {"flag": 1})])
+
+        assert attributes.mask({"flag": True}).tolist() == [True, False]
+        assert attributes.mask({"flag": 1.0}).tolist() == [False, True]
+
+    def test_set_rows_matches_bulk_load(self, metadata, loaded):
+        """Test rows recorded incrementally, across growth, give the same masks as a load."""
+        ids, bulk = loaded
+        incremental = AttributeIndex()
+        for start in range(0, len(ids), 300):
+            rows = np.arange(start, min(start + 300, len(ids)))
+            incremental.set_rows(rows, [metadata[doc_id - 1] for doc_id in ids[rows]])
+
+        assert len(incremental) == len(ids)
+        for expression in FILTERS:
+            np.testing.assert_array_equal(incremental.mask(expression), bulk.mask(expression))
+
+
+class TestFilteredSearch:
+    """Tests for masked top-k selection and QueryService filters."""
+
+    def test_chunked_top_k_skips_masked_rows(self):
+        """Test masked rows never win and fewer than k results come back when few rows pass."""
+        matrix = np.random.default_rng(1).standard_normal((1000, 8)).astype(np.float32)
+        query = matrix[0]
+        mask = np.zeros(1000, dtype=bool)
+        mask[[3, 500, 999]] = True
+
+        rows, scores = chunked_top_k(matrix, 5, lambda block: block @ query, block_size=128, mask=mask)
+
+        assert sorted(rows.tolist()) == [3, 500, 999]
+        np.testing.assert_allclose(scores, np.sort(matrix[[3, 500, 999]] @ query)[::-1], rtol=1e-6)
+
+    @pytest.fixture
+    def saved(self, db_session, mock_embedding_service, vector_index):
+        """Documents with metadata; the query vector is closest to the English one."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.6, 0.8, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        saved = IngestionService(db_session, mock_embedding_service, vector_index).ingest([
+            DocumentCreate(title="Guide", content="english guide", metadata={"lang": "en", "year": 2021}),
+            DocumentCreate(title="Guia", content="guia em português", metadata={"lang": "pt", "year": 2019}),
+            DocumentCreate(title="Manual", content="manual técnico", metadata={"lang": "pt", "year": 2023}),
+            DocumentCreate(title="Untagged", content="no metadata"),
+        ])[0]
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        return saved
+
+    def test_repository_round_trips_metadata(self, db_session, saved):
+        """Test metadata is stored with the document and listed for the bitmaps."""
+        repo = DocumentRepository(db_session)
+
+        assert repo.list_attributes() == [
+            (saved[0].id, {"lang": "en", "year": 2021}),
+            (saved[1].id, {"lang": "pt", "year": 2019}),
+            (saved[2].id, {"lang": "pt", "year": 2023}),
+        ]
+
+    @pytest.mark.parametrize("gather_fraction", [1.0, 0.0])
+    def test_filter_applies_before_top_k(self, db_session, mock_embedding_service, vector_index, saved,
+                                         monkeypatch, gather_fraction):
+        """Test gathered and masked-scan paths both return the best filtered documents."""
+        monkeypatch.setattr(settings, "filter_gather_fraction", gather_fraction)
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, vector_index)
+
+        results = service.search("guide", top_k=1, metadata_filter={"lang": "pt"})
+        ranged = service.search("guide", top_k=5, metadata_filter={"year": {"$gt": 2020}})
+
+        assert [r.id for r in results] == [saved[1].id]
+        assert results[0].score == pytest.approx(0.8, abs=1e-5)
+        assert [r.id for r in ranged] == [saved[0].id, saved[2].id]
+
+    def test_filter_without_matches(self, db_session, mock_embedding_service, vector_index, saved):
+        """Test a filter nothing satisfies returns no results."""
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, vector_index)
+
+        assert service.search("guide", metadata_filter={"lang": "de"}) == []
+
+    def test_added_documents_are_filterable(self, db_session, mock_embedding_service, vector_index, saved):
+        """Test documents ingested after the bitmaps are built are covered by filters."""
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, vector_index)
+        service.search("guide", metadata_filter={"lang": "pt"})
+        assert vector_index.attributes.loaded
+
+        mock_embedding_service.embed_texts.return_value = np.array([[0.9, 0.1, 0.0]], dtype=np.float32)
+        added = IngestionService(db_session, mock_embedding_service, vector_index).ingest([
+            DocumentCreate(title="Guía", content="guía en español", metadata={"lang": "es"}),
+        ])[0][0]
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+
+        results = service.search("guide", metadata_filter={"lang": {"$in": ["es", "pt"]}})
+
+        assert [r.id for r in results] == [added.id, saved[1].id, saved[2].id]
+
+    def test_vector_index_reload_drops_attributes(self, db_session, vector_index, saved):
+        """Test clearing the index also drops its bitmaps, so they are rebuilt with it."""
+        repo = DocumentRepository(db_session)
+        vector_index.ensure_loaded(repo)
+        vector_index.ensure_attributes_loaded(repo)
+
+        vector_index.clear()
+
+        assert not vector_index.attributes.loaded
+        assert len(vector_index.attributes) == 0
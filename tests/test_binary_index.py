@@ -0,0 +1,105 @@
+"""Tests for the binary sign-bit index."""
+import pytest
+import numpy as np
+
+from app.core.index.binary import BinaryIndex, hamming_distances, pack_signs
+from tests.fake_models import normalized
+
+
+class TestBinaryIndex:
+    """Test suite for sign-bit packing, Hamming distance and BinaryIndex."""
+
+    @pytest.fixture
+    def matrix(self):
+        """Create a random normalized corpus."""
+        return normalized(2000, 384)
+
+    def test_pack_signs_uses_one_bit_per_dimension(self, matrix):
+        """Test 384 dimensions pack into 48 bytes."""
+        codes = pack_signs(matrix)
+
+        assert codes.dtype == np.uint8
+        assert codes.shape == (2000, 48)
+
+    def test_hamming_distance_matches_bit_count(self, matrix):
+        """Test popcount distance equals the number of differing signs."""
+        codes = pack_signs(matrix[:50])
+
+        distances = hamming_distances(codes, codes[0])
+
+        expected = ((matrix[:50] > 0) != (matrix[0] > 0)).sum(axis=1)
+        np.testing.assert_array_equal(distances, expected)
+        assert distances[0] == 0
+
+    def test_hamming_distance_handles_unaligned_codes(self):
+        """Test dimensions that do not fill whole 64-bit words."""
+        vectors = normalized(20, 20)
+        codes = pack_signs(vectors)
+
+        distances = hamming_distances(codes, codes[3])
+
+        np.testing.assert_array_equal(distances, ((vectors > 0) != (vectors[3] > 0)).sum(axis=1))
+
+    def test_search_reranks_with_exact_scores(self, matrix):
+        """Test results carry exact cosine scores and find the query itself."""
+        index = BinaryIndex(oversample=10)
+        index.build(matrix)
+
+        rows, scores = index.search(matrix, matrix[42], top_k=5)
+
+        assert rows[0] == 42
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+        np.testing.assert_allclose(scores, matrix[rows] @ matrix[42], rtol=1e-6)
+
+    def test_recall_against_exact_search(self, matrix):
+        """Test reranked binary search recovers most exact neighbours."""
+        index = BinaryIndex(oversample=20)
+        index.build(matrix)
+        queries = normalized(20, 384, seed=1)
+
+        hits = 0
+        for query in queries:
+            exact = set(np.argsort(-(matrix @ query))[:10])
+            rows, _ = index.search(matrix, query, top_k=10)
+            hits += len(exact & set(rows.tolist()))
+
+        assert hits / 200 >= 0.7
+
+    def test_add_encodes_new_rows(self, matrix):
+        """Test incremental adds are searchable without rebuilding."""
+        index = BinaryIndex()
+        index.build(matrix[:1000])
+
+        index.add(matrix, 1000)
+
+        assert index.size == 2000
+        rows, _ = index.search(matrix, matrix[1500], top_k=1)
+        assert rows[0] == 1500
+
+    def test_search_skips_rows_past_a_stale_matrix(self, matrix):
+        """Test codes appended by a concurrent add are ignored by a search holding the older matrix."""
+        index = BinaryIndex()
+        index.build(matrix[:1000])
+        stale = matrix[:1000]
+
+        index.add(matrix, 1000)
+        rows, _ = index.search(stale, matrix[1500], top_k=10)
+
+        assert len(rows) == 10
+        assert rows.max() < 1000
+
+    def test_codes_are_32x_smaller_than_float32(self, matrix):
+        """Test the packed codes use one bit per float32 value."""
+        index = BinaryIndex()
+        index.build(matrix)
+
+        assert index.nbytes * 32 == matrix.nbytes
+
+    def test_empty_index_returns_nothing(self):
+        """Test searching an empty index returns no rows."""
+        index = BinaryIndex()
+        index.build(np.empty((0, 384), dtype=np.float32))
+
+        rows, scores = index.search(np.empty((0, 384), dtype=np.float32), np.ones(384, dtype=np.float32), top_k=5)
+
+        assert len(rows) == 0 and len(scores) == 0
@@ -0,0 +1,195 @@
+"""Tests for the BM25 inverted index, rank fusion and lexical / hybrid search."""
+import math
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from app.api.schemas.document import DocumentCreate
+from app.core.index.bm25 import BM25Index, tokenize
+from app.core.index.fusion import HYBRID, LEXICAL, WEIGHTED, reciprocal_rank_fusion, weighted_fusion
+from app.core.services.ingestion_service import IngestionService
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.settings import settings
+
+
+def load(index, rows):
+    """Load an index from (id, title, content) tuples through a mocked repository."""
+    repo = Mock()
+    repo.iter_rows.return_value = [Mock(id=i, title=title, content=content) for i, title, content in rows]
+    index.ensure_loaded(repo)
+    return index
+
+
+class TestTokenize:
+    """Tests for the lexical tokenizer."""
+
+    def test_lowercases_words(self):
+        """Test words are lowercased and punctuation dropped."""
+        assert tokenize("Hello, World!") == ["hello", "world"]
+
+    def test_keeps_identifiers_whole_and_split(self):
+        """Test compound identifiers are indexed whole and by their parts."""
+        assert tokenize("Error E-1042 on SKU.99") == ["error", "e-1042", "e", "1042", "on", "sku.99", "sku", "99"]
+
+
+class TestBM25Index:
+    """Tests for BM25Index."""
+
+    @pytest.fixture
+    def index(self):
+        return load(BM25Index(), [
+            (1, "Python", "python is a programming language"),
+            (2, "Cooking", "cooking pasta with tomato sauce"),
+            (3, "Errors", "the installer failed with error E-1042"),
+        ])
+
+    def test_ranks_matching_documents(self, index):
+        """Test only documents containing the terms are returned, best first."""
+        ids, scores = index.search("python language", top_k=3)
+
+        assert ids.tolist() == [1]
+        assert scores[0] > 0
+
+    def test_finds_exact_identifier(self, index):
+        """Test an error code matches the document that mentions it."""
+        ids, _ = index.search("e-1042", top_k=3)
+
+        assert ids.tolist() == [3]
+
+    def test_scores_match_bm25_formula(self):
+        """Test the score of a single-term query against the textbook formula."""
+        index = load(BM25Index(k1=1.2, b=0.75), [(1, "a", "x y"), (2, "b", "z z z z")])
+
+        _, scores = index.search("x", top_k=1)
+
+        # Documento 1: "a x y" (3 termos), média 4, df 1, N 2
+        idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+        expected = idf * 1 * 2.2 / (1 + 1.2 * (1 - 0.75 + 0.75 * 3 / 4))
+        assert scores[0] == pytest.approx(expected, rel=1e-5)
+
+    def test_unknown_terms_return_nothing(self, index):
+        """Test a query without indexed terms returns empty arrays."""
+        ids, scores = index.search("quantum", top_k=3)
+
+        assert len(ids) == 0 and len(scores) == 0
+
+    def test_add_is_noop_before_load(self):
+        """Test add does nothing until the index is loaded from the repository."""
+        index = BM25Index()
+        index.add([1], ["python"])
+
+        assert len(index) == 0
+
+    def test_add_skips_documents_read_by_the_load(self, index):
+        """Test a request committed during the load does not index its documents twice."""
+        index.add([3, 4], ["Errors the installer failed with error E-1042", "Tips python"])
+
+        ids, _ = index.search("e-1042", top_k=5)
+
+        assert len(index) == 4
+        assert ids.tolist() == [3]
+
+    def test_incremental_add_matches_bulk_load(self, index, monkeypatch):
+        """Test documents added after load, merged or still pending, score like a fresh load."""
+        monkeypatch.setattr(BM25Index, "_MERGE_MIN", 4)
+        added = [(4, "Tips", "python python decorators"), (5, "Pasta", "fresh pasta"), (6, "Sauce", "tomato")]
+        for doc_id, title, content in added:
+            index.add([doc_id], [f"{title} {content}"])
+        bulk = load(BM25Index(), [
+            (1, "Python", "python is a programming language"),
+            (2, "Cooking", "cooking pasta with tomato sauce"),
+            (3, "Errors", "the installer failed with error E-1042"),
+        ] + added)
+
+        assert index._pending  # a última inserção ainda não foi consolidada
+        for query in ["python", "tomato pasta", "decorators sauce"]:
+            ids, scores = index.search(query, top_k=6)
+            expected_ids, expected_scores = bulk.search(query, top_k=6)
+            assert ids.tolist() == expected_ids.tolist()
+            np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+        assert len(index) == 6
+
+
+class TestFusion:
+    """Tests for reciprocal rank fusion and weighted fusion."""
+
+    def test_rrf_rewards_documents_in_both_lists(self):
+        """Test a document ranked in both lists beats one ranked first in only one."""
+        ids, scores = reciprocal_rank_fusion([np.array([1, 2]), np.array([3, 2])], top_k=3, k=60)
+
+        assert ids[0] == 2
+        assert scores[0] == pytest.approx(2 / 62)
+        assert set(ids.tolist()) == {1, 2, 3}
+
+    def test_weighted_fusion_uses_alpha(self):
+        """Test alpha 1 keeps the dense order and alpha 0 the lexical order."""
+        dense = (np.array([1, 2]), np.array([0.9, 0.1]))
+        lexical = (np.array([2, 1]), np.array([5.0, 1.0]))
+
+        dense_first, _ = weighted_fusion(*dense, *lexical, top_k=2, alpha=1.0)
+        lexical_first, _ = weighted_fusion(*dense, *lexical, top_k=2, alpha=0.0)
+
+        assert dense_first.tolist() == [1, 2]
+        assert lexical_first.tolist() == [2, 1]
+
+
+class TestLexicalAndHybridSearch:
+    """Integration of the BM25 index with ingestion and QueryService."""
+
+    @pytest.fixture
+    def service(self, db_session, mock_embedding_service, vector_index, lexical_index):
+        """Ingest three documents: the identifier only appears in the third one."""
+        repo = DocumentRepository(db_session)
+        vector_index.ensure_loaded(repo)
+        lexical_index.ensure_loaded(repo)
+        mock_embedding_service.embed_texts.side_effect = lambda texts: np.array(
+            [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0]][:len(texts)], dtype=np.float32
+        )
+        IngestionService(db_session, mock_embedding_service, vector_index, lexical_index=lexical_index).ingest([
+            DocumentCreate(title="Disk", content="disk full warning"),
+            DocumentCreate(title="Network", content="network timeout"),
+            DocumentCreate(title="Installer", content="installer failed with code E-1042"),
+        ])
+        mock_embedding_service.embed_texts.side_effect = lambda texts: np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        return QueryService(repo, mock_embedding_service, vector_index, lexical_index=lexical_index)
+
+    def test_store_updates_lexical_index(self, service, lexical_index):
+        """Test ingestion adds the new documents to the loaded BM25 index."""
+        assert len(lexical_index) == 3
+
+    def test_lexical_mode_skips_embedding(self, service, mock_embedding_service):
+        """Test lexical search ranks with BM25 and never encodes the query."""
+        results = service.search("E-1042", top_k=3, mode=LEXICAL)
+
+        assert [r.title for r in results] == ["Installer"]
+        mock_embedding_service.embed_query.assert_not_called()
+
+    def test_hybrid_surfaces_identifier_missed_by_vectors(self, service):
+        """Test the fused ranking includes the exact identifier match the dense side ranks last."""
+        semantic = service.search("E-1042", top_k=1)
+        hybrid = service.search("E-1042", top_k=1, mode=HYBRID, fusion=WEIGHTED, alpha=0.3)
+
+        assert [r.title for r in semantic] == ["Disk"]
+        assert [r.title for r in hybrid] == ["Installer"]
+
+    def test_hybrid_rrf_returns_union(self, service):
+        """Test RRF fusion returns documents from both rankings."""
+        results = service.search("E-1042", top_k=3, mode=HYBRID)
+
+        assert {r.title for r in results} == {"Disk", "Network", "Installer"}
+        assert results[0].score > results[-1].score
+
+    def test_prefilter_scores_only_lexical_candidates(self, service, monkeypatch):
+        """Test the dense ranking is restricted to documents matching the query terms."""
+        monkeypatch.setattr(settings, "lexical_prefilter_candidates", 10)
+
+        results = service.search("network timeout", top_k=3, prefilter=True)
+
+        assert [r.title for r in results] == ["Network"]
+
+    def test_prefilter_without_matches_scores_everything(self, service):
+        """Test a query with no lexical candidates falls back to the full index."""
+        results = service.search("quantum", top_k=3, prefilter=True)
+
+        assert len(results) == 3
@@ -0,0 +1,176 @@
+"""Tests for long-document chunking, chunk storage and chunk-level search."""
+import pytest
+import numpy as np
+
+from app.api.schemas.document import DocumentCreate
+from app.core.index.aggregation import MAX, MEAN, aggregate_chunks
+from app.core.index.vector_index import VectorIndex
+from app.core.services.chunking import mean_document_embeddings, split_text, word_offsets
+from app.core.services.ingestion_service import IngestionService
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.models.document_chunk import DocumentChunkModel
+from app.infrastructure.persistence.repositories.chunk_repository import ChunkRepository
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.settings import settings
+
+VOCABULARY = ["python", "java", "cooking", "filler"]
+
+
+def bag_of_words(texts):
+    """Deterministic embedding: normalized counts of the vocabulary words."""
+    vectors = np.array(
+        [[text.split().count(word) for word in VOCABULARY] for text in texts], dtype=np.float32
+    ) + 1e-3
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestSplitText:
+    """Test suite for token-window splitting."""
+
+    def test_short_text_is_one_chunk(self):
+        """Test a text within the window is kept whole."""
+        text = "a short text"
+
+        assert split_text(text, word_offsets(text), max_tokens=5, overlap=1) == [(0, len(text))]
+
+    def test_windows_overlap_and_cover_the_text(self):
+        """Test windows advance by max_tokens - overlap and the last one reaches the end."""
+        text = "w0 w1 w2 w3 w4 w5 w6"
+
+        spans = split_text(text, word_offsets(text), max_tokens=3, overlap=1)
+
+        assert [text[start:end] for start, end in spans] == ["w0 w1 w2", "w2 w3 w4", "w4 w5 w6"]
+
+    def test_empty_text(self):
+        """Test an empty content still yields one (empty) chunk."""
+        assert split_text("", [], max_tokens=3, overlap=1) == [(0, 0)]
+
+
+class TestAggregateChunks:
+    """Test suite for folding chunk scores into document scores."""
+
+    def test_max_uses_best_chunk(self):
+        """Test documents are ranked by their best chunk."""
+        ids, scores, best = aggregate_chunks(np.array([7, 3, 7, 3]), np.array([0.9, 0.8, 0.7, 0.1]), top_k=2)
+
+        assert ids.tolist() == [7, 3]
+        np.testing.assert_allclose(scores, [0.9, 0.8])
+        assert best.tolist() == [0, 1]
+
+    def test_mean_of_top_n_chunks(self):
+        """Test the mean aggregation averages each document's best top_n chunks."""
+        ids, scores, best = aggregate_chunks(
+            np.array([7, 3, 3, 7, 7]), np.array([0.9, 0.8, 0.8, 0.3, 0.2]), top_k=2, method=MEAN, top_n=2
+        )
+
+        assert ids.tolist() == [3, 7]
+        np.testing.assert_allclose(scores, [0.8, 0.6])
+        assert best.tolist() == [1, 0]
+
+    def test_unknown_method_raises(self):
+        """Test unsupported aggregations are rejected."""
+        with pytest.raises(ValueError):
+            aggregate_chunks(np.array([1]), np.array([0.5]), top_k=1, method="sum")
+
+    def test_mean_document_embeddings(self):
+        """Test document vectors are the normalized mean of their chunks."""
+        chunks = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]], dtype=np.float32)
+
+        result = mean_document_embeddings(np.array([0, 0, 1]), chunks, 2)
+
+        np.testing.assert_allclose(result, [[0.7071, 0.7071], [1.0, 0.0]], atol=1e-4)
+
+
+class TestChunkedIngestionAndSearch:
+    """Integration of chunked ingestion with the chunk index and QueryService."""
+
+    @pytest.fixture(autouse=True)
+    def chunking(self, monkeypatch, mock_embedding_service):
+        """Enable 4-word chunks with 1 word of overlap and a bag-of-words embedder."""
+        monkeypatch.setattr(settings, "chunking_enabled", True)
+        monkeypatch.setattr(settings, "chunk_max_tokens", 4)
+        monkeypatch.setattr(settings, "chunk_overlap_tokens", 1)
+        mock_embedding_service.embed_texts.side_effect = bag_of_words
+
+    @pytest.fixture
+    def documents(self):
+        """A long document whose only python passage is at the end, and a short java one."""
+        return [
+            DocumentCreate(title="Long", content="cooking filler filler filler filler filler filler python python"),
+            DocumentCreate(title="Short", content="java java"),
+        ]
+
+    def _ingest(self, db_session, mock_embedding_service, vector_index, chunk_index, documents):
+        repo = DocumentRepository(db_session)
+        vector_index.ensure_loaded(repo)
+        chunk_index.ensure_loaded(ChunkRepository(db_session))
+        service = IngestionService(db_session, mock_embedding_service, vector_index, chunk_index=chunk_index)
+        return service.ingest(documents)[0]
+
+    def test_ingest_stores_chunks(self, db_session, mock_embedding_service, vector_index, chunk_index, documents):
+        """Test every window is stored with its span and added to the chunk index."""
+        saved = self._ingest(db_session, mock_embedding_service, vector_index, chunk_index, documents)
+
+        chunks = db_session.query(DocumentChunkModel).order_by(DocumentChunkModel.id).all()
+        long_chunks = [chunk for chunk in chunks if chunk.document_id == saved[0].id]
+        content = documents[0].content
+        assert [content[c.start_char:c.end_char] for c in long_chunks] == [
+            "cooking filler filler filler", "filler filler filler filler", "filler python python",
+        ]
+        assert [c.position for c in long_chunks] == [0, 1, 2]
+        assert len(chunk_index) == len(chunks) == 4
+        assert len(vector_index) == 2
+
+    def test_search_returns_document_with_best_chunk(
+        self, db_session, mock_embedding_service, vector_index, chunk_index, documents
+    ):
+        """Test a query matching the tail of a long document finds it, with the chunk offsets."""
+        saved = self._ingest(db_session, mock_embedding_service, vector_index, chunk_index, documents)
+        service = QueryService(
+            DocumentRepository(db_session), mock_embedding_service, vector_index,
+            chunk_index=chunk_index, chunk_repo=ChunkRepository(db_session),
+        )
+
+        results = service.search("python", top_k=2)
+
+        assert [r.id for r in results] == [saved[0].id, saved[1].id]
+        best = documents[0].content[results[0].chunk_start:results[0].chunk_end]
+        assert best == "filler python python"
+        assert results[1].chunk_start == 0
+
+    def test_search_batch_aggregates_per_query(
+        self, db_session, mock_embedding_service, vector_index, chunk_index, documents
+    ):
+        """Test batch search folds chunks into one document list per query."""
+        saved = self._ingest(db_session, mock_embedding_service, vector_index, chunk_index, documents)
+        service = QueryService(
+            DocumentRepository(db_session), mock_embedding_service, vector_index,
+            chunk_index=chunk_index, chunk_repo=ChunkRepository(db_session),
+        )
+
+        results = service.search_batch(["java", "cooking"], [1, 1])
+
+        assert [[r.id for r in rows] for rows in results] == [[saved[1].id], [saved[0].id]]
+        assert results[1][0].chunk_start == 0
+
+    def test_backfill_chunks_documents_stored_before_chunking(
+        self, db_session, mock_embedding_service, vector_index, chunk_index, documents
+    ):
+        """Test documents ingested without chunks are chunked once and become searchable."""
+        saved = DocumentRepository(db_session).create_many([
+            DocumentModel(title=doc.title, content=doc.content, embedding=np.ones(4, dtype=np.float32).tobytes())
+            for doc in documents
+        ])
+        service = IngestionService(db_session, mock_embedding_service, vector_index, chunk_index=chunk_index)
+
+        assert service.backfill_chunks(batch_size=1) == 2
+        assert service.backfill_chunks() == 0
+        chunk_index.ensure_loaded(ChunkRepository(db_session))
+        results = QueryService(
+            DocumentRepository(db_session), mock_embedding_service, vector_index,
+            chunk_index=chunk_index, chunk_repo=ChunkRepository(db_session),
+        ).search("python", top_k=1)
+
+        assert len(chunk_index) == 4
+        assert [r.id for r in results] == [saved[0].id]
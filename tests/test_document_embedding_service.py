@@ -0,0 +1,100 @@
+"""Tests for DocumentEmbeddingService and the persistent embedding cache."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from sqlalchemy.orm import sessionmaker
+
+from app.core.services.document_embedding_service import DocumentEmbeddingService, content_hash
+from app.infrastructure.persistence.repositories.embedding_cache_repository import EmbeddingCacheRepository
+
+
+def _fake_embed(texts):
+    """Deterministic 4-dim embedding derived from each text."""
+    rows = [np.random.default_rng(len(text)).standard_normal(4) for text in texts]
+    return np.asarray(rows, dtype=np.float32).reshape(len(texts), 4)
+
+
+class TestDocumentEmbeddingService:
+    """Test suite for DocumentEmbeddingService class."""
+
+    @pytest.fixture
+    def embedding_service(self):
+        """Create a mock EmbeddingService with deterministic embeddings."""
+        mock = Mock()
+        mock.model_name = "test-model"
+        mock.embed_texts.side_effect = _fake_embed
+        return mock
+
+    @pytest.fixture
+    def cache_repo(self, db_session):
+        """Create an EmbeddingCacheRepository on the test database."""
+        return EmbeddingCacheRepository(db_session)
+
+    def test_first_ingestion_encodes_everything(self, embedding_service, cache_repo):
+        """Test an empty cache sends every text to the model."""
+        service = DocumentEmbeddingService(embedding_service, cache_repo)
+
+        embeddings, cached = service.embed_documents(["a", "bb"])
+
+        assert cached == 0
+        assert embeddings.shape == (2, 4)
+        embedding_service.embed_texts.assert_called_once_with(["a", "bb"])
+
+    def test_reingestion_only_encodes_misses(self, embedding_service, cache_repo):
+        """Test overlapping batches reuse stored vectors."""
+        service = DocumentEmbeddingService(embedding_service, cache_repo)
+        first, _ = service.embed_documents(["a", "bb"])
+
+        embeddings, cached = service.embed_documents(["bb", "ccc", "a"])
+
+        assert cached == 2
+        embedding_service.embed_texts.assert_called_with(["ccc"])
+        np.testing.assert_array_equal(embeddings[0], first[1])
+        np.testing.assert_array_equal(embeddings[2], first[0])
+
+    def test_duplicates_in_batch_are_encoded_once(self, embedding_service, cache_repo):
+        """Test repeated contents in one request hit the model once."""
+        service = DocumentEmbeddingService(embedding_service, cache_repo)
+
+        embeddings, cached = service.embed_documents(["a", "a", "bb"])
+
+        assert cached == 0
+        embedding_service.embed_texts.assert_called_once_with(["a", "bb"])
+        np.testing.assert_array_equal(embeddings[0], embeddings[1])
+
+    def test_cache_is_keyed_by_model(self, embedding_service, cache_repo):
+        """Test vectors from another model are not reused."""
+        DocumentEmbeddingService(embedding_service, cache_repo).embed_documents(["a"])
+        embedding_service.model_name = "other-model"
+
+        _, cached = DocumentEmbeddingService(embedding_service, cache_repo).embed_documents(["a"])
+
+        assert cached == 0
+        assert embedding_service.embed_texts.call_count == 2
+
+    def test_without_cache_repository(self, embedding_service):
+        """Test the service falls back to plain encoding when caching is off."""
+        embeddings, cached = DocumentEmbeddingService(embedding_service).embed_documents(["a", "a"])
+
+        assert cached == 0
+        embedding_service.embed_texts.assert_called_once_with(["a", "a"])
+        assert embeddings.shape == (2, 4)
+
+    def test_put_many_skips_existing_hashes(self, cache_repo):
+        """Test storing the same hash twice keeps a single row."""
+        vector = np.ones(4, dtype=np.float32)
+
+        assert cache_repo.put_many("m", {content_hash("x"): vector}) == 1
+        assert cache_repo.put_many("m", {content_hash("x"): vector}) == 0
+        np.testing.assert_array_equal(cache_repo.get_many("m", [content_hash("x")])[content_hash("x")], vector)
+
+    def test_put_many_tolerates_rows_cached_concurrently(self, db_engine, cache_repo):
+        """Test a hash committed by another session is skipped, and nothing is committed by put_many."""
+        vector = np.ones(4, dtype=np.float32)
+        with sessionmaker(bind=db_engine)() as other:
+            EmbeddingCacheRepository(other).put_many("m", {content_hash("x"): vector})
+            other.commit()
+
+        assert cache_repo.put_many("m", {content_hash("x"): vector, content_hash("y"): vector}) == 1
+        cache_repo.db.rollback()
+        assert list(cache_repo.get_many("m", [content_hash("x"), content_hash("y")])) == [content_hash("x")]
@@ -1,4 +1,5 @@
 """Tests for DocumentRepository."""
+import numpy as np
 import pytest
 from sqlalchemy.orm import Session
 
@@ -191,3 +192,88 @@ class TestDocumentRepository:
         assert len(set(ids)) == len(ids)
         # IDs should be positive integers
         assert all(id > 0 for id in ids)
+
+    def test_list_embeddings_returns_id_vector_pairs(self, repository):
+        """Test list_embeddings returns decoded (id, embedding) pairs ordered by id."""
+        docs = [
+            DocumentModel(
+                title=f"Doc {i}",
+                content=f"Content {i}",
+                embedding=bytes([i]) * 12
+            )
+            for i in range(3)
+        ]
+        created_docs = repository.create_many(docs)
+
+        rows = repository.list_embeddings()
+
+        assert [doc_id for doc_id, _ in rows] == [doc.id for doc in created_docs]
+        assert rows[2][1].dtype == np.float32
+        assert rows[2][1].tobytes() == bytes([2]) * 12
+
+    def test_get_titles_by_ids(self, repository):
+        """Test get_titles_by_ids maps only the requested ids to titles."""
+        docs = [
+            DocumentModel(
+                title=f"Doc {i}",
+                content=f"Content {i}",
+                embedding=b'\x00' * 12
+            )
+            for i in range(3)
+        ]
+        created_docs = repository.create_many(docs)
+
+        titles = repository.get_titles_by_ids([created_docs[0].id, created_docs[2].id, 9999])
+
+        assert titles == {created_docs[0].id: "Doc 0", created_docs[2].id: "Doc 2"}
+
+    def test_get_titles_by_ids_empty(self, repository):
+        """Test get_titles_by_ids with no ids returns an empty mapping."""
+        assert repository.get_titles_by_ids([]) == {}
+
+    def test_create_many_bulk_insert_keeps_ids_in_order(self, repository, db_session):
+        """Test a large batch gets sequential ids matching the input order."""
+        docs = [
+            DocumentModel(title=f"Doc {i}", content=f"Content {i}", embedding=b'\x00' * 12)
+            for i in range(2500)
+        ]
+
+        created_docs = repository.create_many(docs)
+
+        ids = [doc.id for doc in created_docs]
+        assert ids == list(range(ids[0], ids[0] + 2500))
+        stored = dict(db_session.query(DocumentModel.id, DocumentModel.title).all())
+        assert all(stored[doc.id] == doc.title for doc in created_docs)
+
+    def test_create_many_commits_pending_session_changes(self, repository, db_session):
+        """Test changes already pending on the session commit with the documents."""
+        db_session.add(DocumentModel(title="Pending", content="C", embedding=b'\x00' * 12))
+
+        repository.create_many([DocumentModel(title="Bulk", content="C", embedding=b'\x00' * 12)])
+        db_session.rollback()
+
+        assert {doc.title for doc in repository.list_all()} == {"Pending", "Bulk"}
+
+    def test_list_page_uses_keyset_cursor(self, repository):
+        """Test list_page returns rows after the cursor, ordered by id."""
+        created_docs = repository.create_many([
+            DocumentModel(title=f"Doc {i}", content=f"Content {i}", embedding=b'\x00' * 12)
+            for i in range(5)
+        ])
+
+        page = repository.list_page(2, after=created_docs[1].id, include_content=False)
+
+        assert [row.id for row in page] == [created_docs[2].id, created_docs[3].id]
+        assert page[0]._fields == ("id", "title")
+
+    def test_iter_rows_yields_every_row(self, repository):
+        """Test iter_rows streams all rows across several fetch batches."""
+        repository.create_many([
+            DocumentModel(title=f"Doc {i}", content=f"Content {i}", embedding=b'\x00' * 12)
+            for i in range(7)
+        ])
+
+        rows = list(repository.iter_rows(batch_size=3))
+
+        assert [row.title for row in rows] == [f"Doc {i}" for i in range(7)]
+        assert rows[0].content == "Content 0"
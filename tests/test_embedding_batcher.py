@@ -0,0 +1,145 @@
+"""Tests for EmbeddingBatcher and Histogram."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+
+from app.core.metrics import Histogram
+from app.core.services.embedding_batcher import EmbeddingBatcher
+from tests.fake_models import unit_embeddings
+
+
+class TestEmbeddingBatcher:
+    """Test suite for EmbeddingBatcher class."""
+
+    def test_single_submit_returns_its_row(self):
+        """Test a lone caller gets its embedding after the wait window."""
+        batcher = EmbeddingBatcher(unit_embeddings, max_batch_size=8, max_wait_ms=1)
+
+        result = batcher.submit("abc", timeout=5)
+
+        np.testing.assert_array_equal(result, unit_embeddings(["abc"])[0])
+        batcher.close()
+
+    def test_concurrent_submits_are_coalesced(self):
+        """Test callers arriving together share one encode call."""
+        calls = []
+        release = threading.Event()
+
+        def slow_embed(texts):
+            calls.append(list(texts))
+            release.wait(5)
+            return unit_embeddings(texts)
+
+        batcher = EmbeddingBatcher(slow_embed, max_batch_size=16, max_wait_ms=50)
+        texts = [f"q{'x' * i}" for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(batcher.submit, text, 5) for text in texts]
+            release.set()
+            results = [future.result() for future in futures]
+
+        np.testing.assert_array_equal(results, unit_embeddings(texts))
+        assert len(calls) < len(texts)
+        assert sum(len(batch) for batch in calls) == len(texts)
+        batcher.close()
+
+    def test_awaited_enqueues_are_coalesced(self):
+        """Test coroutines awaiting enqueue share one encode call without holding threads."""
+        calls = []
+
+        def record(texts):
+            calls.append(list(texts))
+            return unit_embeddings(texts)
+
+        batcher = EmbeddingBatcher(record, max_batch_size=16, max_wait_ms=50)
+        texts = [f"q{'x' * i}" for i in range(6)]
+
+        async def main():
+            return await asyncio.gather(*(asyncio.wrap_future(batcher.enqueue(text)) for text in texts))
+
+        results = asyncio.run(main())
+
+        np.testing.assert_array_equal(results, unit_embeddings(texts))
+        assert len(calls) == 1
+        batcher.close()
+
+    def test_batch_size_is_capped(self):
+        """Test no encode call receives more than max_batch_size texts."""
+        sizes = []
+
+        def record(texts):
+            sizes.append(len(texts))
+            return unit_embeddings(texts)
+
+        batcher = EmbeddingBatcher(record, max_batch_size=3, max_wait_ms=20)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda i: batcher.submit(f"t{i}", 5), range(10)))
+
+        assert max(sizes) <= 3
+        assert sum(sizes) == 10
+        batcher.close()
+
+    def test_duplicate_texts_are_encoded_once(self):
+        """Test identical texts in one batch reach the model once."""
+        calls = []
+
+        def record(texts):
+            calls.append(list(texts))
+            return unit_embeddings(texts)
+
+        batcher = EmbeddingBatcher(record, max_batch_size=8, max_wait_ms=50)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: batcher.submit("same", 5), range(4)))
+
+        np.testing.assert_array_equal(results, unit_embeddings(["same"] * 4))
+        assert all(len(set(batch)) == len(batch) for batch in calls)
+        batcher.close()
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test an encode failure is raised in the waiting caller."""
+        def fail(texts):
+            raise RuntimeError("model crashed")
+
+        batcher = EmbeddingBatcher(fail, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="model crashed"):
+            batcher.submit("abc", timeout=5)
+        batcher.close()
+
+    def test_submit_after_close_raises(self):
+        """Test a closed batcher rejects new texts."""
+        batcher = EmbeddingBatcher(unit_embeddings)
+        batcher.close()
+
+        with pytest.raises(RuntimeError):
+            batcher.submit("abc")
+
+    def test_stats_record_batches_and_waits(self):
+        """Test batch-size and queue-wait histograms are filled."""
+        batcher = EmbeddingBatcher(unit_embeddings, max_batch_size=4, max_wait_ms=1)
+        batcher.submit("a", timeout=5)
+        batcher.submit("b", timeout=5)
+
+        stats = batcher.stats()
+
+        assert stats["batch_size"]["count"] == 2
+        assert stats["batch_size"]["buckets"]["1"] == 2
+        assert stats["queue_wait_ms"]["count"] == 2
+        batcher.close()
+
+
+class TestHistogram:
+    """Test suite for Histogram class."""
+
+    def test_buckets_are_cumulative(self):
+        """Test each bucket counts observations at or below its bound."""
+        histogram = Histogram([1, 5, 10])
+        for value in (0.5, 1, 3, 7, 20):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot["buckets"] == {"1": 2, "5": 3, "10": 4, "+Inf": 5}
+        assert snapshot["count"] == 5
+        assert snapshot["sum"] == pytest.approx(31.5)
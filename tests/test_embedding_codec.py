@@ -0,0 +1,114 @@
+"""Tests for the embedding storage codec and 16-bit storage end to end."""
+import pytest
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.index.vector_index import VectorIndex
+from app.core.mappers.document_mapper import DocumentMapper
+from app.api.schemas.document import DocumentCreate
+from app.infrastructure.persistence.db.migrations import add_missing_columns
+from app.infrastructure.persistence.embedding_codec import (
+    BFLOAT16,
+    FLOAT16,
+    FLOAT32,
+    decode_embedding,
+    encode_embedding,
+    matrix_dtype,
+)
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore
+from app.infrastructure.settings import settings
+
+
+class TestEmbeddingCodec:
+    """Test suite for embedding encode/decode helpers."""
+
+    @pytest.fixture
+    def embedding(self):
+        """Create a unit-norm 384-dim embedding."""
+        rng = np.random.default_rng(0)
+        vector = rng.standard_normal(384).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    @pytest.mark.parametrize("storage_dtype, size", [(FLOAT32, 1536), (FLOAT16, 768), (BFLOAT16, 768)])
+    def test_encoded_size(self, embedding, storage_dtype, size):
+        """Test 16-bit dtypes halve the stored blob."""
+        assert len(encode_embedding(embedding, storage_dtype)) == size
+
+    @pytest.mark.parametrize("storage_dtype, tolerance", [(FLOAT32, 0.0), (FLOAT16, 1e-3), (BFLOAT16, 1e-2)])
+    def test_round_trip_preserves_values(self, embedding, storage_dtype, tolerance):
+        """Test decoding returns float32 close to the original vector."""
+        decoded = decode_embedding(encode_embedding(embedding, storage_dtype), storage_dtype)
+
+        assert decoded.dtype == np.float32
+        np.testing.assert_allclose(decoded, embedding, atol=tolerance)
+
+    def test_bfloat16_rounds_to_nearest(self):
+        """Test bfloat16 encoding rounds instead of truncating."""
+        value = np.array([1.0 + 2 ** -8 + 2 ** -10], dtype=np.float32)
+
+        decoded = decode_embedding(encode_embedding(value, BFLOAT16), BFLOAT16)
+
+        assert decoded[0] == np.float32(1.0 + 2 ** -7)
+
+    def test_legacy_rows_decode_as_float32(self, embedding):
+        """Test rows without a recorded dtype are read as float32."""
+        np.testing.assert_array_equal(decode_embedding(embedding.tobytes()), embedding)
+
+    def test_unknown_dtype_raises(self, embedding):
+        """Test unsupported storage dtypes are rejected."""
+        with pytest.raises(ValueError):
+            encode_embedding(embedding, "int4")
+        with pytest.raises(ValueError):
+            matrix_dtype("int4")
+
+    def test_matrix_dtype(self):
+        """Test 16-bit storage is held as float16 in memory."""
+        assert matrix_dtype(FLOAT32) == np.float32
+        assert matrix_dtype(FLOAT16) == np.float16
+        assert matrix_dtype(BFLOAT16) == np.float16
+
+    def test_mixed_dtypes_in_repository(self, db_session, monkeypatch, embedding):
+        """Test legacy float32 rows and new float16 rows are read back together."""
+        repo = DocumentRepository(db_session)
+        legacy = repo.create(DocumentModel(title="Old", content="C", embedding=embedding.tobytes()))
+        monkeypatch.setattr(settings, "embedding_storage_dtype", FLOAT16)
+        new = repo.create(DocumentMapper.to_model(DocumentCreate(title="New", content="C"), embedding))
+
+        assert new.embedding_dtype == FLOAT16
+        assert len(new.embedding) == 768
+        rows = dict(repo.list_embeddings())
+        np.testing.assert_array_equal(rows[legacy.id], embedding)
+        np.testing.assert_allclose(rows[new.id], embedding, atol=1e-3)
+
+        index = VectorIndex(dtype=np.float16)
+        index.ensure_loaded(repo)
+        assert index.matrix.dtype == np.float16
+        assert index.matrix.nbytes == 2 * 384 * 2
+
+    def test_float16_mmap_store_persists_dtype(self, tmp_path, embedding):
+        """Test a float16 vector file keeps its dtype across reopen."""
+        path = str(tmp_path / "documents.vectors")
+        MmapVectorStore(path, dtype=np.float16).append([1], embedding[None, :])
+
+        reopened = MmapVectorStore(path)
+
+        assert reopened.dtype == np.float16
+        np.testing.assert_allclose(reopened.get(1), embedding, atol=1e-3)
+
+    def test_add_missing_columns_upgrades_old_table(self, tmp_path):
+        """Test databases created before embedding_dtype get the column added."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE documents (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, "
+                "content TEXT NOT NULL, embedding BLOB)"
+            ))
+
+        added = add_missing_columns(engine)
+
+        assert "documents.embedding_dtype" in added
+        columns = {column["name"] for column in inspect(engine).get_columns("documents")}
+        assert "embedding_dtype" in columns
+        assert add_missing_columns(engine) == []
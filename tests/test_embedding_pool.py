@@ -0,0 +1,77 @@
+"""Tests for the multi-process embedding worker pool."""
+import os
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+
+from app.core.services.embedding_pool import EmbeddingWorkerPool, normalize_embeddings
+from app.core.services.embedding_service import EmbeddingService
+from app.infrastructure.settings import settings
+from tests.fake_models import FakeModel
+
+
+class TestEmbeddingWorkerPool:
+    """Test suite for EmbeddingWorkerPool."""
+
+    @pytest.fixture
+    def pool(self):
+        """Two spawned workers running FakeModel."""
+        pool = EmbeddingWorkerPool("fake-model", workers=2, threads_per_worker=0, model_loader=FakeModel)
+        yield pool
+        pool.close()
+
+    def test_embed_preserves_input_order(self, pool):
+        """Test shards are reassembled in the order of the input texts."""
+        texts = [str(i) for i in range(1, 11)]
+
+        result = pool.embed(texts)
+
+        expected = normalize_embeddings(np.array([[i, 1.0] for i in range(1, 11)]))
+        assert result.shape == (10, 3)
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result[:, 0] / result[:, 1], expected[:, 0] / expected[:, 1], rtol=1e-5)
+
+    def test_embed_runs_in_worker_processes(self, pool):
+        """Test encoding happens outside the API process."""
+        texts = [str(i) for i in range(1, 9)]
+
+        result = pool.embed(texts)
+        pids = {round(float(row[2] / row[1])) for row in result}
+
+        assert os.getpid() not in pids
+
+    def test_embed_fewer_texts_than_workers(self, pool):
+        """Test a batch smaller than the pool is not split into empty shards."""
+        result = pool.embed(["3"])
+
+        assert result.shape == (1, 3)
+        assert result[0, 0] / result[0, 1] == pytest.approx(3.0)
+
+
+class TestEmbeddingServicePool:
+    """Test suite for routing EmbeddingService batches to the pool."""
+
+    @patch('app.core.services.embedding_service.EmbeddingWorkerPool')
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_large_batches_use_pool(self, mock_transformer, mock_pool_class, monkeypatch):
+        """Test only batches of at least EMBEDDING_POOL_MIN_BATCH texts are sharded."""
+        monkeypatch.setattr(settings, "embedding_pool_workers", 2)
+        monkeypatch.setattr(settings, "embedding_pool_min_batch", 4)
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[3.0, 4.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+        mock_pool_class.return_value.embed.return_value = np.zeros((4, 2), dtype=np.float32)
+
+        service = EmbeddingService()
+        service.embed_texts(["one"])
+        service.embed_texts(["a", "b", "c", "d"])
+        service.close()
+
+        mock_model.encode.assert_called_once_with(["one"], convert_to_numpy=True)
+        mock_pool_class.return_value.embed.assert_called_once_with(["a", "b", "c", "d"])
+        mock_pool_class.return_value.close.assert_called_once()
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_pool_disabled_by_default(self, mock_transformer):
+        """Test no worker pool is created unless EMBEDDING_POOL_WORKERS is set."""
+        assert EmbeddingService().pool is None
@@ -1,4 +1,5 @@
 """Tests for EmbeddingService."""
+import asyncio
 import pytest
 import numpy as np
 from unittest.mock import Mock, patch
@@ -67,7 +68,7 @@ class TestEmbeddingService:
     @patch('app.core.services.embedding_service.SentenceTransformer')
     def test_embed_texts_multiple_texts(self, mock_transformer):
         """Test embedding multiple texts."""
-        mock_model = Mock()
+        mock_model = Mock(spec=["encode"])
         mock_embeddings = np.array([
             [1.0, 2.0, 3.0],
             [4.0, 5.0, 6.0],
@@ -128,3 +129,90 @@ class TestEmbeddingService:
             service2 = get_embedding_service()
             
             assert service1 is service2
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_embed_query_is_cached(self, mock_transformer):
+        """Test repeated queries are encoded once and counted as hits."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[3.0, 4.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+        first = service.embed_query("python programming")
+        second = service.embed_query("  python   programming ")
+
+        assert second is first
+        mock_model.encode.assert_called_once_with(["python programming"], convert_to_numpy=True)
+        stats = service.query_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_embed_query_async_shares_the_cache(self, mock_transformer):
+        """Test async queries go through the batcher and hit the same cache as sync ones."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[3.0, 4.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+        first = asyncio.run(service.embed_query_async("python programming"))
+        second = service.embed_query("python programming")
+
+        assert second is first
+        assert not first.flags.writeable
+        mock_model.encode.assert_called_once_with(["python programming"], convert_to_numpy=True)
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_embed_query_cache_is_case_sensitive(self, mock_transformer):
+        """Test queries differing in case are encoded separately."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[3.0, 4.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+        service.embed_query("Apple")
+        service.embed_query("apple")
+
+        assert mock_model.encode.call_count == 2
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_embed_query_returns_read_only_array(self, mock_transformer):
+        """Test cached embeddings cannot be mutated by callers."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[3.0, 4.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+        embedding = service.embed_query("test")
+
+        with pytest.raises(ValueError):
+            embedding[0] = 1.0
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_embed_queries_encodes_misses_once(self, mock_transformer):
+        """Test a query batch encodes distinct cache misses in one call and fills the cache."""
+        mock_model = Mock(spec=["encode"])
+        mock_model.encode.return_value = np.array([[3.0, 4.0], [0.0, 2.0]], dtype=np.float32)
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+        result = service.embed_queries(["alpha", "beta", " alpha "])
+
+        mock_model.encode.assert_called_once_with(["alpha", "beta"], convert_to_numpy=True)
+        np.testing.assert_allclose(result, [[0.6, 0.8], [0.0, 1.0], [0.6, 0.8]], atol=1e-6)
+        assert service.embed_query("beta") is service.query_cache.get((service.model_name, "beta"))
+        assert mock_model.encode.call_count == 1
+
+    @patch('app.core.services.embedding_service.SentenceTransformer')
+    def test_token_offsets_uses_fast_tokenizer(self, mock_transformer):
+        """Test token offsets come from the fast tokenizer, or whitespace words without one."""
+        mock_model = Mock()
+        mock_model.tokenizer.is_fast = True
+        mock_model.tokenizer.return_value = {"offset_mapping": [(0, 3), (3, 5)]}
+        mock_transformer.return_value = mock_model
+
+        service = EmbeddingService()
+
+        assert service.token_offsets("hello") == [(0, 3), (3, 5)]
+        mock_model.tokenizer.is_fast = False
+        assert service.token_offsets("hello world") == [(0, 5), (6, 11)]
@@ -0,0 +1,122 @@
+"""Tests for the SQLite FTS5 mirror and must_match constrained search."""
+import pytest
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+
+from app.api.schemas.document import DocumentCreate
+from app.core.index.vector_index import VectorIndex
+from app.core.services.ingestion_service import IngestionService
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.persistence.db.fts import FTS_TABLE, FullTextUnavailableError, match_expression, sync_fts_table
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.settings import settings
+
+
+class TestMatchExpression:
+    """Tests for quoting user input as an FTS5 expression."""
+
+    def test_terms_are_quoted_phrases(self):
+        """Test every term becomes a quoted phrase, so operators are plain text."""
+        assert match_expression("error E-1042 OR") == '"error" "E-1042" "OR"'
+
+    def test_quotes_are_escaped(self):
+        """Test embedded double quotes are doubled."""
+        assert match_expression('say "hi"') == '"say" """hi"""'
+
+
+class TestSyncFtsTable:
+    """Tests for creating, backfilling and dropping the mirror at startup."""
+
+    def test_backfills_existing_database(self, tmp_path, monkeypatch):
+        """Test a database created without the mirror gets it, filled from documents."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        monkeypatch.setattr(settings, "fts_enabled", False)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO documents (title, content) VALUES ('Old', 'legacy widget')"))
+        assert not inspect(engine).has_table(FTS_TABLE)
+
+        monkeypatch.setattr(settings, "fts_enabled", True)
+        built = sync_fts_table(engine)
+
+        with engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'widget'")).all()
+        assert built is True
+        assert [row[0] for row in rows] == [1]
+        assert sync_fts_table(engine) is False
+        engine.dispose()
+
+    def test_drops_mirror_when_disabled(self, tmp_path, monkeypatch):
+        """Test disabling FTS drops the mirror so it is rebuilt when re-enabled."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'fts.db'}")
+        Base.metadata.create_all(bind=engine)
+        assert inspect(engine).has_table(FTS_TABLE)
+
+        monkeypatch.setattr(settings, "fts_enabled", False)
+        sync_fts_table(engine)
+
+        assert not inspect(engine).has_table(FTS_TABLE)
+        engine.dispose()
+
+
+class TestConstrainedSearch:
+    """Integration of the mirror with DocumentRepository and QueryService."""
+
+    @pytest.fixture
+    def saved(self, db_session, mock_embedding_service, vector_index):
+        """Three documents; the dense query vector is closest to the first one."""
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32
+        )
+        saved = IngestionService(db_session, mock_embedding_service, vector_index).ingest([
+            DocumentCreate(title="Pump manual", content="centrifugal pump maintenance"),
+            DocumentCreate(title="Valve manual", content="valve maintenance, part SKU-7781"),
+            DocumentCreate(title="Valve catalog", content="valves and fittings SKU-7781"),
+        ])[0]
+        mock_embedding_service.embed_texts.return_value = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        return saved
+
+    def test_repository_mirrors_inserts(self, db_session, saved):
+        """Test create_many mirrors rows into FTS5 and match_ids ranks them."""
+        repo = DocumentRepository(db_session)
+
+        assert sorted(repo.match_ids("sku-7781", limit=10)) == [saved[1].id, saved[2].id]
+        assert repo.match_ids("valve maintenance", limit=10) == [saved[1].id]
+        assert repo.match_ids("sku-7781", limit=1) in ([saved[1].id], [saved[2].id])
+        assert repo.match_ids("   ", limit=10) == []
+
+    def test_must_match_constrains_without_loading_index(self, db_session, mock_embedding_service, saved):
+        """Test only matching documents are scored, from gathered embeddings."""
+        index = VectorIndex()
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, index)
+
+        results = service.search("pump", top_k=5, must_match="SKU-7781")
+
+        assert [r.id for r in results] == [saved[1].id, saved[2].id]
+        assert results[0].score == pytest.approx(0.8, abs=1e-5)
+        assert not index.loaded
+
+    def test_must_match_uses_resident_rows_when_loaded(self, db_session, mock_embedding_service, vector_index, saved):
+        """Test the resident index gives the same ranking as gathered embeddings."""
+        repo = DocumentRepository(db_session)
+        vector_index.ensure_loaded(repo)
+        service = QueryService(repo, mock_embedding_service, vector_index)
+
+        results = service.search("pump", top_k=1, must_match="sku-7781")
+
+        assert [r.id for r in results] == [saved[1].id]
+
+    def test_must_match_without_matches(self, db_session, mock_embedding_service, saved):
+        """Test a constraint nothing satisfies returns no results."""
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, VectorIndex())
+
+        assert service.search("pump", must_match="turbine") == []
+
+    def test_unavailable_when_disabled(self, db_session, mock_embedding_service, saved, monkeypatch):
+        """Test must_match raises when the mirror is not maintained."""
+        monkeypatch.setattr(settings, "fts_enabled", False)
+        service = QueryService(DocumentRepository(db_session), mock_embedding_service, VectorIndex())
+
+        with pytest.raises(FullTextUnavailableError):
+            service.search("pump", must_match="valve")
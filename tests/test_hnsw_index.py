@@ -0,0 +1,136 @@
+"""Tests for the HNSW graph index."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from app.core.index.hnsw import HNSWIndex
+from app.core.index.vector_index import VectorIndex
+from tests.fake_models import normalized
+
+
+class TestHNSWIndex:
+    """Test suite for HNSWIndex class."""
+
+    @pytest.fixture
+    def matrix(self):
+        """Create a small random normalized corpus."""
+        return normalized(300, 16)
+
+    @pytest.fixture
+    def graph(self, matrix):
+        """Build a graph over the corpus."""
+        index = HNSWIndex(m=8, ef_construction=50)
+        index.build(matrix)
+        return index
+
+    def test_empty_graph_returns_nothing(self):
+        """Test searching a graph with no nodes returns empty arrays."""
+        rows, scores = HNSWIndex().search(np.empty((0, 4)), np.ones(4), 5)
+
+        assert len(rows) == 0
+        assert len(scores) == 0
+
+    def test_finds_exact_match_first(self, graph, matrix):
+        """Test a stored vector is its own nearest neighbour."""
+        rows, scores = graph.search(matrix, matrix[42], 5)
+
+        assert rows[0] == 42
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_recall_against_exact_search(self, graph, matrix):
+        """Test graph search recovers most of the exact top-10."""
+        rng = np.random.default_rng(1)
+        hits = 0
+        for q in range(30):
+            query = matrix[q] + 0.2 * rng.standard_normal(16).astype(np.float32)
+            query /= np.linalg.norm(query)
+            exact = set(np.argsort(-(matrix @ query))[:10])
+            rows, _ = graph.search(matrix, query, 10, ef_search=64)
+            hits += len(exact & set(rows.tolist()))
+
+        assert hits / 300 > 0.9
+
+    def test_degree_is_bounded(self, graph):
+        """Test no level-0 adjacency list exceeds 2 * M neighbours."""
+        assert graph._neighbors0.shape[1] == 16
+        degrees = (graph._neighbors0[:graph.size] >= 0).sum(axis=1)
+        assert degrees.max() <= 16
+        assert degrees.min() >= 1
+
+    def test_incremental_add(self, matrix):
+        """Test rows appended later are reachable in the graph."""
+        index = HNSWIndex(m=8, ef_construction=50)
+        index.build(matrix[:150])
+
+        index.add(matrix, 150)
+
+        assert index.size == 300
+        rows, _ = index.search(matrix, matrix[250], 1)
+        assert rows[0] == 250
+
+    def test_background_add_links_rows_off_the_caller(self, matrix):
+        """Test background inserts return at once and are searchable after wait, while searches stay valid."""
+        index = HNSWIndex(m=8, ef_construction=50, background=True)
+        index.build(matrix[:100])
+
+        index.add(matrix, 100)
+        during, _ = index.search(matrix, matrix[5], 3)
+        assert index.wait(timeout=30)
+
+        assert during[0] == 5
+        assert index.size == 300
+        rows, _ = index.search(matrix, matrix[250], 1)
+        assert rows[0] == 250
+
+    def test_save_and_restore(self, graph, matrix, tmp_path):
+        """Test a saved graph is restored instead of rebuilt."""
+        path = str(tmp_path / "graph.npz")
+        graph.save(path)
+
+        restored = HNSWIndex(m=8, ef_construction=50, path=path)
+        restored.build(matrix)
+
+        assert restored.size == graph.size
+        assert restored.entry_point == graph.entry_point
+        np.testing.assert_array_equal(
+            restored.search(matrix, matrix[7], 5)[0], graph.search(matrix, matrix[7], 5)[0]
+        )
+
+    def test_restore_catches_up_on_new_rows(self, matrix, tmp_path):
+        """Test rows added after the last save are inserted on restore."""
+        path = str(tmp_path / "graph.npz")
+        index = HNSWIndex(m=8, ef_construction=50, path=path)
+        index.build(matrix[:200])
+
+        restored = HNSWIndex(m=8, ef_construction=50, path=path)
+        restored.build(matrix)
+
+        assert restored.size == 300
+
+    def test_restore_rejects_different_vectors(self, graph, tmp_path):
+        """Test a graph saved for other vectors is discarded and rebuilt."""
+        path = str(tmp_path / "graph.npz")
+        graph.save(path)
+        other = normalized(300, 16, seed=99)
+
+        restored = HNSWIndex(m=8, ef_construction=50, path=path)
+        restored.build(other)
+
+        rows, _ = restored.search(other, other[3], 1)
+        assert rows[0] == 3
+
+    def test_vector_index_builds_hnsw_engine(self, matrix, tmp_path, monkeypatch):
+        """Test the VectorIndex exposes HNSW as a named engine and persists it."""
+        from app.infrastructure.settings import settings
+        monkeypatch.setattr(settings, "hnsw_index_path", str(tmp_path / "graph.npz"))
+        index = VectorIndex()
+        index.ensure_loaded(Mock(list_embeddings=Mock(return_value=[
+            (i + 1, row) for i, row in enumerate(matrix[:50])
+        ])))
+
+        engine = index.engine("hnsw")
+
+        assert isinstance(engine, HNSWIndex)
+        assert engine.size == 50
+        assert (tmp_path / "graph.npz").exists()
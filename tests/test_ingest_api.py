@@ -0,0 +1,102 @@
+"""Integration tests for streaming NDJSON ingestion."""
+import json
+import pytest
+
+from app.api.v1.ingest import LineTooLongError, iter_ndjson_lines
+from app.infrastructure.settings import settings
+from tests.fake_models import unit_embeddings
+
+
+def _ndjson(documents):
+    return "".join(json.dumps(doc) + "\n" for doc in documents)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestStreamingIngestion:
+    """Integration tests for POST /api/v1/documents/stream."""
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch, mock_embedding_service):
+        """Use 2-document chunks and size-aware embeddings."""
+        monkeypatch.setattr(settings, "ingest_chunk_size", 2)
+        mock_embedding_service.embed_texts.side_effect = unit_embeddings
+
+    def test_ingests_in_chunks_and_reports_progress(self, client, mock_embedding_service):
+        """Test each chunk is embedded separately and reported with its ids."""
+        docs = [{"title": f"Doc {i}", "content": f"Content {i}"} for i in range(5)]
+
+        response = client.post("/api/v1/documents/stream", content=_ndjson(docs))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = _lines(response)
+        assert [line["count"] for line in lines[:-1]] == [2, 2, 1]
+        assert [len(call.args[0]) for call in mock_embedding_service.embed_texts.call_args_list] == [2, 2, 1]
+        assert lines[-1]["done"] is True
+        assert lines[-1]["total"] == 5
+        ids = [doc_id for line in lines[:-1] for doc_id in line["ids"]]
+        listed = client.get("/api/v1/documents/").json()
+        assert [doc["id"] for doc in listed] == ids
+
+    def test_invalid_lines_are_reported_and_skipped(self, client):
+        """Test malformed lines produce error entries without aborting the load."""
+        body = _ndjson([{"title": "A", "content": "a"}]) + "not json\n" + _ndjson([{"title": "B"}, {"title": "C", "content": "c"}])
+
+        lines = _lines(client.post("/api/v1/documents/stream", content=body))
+
+        errors = [line for line in lines if "error" in line]
+        assert [error["line"] for error in errors] == [2, 3]
+        assert lines[-1]["total"] == 2
+        assert lines[-1]["errors"] == 2
+
+    def test_streamed_documents_are_searchable(self, client, mock_embedding_service):
+        """Test documents become visible to search as chunks are indexed."""
+        docs = [{"title": f"Doc {i}", "content": f"Content {i}"} for i in range(3)]
+        client.post("/api/v1/documents/stream", content=_ndjson(docs))
+        mock_embedding_service.embed_texts.side_effect = None
+        mock_embedding_service.embed_texts.return_value = unit_embeddings(["x", "y"])[:1]
+
+        response = client.request(
+            "GET",
+            "/api/v1/query/",
+            content=json.dumps({"query": "anything", "top_k": 3}),
+            headers={"Content-Type": "application/json"}
+        )
+
+        assert len(response.json()["results"]) == 3
+
+    def test_empty_body(self, client):
+        """Test an empty stream only reports completion."""
+        lines = _lines(client.post("/api/v1/documents/stream", content=""))
+
+        assert lines == [{**lines[0], "done": True, "total": 0, "chunks": 0, "errors": 0}]
+
+
+class TestIterNdjsonLines:
+    """Test suite for the incremental NDJSON line splitter."""
+
+    @pytest.fixture
+    def anyio_backend(self):
+        """Run async tests on asyncio only."""
+        return "asyncio"
+
+    @staticmethod
+    async def _collect(chunks, max_line_bytes=1024):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        return [line async for line in iter_ndjson_lines(stream(), max_line_bytes)]
+
+    @pytest.mark.anyio
+    async def test_lines_split_across_chunks(self):
+        """Test lines spanning network chunks are reassembled."""
+        assert await self._collect([b'{"a"', b': 1}\n{"b": 2', b"}"]) == [b'{"a": 1}', b'{"b": 2}']
+
+    @pytest.mark.anyio
+    async def test_overlong_line_raises(self):
+        """Test a line larger than the limit stops the stream."""
+        with pytest.raises(LineTooLongError):
+            await self._collect([b"x" * 100], max_line_bytes=10)
@@ -0,0 +1,163 @@
+"""Tests for the background ingestion job queue."""
+import time
+from datetime import timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.document import DocumentCreate
+from app.core.index.vector_index import VectorIndex
+from app.core.services.ingestion_jobs import IngestionJobQueue
+from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.models.ingestion_job import COMPLETED, FAILED, RUNNING, IngestionJobItemModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.repositories.ingestion_job_repository import IngestionJobRepository, utcnow
+from tests.fake_models import unit_embeddings
+
+
+def _documents(n):
+    return [DocumentCreate(title=f"Doc {i}", content=f"Content {i}") for i in range(n)]
+
+
+class TestIngestionJobQueue:
+    """Test suite for IngestionJobQueue class."""
+
+    @pytest.fixture(autouse=True)
+    def size_aware_embeddings(self, mock_embedding_service):
+        """Return one embedding per text."""
+        mock_embedding_service.embed_texts.side_effect = unit_embeddings
+
+    def test_process_ingests_in_batches(self, job_queue, db_session, mock_embedding_service, vector_index):
+        """Test a job is embedded batch by batch and completes."""
+        vector_index.ensure_loaded(DocumentRepository(db_session))
+        job = job_queue.submit(db_session, _documents(5))
+
+        job_queue.process(job.id)
+
+        db_session.expire_all()
+        job = IngestionJobRepository(db_session).get(job.id)
+        assert job.status == COMPLETED
+        assert job.processed == 5
+        assert job.finished_at is not None
+        assert [len(call.args[0]) for call in mock_embedding_service.embed_texts.call_args_list] == [2, 2, 1]
+        assert db_session.query(DocumentModel).count() == 5
+        assert db_session.query(IngestionJobItemModel).count() == 0
+        assert len(vector_index) == 5
+
+    def test_failure_is_recorded(self, job_queue, db_session, mock_embedding_service):
+        """Test an encode error fails the job and keeps committed batches."""
+        calls = []
+
+        def flaky(texts):
+            calls.append(texts)
+            if len(calls) == 2:
+                raise RuntimeError("model crashed")
+            return unit_embeddings(texts)
+
+        mock_embedding_service.embed_texts.side_effect = flaky
+        job = job_queue.submit(db_session, _documents(5))
+
+        job_queue.process(job.id)
+
+        db_session.expire_all()
+        job = IngestionJobRepository(db_session).get(job.id)
+        assert job.status == FAILED
+        assert job.error == "model crashed"
+        assert job.processed == 2
+        assert db_session.query(DocumentModel).count() == 2
+
+    def test_paused_job_resumes_without_duplicates(self, job_queue, db_session, db_engine, mock_embedding_service):
+        """Test a job interrupted between batches resumes from its pending items."""
+        job = job_queue.submit(db_session, _documents(5))
+        job_queue._stopping.set()
+        job_queue.process(job.id)
+
+        db_session.expire_all()
+        assert IngestionJobRepository(db_session).get(job.id).status == RUNNING
+        assert IngestionJobRepository(db_session).list_unfinished_ids() == [job.id]
+
+        restarted = IngestionJobQueue(
+            session_factory=sessionmaker(bind=db_engine),
+            embedding_service_factory=lambda: mock_embedding_service,
+            index=VectorIndex(),
+            batch_size=2,
+        )
+        restarted.process(job.id)
+
+        db_session.expire_all()
+        titles = [doc.title for doc in db_session.query(DocumentModel).order_by(DocumentModel.id)]
+        assert titles == [f"Doc {i}" for i in range(5)]
+        assert IngestionJobRepository(db_session).get(job.id).status == COMPLETED
+
+    def test_job_is_claimed_by_one_worker(self, job_queue, db_session, db_engine, mock_embedding_service):
+        """Test a job leased by another process is skipped until its lease expires."""
+        job = job_queue.submit(db_session, _documents(3))
+        other = IngestionJobRepository(sessionmaker(bind=db_engine)())
+        assert other.claim(job.id, lease_seconds=60)
+        assert not other.claim(job.id, lease_seconds=60)
+
+        job_queue.process(job.id)
+
+        db_session.expire_all()
+        assert db_session.query(DocumentModel).count() == 0
+        assert IngestionJobRepository(db_session).get(job.id).status == RUNNING
+
+        # Lease vencido: o processo que tinha o job morreu
+        leased = other.get(job.id)
+        leased.lease_expires_at = utcnow() - timedelta(seconds=1)
+        other.db.commit()
+        job_queue.process(job.id)
+
+        db_session.expire_all()
+        assert db_session.query(DocumentModel).count() == 3
+        assert IngestionJobRepository(db_session).get(job.id).status == COMPLETED
+        assert not other.claim(job.id, lease_seconds=60)
+        other.db.close()
+
+    def test_worker_threads_drain_queue(self, tmp_path, mock_embedding_service):
+        """Test started workers pick up submitted jobs."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        sessions = sessionmaker(bind=engine)
+        job_queue = IngestionJobQueue(sessions, lambda: mock_embedding_service, VectorIndex(), batch_size=2)
+        job_queue.start()
+        with sessions() as db:
+            job_id = job_queue.submit(db, _documents(3)).id
+
+        status = None
+        for _ in range(200):
+            with sessions() as db:
+                status = IngestionJobRepository(db).get(job_id).status
+            if status == COMPLETED:
+                break
+            time.sleep(0.01)
+        job_queue.stop(timeout=5)
+        engine.dispose()
+
+        assert status == COMPLETED
+
+
+class TestJobsAPI:
+    """Integration tests for the jobs endpoints."""
+
+    def test_create_job_returns_202_and_status(self, client, job_queue, mock_embedding_service):
+        """Test jobs are accepted immediately and report progress once processed."""
+        mock_embedding_service.embed_texts.side_effect = unit_embeddings
+
+        created = client.post("/api/v1/jobs/", json=[{"title": "A", "content": "a"}, {"title": "B", "content": "b"}])
+        queued = client.get(f"/api/v1/jobs/{created.json()['id']}")
+        job_queue.process(created.json()["id"])
+        done = client.get(f"/api/v1/jobs/{created.json()['id']}")
+
+        assert created.status_code == 202
+        assert created.json()["status"] == "queued"
+        assert queued.json()["processed"] == 0
+        assert done.json()["status"] == "completed"
+        assert done.json()["processed"] == 2
+        assert done.json()["error"] is None
+        assert len(client.get("/api/v1/documents/").json()) == 2
+
+    def test_get_missing_job(self, client):
+        """Test polling an unknown job returns 404."""
+        assert client.get("/api/v1/jobs/999").status_code == 404
@@ -0,0 +1,136 @@
+"""Tests for the IVF approximate index."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from app.core.index.ivf import IVFIndex
+from app.core.index.kmeans import spherical_kmeans
+from app.core.index.vector_index import VectorIndex
+from tests.fake_models import normalized
+
+
+class TestIVFIndex:
+    """Test suite for IVFIndex and spherical k-means."""
+
+    @pytest.fixture
+    def matrix(self):
+        """Create a random normalized corpus."""
+        return normalized(2000, 32)
+
+    def test_kmeans_returns_unit_centroids(self, matrix):
+        """Test k-means centroids are normalized and labels cover every row."""
+        centroids, labels = spherical_kmeans(matrix, 16)
+
+        assert centroids.shape == (16, 32)
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+        assert labels.shape == (2000,)
+        assert labels.max() < 16
+
+    def test_kmeans_clamps_k_to_points(self):
+        """Test k larger than the number of points is reduced."""
+        centroids, _ = spherical_kmeans(normalized(3, 4), 10)
+
+        assert len(centroids) == 3
+
+    def test_build_buckets_every_row_once(self, matrix):
+        """Test each row lands in exactly one inverted list."""
+        ivf = IVFIndex(nlist=16)
+
+        ivf.build(matrix)
+
+        rows = np.sort(np.concatenate(ivf.lists))
+        np.testing.assert_array_equal(rows, np.arange(len(matrix)))
+
+    def test_probing_all_lists_is_exact(self, matrix):
+        """Test nprobe == nlist returns the exact top-k."""
+        ivf = IVFIndex(nlist=16)
+        ivf.build(matrix)
+        query = matrix[3]
+
+        rows, scores = ivf.search(matrix, query, 10, nprobe=16)
+
+        np.testing.assert_array_equal(rows, np.argsort(-(matrix @ query))[:10])
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+    def test_recall_with_few_probes(self, matrix):
+        """Test probing a fraction of lists still finds most true neighbours."""
+        ivf = IVFIndex(nlist=16, nprobe=4)
+        ivf.build(matrix)
+        hits = 0
+        for q in range(50):
+            query = matrix[q]
+            exact = set(np.argsort(-(matrix @ query))[:10])
+            rows, _ = ivf.search(matrix, query, 10)
+            hits += len(exact & set(rows))
+
+        assert hits / 500 > 0.5
+
+    def test_add_buckets_new_rows_without_retraining(self, matrix):
+        """Test small appends are assigned to existing lists."""
+        ivf = IVFIndex(nlist=16, retrain_growth=2.0)
+        ivf.build(matrix[:1500])
+        centroids = ivf.centroids
+
+        ivf.add(matrix, 1500)
+
+        assert ivf.centroids is centroids
+        assert sum(len(lst) for lst in ivf.lists) == 2000
+
+    def test_add_retrains_after_growth_threshold(self, matrix):
+        """Test the index retrains once the corpus grows past the threshold."""
+        ivf = IVFIndex(nlist=8, retrain_growth=2.0)
+        ivf.build(matrix[:500])
+
+        ivf.add(matrix[:1000], 500)
+
+        assert ivf.trained_size == 1000
+
+    def test_background_retrain_keeps_rows_added_meanwhile(self, matrix):
+        """Test a background retrain swaps in lists that also cover rows added while it ran."""
+        ivf = IVFIndex(nlist=8, retrain_growth=2.0, background=True)
+        ivf.build(matrix[:500])
+
+        ivf.add(matrix[:1000], 500)
+        ivf.add(matrix[:1200], 1000)
+        assert ivf.wait(timeout=30)
+
+        assert ivf.trained_size == 1000
+        assert ivf.size == 1200
+        rows = np.sort(np.concatenate(ivf.lists))
+        np.testing.assert_array_equal(rows, np.arange(1200))
+
+    def test_search_skips_rows_past_a_stale_matrix(self, matrix):
+        """Test rows bucketed by a concurrent add are ignored by a search holding the older matrix."""
+        ivf = IVFIndex(nlist=8)
+        ivf.build(matrix[:200])
+        stale = matrix[:200]
+
+        ivf.add(matrix[:250], 200)
+        rows, _ = ivf.search(stale, matrix[220], 10, nprobe=8)
+
+        assert len(rows) == 10
+        assert rows.max() < 200
+
+    def test_search_untrained_returns_empty(self):
+        """Test an index that was never built returns no candidates."""
+        rows, scores = IVFIndex().search(np.empty((0, 4)), np.ones(4), 5)
+
+        assert len(rows) == 0
+        assert len(scores) == 0
+
+    def test_vector_index_keeps_engine_in_sync(self, matrix):
+        """Test rows appended to the VectorIndex reach a built IVF engine."""
+        index = VectorIndex()
+        index.ensure_loaded(Mock(list_embeddings=Mock(return_value=[])))
+        index.add(range(1, 1001), matrix[:1000])
+        ivf = index.engine("ivf")
+
+        index.add(range(1001, 1101), matrix[1000:1100])
+
+        assert ivf.size == 1100
+        assert index.engine("ivf") is ivf
+
+    def test_vector_index_rejects_unknown_engine(self):
+        """Test requesting an unknown engine raises ValueError."""
+        with pytest.raises(ValueError, match="Unknown search engine"):
+            VectorIndex().engine("nope")
@@ -0,0 +1,71 @@
+"""Tests for length-bucketed encoding."""
+import numpy as np
+from unittest.mock import Mock
+
+from app.core.services.length_bucketing import encode_bucketed, plan_buckets, token_lengths
+
+
+class LengthModel:
+    """Stand-in model without tokenizer that embeds each text as [len(text), 1]."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+class TestLengthBucketing:
+    """Test suite for token-budget bucketing."""
+
+    def test_plan_buckets_respects_budget(self):
+        """Test every bucket's padded size fits the budget and buckets cover all rows."""
+        lengths = np.array([2, 2, 3, 3, 3, 10, 10, 40])
+
+        buckets = plan_buckets(lengths, token_budget=20, max_batch_size=8)
+
+        assert [(b.start, b.stop) for b in buckets] == [(0, 5), (5, 7), (7, 8)]
+        assert all((b.stop - b.start) * lengths[b.stop - 1] <= 20 for b in buckets[:-1])
+
+    def test_plan_buckets_caps_batch_size(self):
+        """Test short texts are still split at max_batch_size."""
+        buckets = plan_buckets(np.ones(10, dtype=np.int64), token_budget=1000, max_batch_size=4)
+
+        assert [b.stop - b.start for b in buckets] == [4, 4, 2]
+
+    def test_plan_buckets_oversized_text_gets_own_bucket(self):
+        """Test a text longer than the budget is encoded alone."""
+        buckets = plan_buckets(np.array([5, 500]), token_budget=100, max_batch_size=8)
+
+        assert [(b.start, b.stop) for b in buckets] == [(0, 1), (1, 2)]
+
+    def test_encode_bucketed_restores_input_order(self):
+        """Test batches are length-homogeneous and rows come back in input order."""
+        model = LengthModel()
+        texts = ["x" * 30, "a", "bb", "y" * 29, "c"]
+
+        result = encode_bucketed(model, texts, token_budget=30, max_batch_size=8)
+
+        np.testing.assert_array_equal(result[:, 0], [30, 1, 2, 29, 1])
+        assert model.batches == [["a", "c", "bb"], ["y" * 29], ["x" * 30]]
+
+    def test_encode_bucketed_single_bucket_is_one_plain_call(self):
+        """Test batches fitting one bucket keep the original call and order."""
+        model = Mock(spec=["encode"])
+        model.encode.return_value = np.zeros((2, 2), dtype=np.float32)
+
+        encode_bucketed(model, ["long text", "s"], token_budget=1000, max_batch_size=8)
+
+        model.encode.assert_called_once_with(["long text", "s"], convert_to_numpy=True)
+
+    def test_token_lengths_uses_tokenizer(self):
+        """Test lengths come from the model tokenizer with truncation at max_seq_length."""
+        model = Mock()
+        model.max_seq_length = 128
+        model.tokenizer.return_value = {"input_ids": [[101, 7, 102], [101, 102]]}
+
+        lengths = token_lengths(model, ["one", ""])
+
+        np.testing.assert_array_equal(lengths, [3, 2])
+        assert model.tokenizer.call_args.kwargs["max_length"] == 128
@@ -0,0 +1,82 @@
+"""Tests for LRUCache."""
+import pytest
+
+from app.core.cache.lru_cache import LRUCache
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """Test suite for LRUCache class."""
+
+    def test_get_returns_stored_value(self):
+        """Test a stored value is returned and counted as a hit."""
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full."""
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_entries_expire_after_ttl(self):
+        """Test entries older than the TTL are dropped on access."""
+        clock = FakeClock()
+        cache = LRUCache(max_size=2, ttl_seconds=10, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 5
+        assert cache.get("a") == 1
+        clock.now = 11
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_zero_size_disables_cache(self):
+        """Test a cache of size 0 never stores anything."""
+        cache = LRUCache(max_size=0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_stats(self):
+        """Test stats reports counters and hit rate."""
+        cache = LRUCache(max_size=4, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+
+        assert stats["size"] == 1
+        assert stats["max_size"] == 4
+        assert stats["ttl_seconds"] == 60
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 0
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
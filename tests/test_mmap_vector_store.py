@@ -0,0 +1,169 @@
+"""Tests for MmapVectorStore."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from app.core.index.vector_index import VectorIndex
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from app.infrastructure.persistence.vector_store.mmap_vector_store import MmapVectorStore
+
+
+class TestMmapVectorStore:
+    """Test suite for MmapVectorStore class."""
+
+    @pytest.fixture
+    def store_path(self, tmp_path):
+        """Path for a vector file inside a temporary directory."""
+        return str(tmp_path / "documents.vectors")
+
+    @pytest.fixture
+    def store(self, store_path):
+        """Create an empty vector store."""
+        return MmapVectorStore(store_path)
+
+    def test_empty_store(self, store):
+        """Test a new store has no vectors and unknown dimension."""
+        assert len(store) == 0
+        assert store.dim is None
+        assert store.get(1) is None
+
+    def test_append_and_get_is_memory_mapped(self, store):
+        """Test appended vectors are readable as memory-mapped views."""
+        vectors = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+
+        store.append([10, 20], vectors)
+
+        assert isinstance(store.vectors, np.memmap)
+        np.testing.assert_array_equal(store.ids, [10, 20])
+        np.testing.assert_array_equal(store.get(20), [0.0, 1.0, 0.0])
+        assert store.row_of(10) == 0
+
+    def test_reopen_preserves_vectors(self, store, store_path):
+        """Test vectors and ids survive reopening the files."""
+        store.append([1, 2], np.eye(2, dtype=np.float32))
+        store.append([3], np.array([[0.5, 0.5]], dtype=np.float32))
+
+        reopened = MmapVectorStore(store_path)
+
+        assert reopened.dim == 2
+        np.testing.assert_array_equal(reopened.ids, [1, 2, 3])
+        np.testing.assert_array_equal(reopened.get(3), [0.5, 0.5])
+
+    def test_reopen_truncates_partial_write(self, store, store_path):
+        """Test vectors written without their ids are discarded on open."""
+        store.append([1], np.array([[1.0, 2.0]], dtype=np.float32))
+        with open(store_path, "ab") as f:
+            f.write(np.array([3.0, 4.0], dtype=np.float32).tobytes())
+
+        reopened = MmapVectorStore(store_path)
+
+        assert len(reopened) == 1
+        assert reopened.vectors.shape == (1, 2)
+
+    def test_append_rejects_dimension_mismatch(self, store):
+        """Test appending vectors of a different dimension raises ValueError."""
+        store.append([1], np.array([[1.0, 2.0]], dtype=np.float32))
+
+        with pytest.raises(ValueError, match="dimension"):
+            store.append([2], np.array([[1.0, 2.0, 3.0]], dtype=np.float32))
+
+    def test_append_rejects_duplicate_ids(self, store):
+        """Test appending an id twice raises ValueError."""
+        store.append([1], np.array([[1.0, 2.0]], dtype=np.float32))
+
+        with pytest.raises(ValueError, match="already stored"):
+            store.append([1], np.array([[3.0, 4.0]], dtype=np.float32))
+
+    def test_rejects_foreign_file(self, store_path):
+        """Test opening a file without the store header fails."""
+        with open(store_path, "wb") as f:
+            f.write(b"not a vector file")
+
+        with pytest.raises(ValueError, match="not a vector store"):
+            MmapVectorStore(store_path)
+
+    def test_repository_keeps_vectors_out_of_sqlite(self, db_session, store):
+        """Test the repository writes metadata to SQLite and vectors to the store."""
+        repo = DocumentRepository(db_session, vector_store=store)
+        emb = np.array([0.6, 0.8], dtype=np.float32)
+
+        doc = repo.create(DocumentModel(title="T", content="C", embedding=emb.tobytes()))
+
+        stored = db_session.query(DocumentModel.embedding).filter(DocumentModel.id == doc.id).scalar()
+        assert stored is None
+        np.testing.assert_array_equal(repo.get_embedding(doc.id), emb)
+        [(doc_id, vector)] = repo.list_embeddings()
+        assert doc_id == doc.id
+        np.testing.assert_array_equal(vector, emb)
+
+    def test_sync_moves_existing_blobs(self, db_session, store):
+        """Test rows created with SQLite blobs are migrated into the store."""
+        emb = np.array([1.0, 0.0], dtype=np.float32)
+        created = DocumentRepository(db_session).create(
+            DocumentModel(title="Legacy", content="C", embedding=emb.tobytes())
+        )
+        repo = DocumentRepository(db_session, vector_store=store)
+
+        assert repo.sync_vector_store() == 1
+        assert repo.sync_vector_store() == 0
+        np.testing.assert_array_equal(store.get(created.id), emb)
+
+    def test_sync_clears_blobs_in_batches(self, db_session, store, monkeypatch):
+        """Test the blob cleanup splits its IN lists instead of binding every id at once."""
+        from app.infrastructure.persistence.repositories import document_repository
+        monkeypatch.setattr(document_repository, "_LOOKUP_BATCH", 2)
+        emb = np.ones(2, dtype=np.float32).tobytes()
+        legacy = DocumentRepository(db_session)
+        for i in range(5):
+            legacy.create(DocumentModel(title=f"Legacy {i}", content="C", embedding=emb))
+        repo = DocumentRepository(db_session, vector_store=store)
+
+        assert repo.sync_vector_store() == 5
+        assert db_session.query(DocumentModel).filter(DocumentModel.embedding.isnot(None)).count() == 0
+        assert len(store) == 5
+
+    def test_failed_append_leaves_blob_for_sync(self, db_session, store, monkeypatch):
+        """Test documents committed before a failed store append keep their vector in SQLite."""
+        repo = DocumentRepository(db_session, vector_store=store)
+        emb = np.array([0.6, 0.8], dtype=np.float32)
+        monkeypatch.setattr(store, "append", Mock(side_effect=OSError("disk full")))
+
+        with pytest.raises(OSError):
+            repo.create(DocumentModel(title="T", content="C", embedding=emb.tobytes()))
+        monkeypatch.undo()
+
+        assert repo.sync_vector_store() == 1
+        [(doc_id, vector)] = repo.list_embeddings()
+        np.testing.assert_array_equal(vector, emb)
+
+    def test_vector_index_serves_store_views(self, store):
+        """Test an index backed by the store scores the mmap without copying."""
+        store.append([5, 6], np.eye(2, dtype=np.float32))
+        index = VectorIndex(store=store)
+
+        index.ensure_loaded(repo=None)
+        store.append([7], np.array([[0.6, 0.8]], dtype=np.float32))
+        index.add([7], np.array([[0.6, 0.8]], dtype=np.float32))
+
+        assert len(index) == 3
+        assert isinstance(index.matrix, np.memmap)
+        np.testing.assert_array_equal(index.ids, [5, 6, 7])
+
+    def test_interleaved_ingests_index_each_row_once(self, store):
+        """Test adds arriving after other requests' appends still map ids to their own rows."""
+        store.append([1, 2], np.eye(2, dtype=np.float32))
+        index = VectorIndex(store=store)
+        index.ensure_loaded(repo=None)
+        index.attributes.load(index.ids, [])
+        engine = index.engine("binary")
+
+        # Duas ingestões gravam no arquivo antes de qualquer uma chamar add
+        store.append([3], np.array([[1.0, 1.0]], dtype=np.float32))
+        store.append([4, 5], np.array([[-1.0, 1.0], [1.0, -1.0]], dtype=np.float32))
+        index.add([4, 5], np.zeros((2, 2)), [{"tenant": "b"}, {"tenant": "b"}])
+        index.add([3], np.zeros((1, 2)), [{"tenant": "a"}])
+
+        assert engine.size == 5
+        np.testing.assert_array_equal(index.ids[index.filter_mask({"tenant": "a"})], [3])
+        np.testing.assert_array_equal(index.ids[index.filter_mask({"tenant": "b"})], [4, 5])
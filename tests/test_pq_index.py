@@ -0,0 +1,124 @@
+"""Tests for product quantization."""
+import pytest
+import numpy as np
+
+from app.core.index.pq import ProductQuantizer, PQIndex
+
+
+def _clustered(rows, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim)).astype(np.float32)
+    matrix = centers[rng.integers(0, 8, size=rows)] + 0.3 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestProductQuantizer:
+    """Test suite for ProductQuantizer and PQIndex."""
+
+    @pytest.fixture
+    def matrix(self):
+        """Create a clustered normalized corpus."""
+        return _clustered(1000, 32)
+
+    @pytest.fixture
+    def quantizer(self, matrix):
+        """Train a quantizer with 8 sub-vectors of 4 dims."""
+        pq = ProductQuantizer(m=8, n_centroids=64)
+        pq.train(matrix)
+        return pq
+
+    def test_encode_produces_uint8_codes(self, quantizer, matrix):
+        """Test each vector is encoded to m uint8 codes."""
+        codes = quantizer.encode(matrix)
+
+        assert codes.shape == (1000, 8)
+        assert codes.dtype == np.uint8
+        assert codes.max() < 64
+
+    def test_decode_approximates_vectors(self, quantizer, matrix):
+        """Test reconstruction error is small compared to the vector norm."""
+        decoded = quantizer.decode(quantizer.encode(matrix))
+
+        error = np.linalg.norm(decoded - matrix, axis=1).mean()
+        assert error < 0.5
+
+    def test_adc_matches_decoded_inner_product(self, quantizer, matrix):
+        """Test lookup-table scores equal inner products with decoded vectors."""
+        codes = quantizer.encode(matrix[:50])
+        query = matrix[0]
+
+        adc = quantizer.adc_scores(quantizer.lookup_table(query), codes)
+
+        np.testing.assert_allclose(adc, quantizer.decode(codes) @ query, rtol=1e-4, atol=1e-5)
+
+    def test_train_adapts_m_to_dimension(self):
+        """Test m falls back to a divisor of the dimension."""
+        pq = ProductQuantizer(m=8)
+        pq.train(_clustered(100, 30))
+
+        assert pq.m == 6
+        assert pq.dim == 30
+
+    def test_rejects_codebooks_larger_than_uint8(self):
+        """Test more than 256 centroids per subspace is rejected."""
+        with pytest.raises(ValueError):
+            ProductQuantizer(n_centroids=512)
+
+    def test_index_compresses_vectors(self, matrix):
+        """Test codes use m bytes per vector."""
+        index = PQIndex(m=8)
+        index.build(matrix)
+
+        assert index.codes.nbytes == 1000 * 8
+        assert matrix.nbytes / index.codes.nbytes == 16
+
+    def test_rerank_returns_exact_scores(self, matrix):
+        """Test re-ranked results carry exact cosine scores."""
+        index = PQIndex(m=8, rerank=True, rerank_factor=4)
+        index.build(matrix)
+        query = matrix[10]
+
+        rows, scores = index.search(matrix, query, 5)
+
+        assert rows[0] == 10
+        np.testing.assert_allclose(scores, matrix[rows] @ query, rtol=1e-6)
+
+    def test_rerank_improves_recall(self, matrix):
+        """Test exact re-ranking recall is at least as good as ADC alone."""
+        plain = PQIndex(m=4, rerank=False)
+        plain.build(matrix)
+        reranked = PQIndex(m=4, rerank=True, rerank_factor=8)
+        reranked.build(matrix)
+        plain_hits = reranked_hits = 0
+        for q in range(20):
+            exact = set(np.argsort(-(matrix @ matrix[q]))[:10])
+            plain_hits += len(exact & set(plain.search(matrix, matrix[q], 10)[0]))
+            reranked_hits += len(exact & set(reranked.search(matrix, matrix[q], 10)[0]))
+
+        assert reranked_hits >= plain_hits
+        assert reranked_hits / 200 > 0.7
+
+    def test_add_encodes_new_rows(self, matrix):
+        """Test appended rows are encoded with the trained codebooks."""
+        index = PQIndex(m=8)
+        index.build(matrix[:600])
+        codebooks = index.quantizer.codebooks
+
+        index.add(matrix, 600)
+
+        assert index.size == 1000
+        assert index.quantizer.codebooks is codebooks
+        rows, _ = index.search(matrix, matrix[900], 10)
+        assert 900 in rows
+
+    def test_search_skips_rows_past_a_stale_matrix(self, matrix):
+        """Test codes appended by a concurrent add are ignored by a search holding the older matrix."""
+        index = PQIndex(m=8)
+        index.build(matrix[:600])
+        stale = matrix[:600]
+
+        index.add(matrix, 600)
+        rows, _ = index.search(stale, matrix[900], 10)
+
+        assert len(rows) == 10
+        assert rows.max() < 600
@@ -4,6 +4,7 @@ import numpy as np
 from unittest.mock import Mock
 
 from app.core.services.query_service import QueryService
+from app.core.index.vector_index import VectorIndex
 from app.api.schemas.query import DocumentQueryResult
 from app.infrastructure.persistence.models.document import DocumentModel
 
@@ -19,16 +20,30 @@ class TestQueryService:
     @pytest.fixture
     def mock_embedding_service(self):
         """Create a mock EmbeddingService."""
-        return Mock()
+        mock = Mock()
+        mock.embed_query.side_effect = lambda text: mock.embed_texts([text])[0]
+        mock.embed_queries.side_effect = lambda texts: mock.embed_texts(texts)
+        return mock
 
     @pytest.fixture
     def query_service(self, mock_repository, mock_embedding_service):
         """Create a QueryService instance with mocked dependencies."""
         return QueryService(
             repo=mock_repository,
-            embedding_service=mock_embedding_service
+            embedding_service=mock_embedding_service,
+            index=VectorIndex()
         )
 
+    @staticmethod
+    def _use_documents(mock_repository, documents):
+        """Expose documents through the repository methods the index relies on."""
+        mock_repository.list_embeddings.return_value = [
+            (doc.id, np.frombuffer(doc.embedding, dtype=np.float32)) for doc in documents
+        ]
+        mock_repository.get_titles_by_ids.side_effect = lambda ids: {
+            doc.id: doc.title for doc in documents if doc.id in ids
+        }
+
     @pytest.fixture
     def sample_documents(self):
         """Create sample documents with embeddings."""
@@ -61,19 +76,19 @@ class TestQueryService:
         self, query_service, mock_repository, mock_embedding_service
     ):
         """Test search returns empty list when repository has no documents."""
-        mock_repository.list_all.return_value = []
+        self._use_documents(mock_repository, [])
         
         results = query_service.search("test query", top_k=5)
         
         assert results == []
-        mock_repository.list_all.assert_called_once()
+        mock_repository.list_embeddings.assert_called_once()
         mock_embedding_service.embed_texts.assert_not_called()
 
     def test_search_returns_top_k_results(
         self, query_service, mock_repository, mock_embedding_service, sample_documents
     ):
         """Test search returns correct number of results based on top_k."""
-        mock_repository.list_all.return_value = sample_documents
+        self._use_documents(mock_repository, sample_documents)
         
         # Query embedding similar to doc3
         query_emb = np.array([0.7071, 0.7071, 0.0], dtype=np.float32)
@@ -83,14 +98,14 @@ class TestQueryService:
         
         assert len(results) == 2
         assert all(isinstance(r, DocumentQueryResult) for r in results)
-        mock_repository.list_all.assert_called_once()
+        mock_repository.list_embeddings.assert_called_once()
         mock_embedding_service.embed_texts.assert_called_once_with(["test query"])
 
     def test_search_ranks_by_similarity(
         self, query_service, mock_repository, mock_embedding_service, sample_documents
     ):
         """Test search ranks documents by cosine similarity."""
-        mock_repository.list_all.return_value = sample_documents
+        self._use_documents(mock_repository, sample_documents)
         
         # Query embedding identical to doc1
         query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
@@ -108,7 +123,7 @@ class TestQueryService:
         self, query_service, mock_repository, mock_embedding_service, sample_documents
     ):
         """Test search uses default top_k when not specified."""
-        mock_repository.list_all.return_value = sample_documents
+        self._use_documents(mock_repository, sample_documents)
         
         query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
         mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
@@ -123,7 +138,7 @@ class TestQueryService:
         self, query_service, mock_repository, mock_embedding_service, sample_documents
     ):
         """Test search limits top_k to available document count."""
-        mock_repository.list_all.return_value = sample_documents
+        self._use_documents(mock_repository, sample_documents)
         
         query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
         mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
@@ -138,7 +153,7 @@ class TestQueryService:
         self, query_service, mock_repository, mock_embedding_service, sample_documents
     ):
         """Test search results have correct structure."""
-        mock_repository.list_all.return_value = sample_documents
+        self._use_documents(mock_repository, sample_documents)
         
         query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
         mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
@@ -192,7 +207,7 @@ class TestQueryService:
             content="Only content",
             embedding=np.array([1.0, 0.0, 0.0], dtype=np.float32).tobytes()
         )
-        mock_repository.list_all.return_value = [single_doc]
+        self._use_documents(mock_repository, [single_doc])
         
         query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
         mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
@@ -202,3 +217,153 @@ class TestQueryService:
         assert len(results) == 1
         assert results[0].id == 1
         assert results[0].title == "Only Document"
+
+    def test_search_loads_index_only_once(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents
+    ):
+        """Test repeated searches reuse the resident matrix instead of reloading."""
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+
+        query_service.search("first", top_k=1)
+        query_service.search("second", top_k=1)
+
+        mock_repository.list_embeddings.assert_called_once()
+        mock_repository.list_all.assert_not_called()
+
+    def test_search_sees_vectors_added_after_load(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents
+    ):
+        """Test documents appended to the index are ranked without a reload."""
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([0.0, 0.0, 1.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+        query_service.search("warm up", top_k=1)
+
+        new_doc = DocumentModel(
+            id=4,
+            title="Document 4",
+            content="Content 4",
+            embedding=query_emb.tobytes()
+        )
+        mock_repository.get_titles_by_ids.side_effect = lambda ids: {
+            doc.id: doc.title for doc in sample_documents + [new_doc] if doc.id in ids
+        }
+        query_service.index.add([4], query_emb.reshape(1, -1))
+
+        results = query_service.search("z axis", top_k=1)
+
+        assert results[0].id == 4
+        assert mock_repository.list_embeddings.call_count == 1
+
+    def test_search_with_ivf_engine(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents, monkeypatch
+    ):
+        """Test the IVF engine is used when selected in settings."""
+        from app.infrastructure.settings import settings
+        monkeypatch.setattr(settings, "search_engine", "ivf")
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+
+        results = query_service.search("test query", top_k=1, nprobe=3)
+
+        assert results[0].id == 1
+        assert query_service.index.engine("ivf").size == 3
+
+    def test_search_with_hnsw_engine(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents,
+        monkeypatch, tmp_path
+    ):
+        """Test the HNSW engine is used when selected and honours ef_search."""
+        from app.infrastructure.settings import settings
+        monkeypatch.setattr(settings, "search_engine", "hnsw")
+        monkeypatch.setattr(settings, "hnsw_index_path", str(tmp_path / "graph.npz"))
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+
+        results = query_service.search("test query", top_k=2, ef_search=10)
+
+        assert [r.id for r in results] == [2, 3]
+
+    def test_search_with_pq_engine(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents, monkeypatch
+    ):
+        """Test the PQ engine re-ranks candidates with exact scores."""
+        from app.infrastructure.settings import settings
+        monkeypatch.setattr(settings, "search_engine", "pq")
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+
+        results = query_service.search("test query", top_k=1)
+
+        assert results[0].id == 1
+        assert results[0].score == pytest.approx(1.0, abs=1e-5)
+
+    def test_search_engine_can_be_selected_per_query(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents, monkeypatch
+    ):
+        """Test the engine argument overrides SEARCH_ENGINE for one query."""
+        from app.infrastructure.settings import settings
+        monkeypatch.setattr(settings, "search_engine", "exact")
+        self._use_documents(mock_repository, sample_documents)
+        query_emb = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = query_emb.reshape(1, -1)
+
+        results = query_service.search("test query", top_k=2, engine="binary")
+
+        assert [r.id for r in results] == [2, 3]
+        assert results[0].score == pytest.approx(1.0, abs=1e-5)
+        assert "binary" in query_service.index._engines
+
+    def test_search_batch_matches_single_searches(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents
+    ):
+        """Test a batch returns the same rankings as one search per query, each with its top_k."""
+        self._use_documents(mock_repository, sample_documents)
+        queries = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+        mock_embedding_service.embed_texts.return_value = queries
+
+        batch = query_service.search_batch(["first", "second"], [3, 1])
+
+        mock_embedding_service.embed_texts.return_value = queries[:1]
+        first = query_service.search("first", top_k=3)
+        mock_embedding_service.embed_texts.return_value = queries[1:]
+        second = query_service.search("second", top_k=1)
+        assert batch == [first, second]
+        assert [r.id for r in batch[0]] == [1, 3, 2]
+        assert [r.id for r in batch[1]] == [2]
+
+    def test_search_batch_hydrates_titles_once(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents
+    ):
+        """Test titles for every query are fetched with a single repository call."""
+        self._use_documents(mock_repository, sample_documents)
+        mock_embedding_service.embed_texts.return_value = np.eye(3, dtype=np.float32)
+
+        query_service.search_batch(["a", "b", "c"], [2, 2, 2])
+
+        mock_repository.get_titles_by_ids.assert_called_once()
+        mock_embedding_service.embed_queries.assert_called_once_with(["a", "b", "c"])
+
+    def test_search_batch_with_approximate_engine(
+        self, query_service, mock_repository, mock_embedding_service, sample_documents
+    ):
+        """Test non-exact engines are searched per query inside the batch."""
+        self._use_documents(mock_repository, sample_documents)
+        mock_embedding_service.embed_texts.return_value = np.array(
+            [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]], dtype=np.float32
+        )
+
+        results = query_service.search_batch(["a", "b"], [1, 1], engine="binary")
+
+        assert [[r.id for r in rows] for rows in results] == [[2], [1]]
+
+    def test_search_batch_empty_index(self, query_service, mock_repository):
+        """Test a batch against no documents returns one empty list per query."""
+        mock_repository.list_embeddings.return_value = []
+
+        assert query_service.search_batch(["a", "b"], [None, None]) == [[], []]
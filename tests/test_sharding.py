@@ -0,0 +1,218 @@
+"""Tests for the sharded vector index and its scatter-gather search."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.index.bm25 import BM25Index
+from app.core.index.sharding import HASH, RANGE, ShardedIndex, ShardPartition
+from app.core.index.topk import chunked_top_k
+from app.core.index.vector_index import VectorIndex
+from app.core.services.query_service import QueryService
+from app.infrastructure.persistence.db.base import Base
+from app.infrastructure.persistence.embedding_codec import encode_embedding
+from app.infrastructure.persistence.models.document import DocumentModel
+from app.infrastructure.persistence.repositories.document_repository import DocumentRepository
+from tests.fake_models import synthetic_shard_attributes, synthetic_shard_rows
+
+
+@pytest.fixture(scope="module")
+def rows():
+    """Every synthetic row, as one unsharded partition."""
+    return synthetic_shard_rows(ShardPartition(1), 0)
+
+
+@pytest.fixture(scope="module")
+def sharded():
+    """Three hash shards over the synthetic rows, one spawned process each."""
+    index = ShardedIndex(ShardPartition(3, HASH), loader=synthetic_shard_rows,
+                         attribute_loader=synthetic_shard_attributes)
+    index.ensure_loaded()
+    yield index
+    index.close()
+
+
+class TestShardPartition:
+    """Tests for assigning ids to shards."""
+
+    @pytest.mark.parametrize("partition", [
+        ShardPartition(4, HASH),
+        ShardPartition.by_range(4, 1, 100),
+        ShardPartition.by_range(3, None, None),
+    ])
+    def test_every_id_has_exactly_one_shard(self, partition):
+        """Test shard_of agrees with selects, which picks each id once."""
+        ids = np.arange(1, 201)
+
+        selected = np.array([partition.selects(shard, ids) for shard in range(partition.shards)])
+
+        np.testing.assert_array_equal(selected.sum(axis=0), np.ones(len(ids)))
+        np.testing.assert_array_equal(selected.argmax(axis=0), partition.shard_of(ids))
+
+    def test_range_cuts_are_even(self):
+        """Test range shards split the known ids evenly; later ids go to the last shard."""
+        partition = ShardPartition.by_range(4, 1, 100)
+
+        assert partition.scheme == RANGE
+        assert partition.cuts == [26, 51, 76]
+        assert partition.shard_of(np.array([1, 26, 100, 5000])).tolist() == [0, 1, 3, 3]
+
+    def test_repository_lists_one_shard(self, db_session):
+        """Test the same condition filters SQL rows, as the shard processes use it."""
+        repo = DocumentRepository(db_session)
+        repo.create_many([
+            DocumentModel(title=f"Doc {i}", content="c", embedding=np.full(2, i, dtype=np.float32).tobytes())
+            for i in range(1, 7)
+        ])
+        partition = ShardPartition(2, HASH)
+
+        odd = repo.list_embeddings(id_filter=lambda ids: partition.selects(1, ids))
+
+        assert [doc_id for doc_id, _ in odd] == [1, 3, 5]
+        assert repo.id_range() == (1, 6)
+
+
+class TestShardedIndex:
+    """Tests for scatter-gather search across shard processes."""
+
+    def test_rows_are_split_across_shards(self, sharded):
+        """Test each shard holds its partition only."""
+        assert sharded.sizes == [200, 200, 200]
+        assert len(sharded) == 600
+
+    def test_merge_matches_unsharded_search(self, sharded, rows):
+        """Test merged shard top-k equals an exact search over the whole matrix."""
+        ids = np.array([doc_id for doc_id, _ in rows])
+        matrix = np.vstack([vector for _, vector in rows])
+        queries = np.random.default_rng(3).standard_normal((5, 16)).astype(np.float32)
+        top_ks = [1, 5, 10, 50, 600]
+
+        merged = sharded.search(queries, top_ks)
+
+        for query, top_k, (found_ids, found_scores) in zip(queries, top_ks, merged):
+            best, scores = chunked_top_k(matrix, top_k, lambda block: block @ query, block_size=128)
+            np.testing.assert_array_equal(found_ids, ids[best])
+            np.testing.assert_allclose(found_scores, scores, atol=1e-6)
+
+    def test_allowed_restricts_every_shard(self, sharded, rows):
+        """Test candidate ids are scored on the shards that own them."""
+        query = rows[41][1]
+
+        found_ids, found_scores = sharded.search(query, [3], allowed=np.array([7, 42, 300, 9999]))[0]
+
+        assert found_ids[0] == 42
+        assert sorted(found_ids.tolist()) == [7, 42, 300]
+        assert found_scores[0] == pytest.approx(1.0, abs=1e-5)
+
+    def test_filter_is_evaluated_on_every_shard(self, sharded):
+        """Test each shard filters its own rows and the parent gathers the ids."""
+        found = sharded.filter_ids({"parity": "even", "n": {"$lte": 10}})
+        restricted = sharded.filter_ids({"n": {"$gt": 595}}, allowed=np.array([3, 597, 598, 9999]))
+
+        assert found.tolist() == [2, 4, 6, 8, 10]
+        assert restricted.tolist() == [597, 598]
+
+    def test_add_routes_to_owning_shard(self):
+        """Test new vectors go to the shard of their id and become searchable."""
+        index = ShardedIndex(ShardPartition.by_range(2, 1, 600), loader=synthetic_shard_rows,
+                             attribute_loader=synthetic_shard_attributes)
+        try:
+            index.add([601], np.ones((1, 16), dtype=np.float32))
+            assert not index.loaded
+
+            index.ensure_loaded()
+            index.filter_ids({"parity": "odd"})
+            index.add([601, 602], np.ones((2, 16), dtype=np.float32) / 4, [{"parity": "new"}, None])
+
+            assert index.sizes == [300, 302]
+            assert index.search(np.ones(16), [2])[0][0].tolist() == [601, 602]
+            assert index.filter_ids({"parity": "new"}).tolist() == [601]
+        finally:
+            index.close()
+
+    def test_shards_read_their_partition_from_the_database(self, tmp_path, monkeypatch):
+        """Test the default loader: shard processes read the configured database themselves."""
+        url = f"sqlite:///{tmp_path / 'shards.db'}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            DocumentRepository(db).create_many([
+                DocumentModel(
+                    title=f"Doc {i}",
+                    content="c",
+                    embedding=encode_embedding(np.array([1.0, i / 10], dtype=np.float32), "float32"),
+                    embedding_dtype="float32",
+                )
+                for i in range(1, 11)
+            ])
+        engine.dispose()
+        monkeypatch.setenv("DATABASE_URL", url)
+        index = ShardedIndex(ShardPartition.by_range(2, 1, 10))
+        try:
+            index.ensure_loaded()
+            found_ids, _ = index.search(np.array([0.0, 1.0]), [3])[0]
+
+            assert index.sizes == [5, 5]
+            assert found_ids.tolist() == [10, 9, 8]
+        finally:
+            index.close()
+
+
+class TestShardedQueryService:
+    """Tests for QueryService routing dense ranking to the shards."""
+
+    @pytest.fixture
+    def repo(self, rows):
+        repo = Mock()
+        repo.list_embeddings.return_value = rows
+        repo.get_titles_by_ids.side_effect = lambda ids: {i: f"Doc {i}" for i in ids}
+        return repo
+
+    @pytest.fixture
+    def embedding_service(self):
+        service = Mock()
+        queries = np.random.default_rng(5).standard_normal((3, 16)).astype(np.float32)
+        service.embed_query.return_value = queries[0]
+        service.embed_queries.return_value = queries
+        return service
+
+    def test_search_matches_resident_index(self, repo, embedding_service, sharded):
+        """Test single and batch searches return the same results with and without shards."""
+        resident = QueryService(repo, embedding_service, VectorIndex(), lexical_index=BM25Index())
+        sharded_service = QueryService(repo, embedding_service, VectorIndex(), lexical_index=BM25Index(),
+                                       shards=sharded)
+
+        expected = resident.search("q", top_k=10)
+        found = sharded_service.search("q", top_k=10)
+        expected_batch = resident.search_batch(["a", "b", "c"], [3, 5, 10])
+        found_batch = sharded_service.search_batch(["a", "b", "c"], [3, 5, 10])
+
+        assert [r.id for r in found] == [r.id for r in expected]
+        assert [r.score for r in found] == pytest.approx([r.score for r in expected], rel=1e-5)
+        assert [[r.id for r in results] for results in found_batch] == \
+            [[r.id for r in results] for results in expected_batch]
+        assert not sharded_service.index.loaded
+
+    def test_filter_runs_on_shards(self, repo, embedding_service, sharded):
+        """Test a filtered search is restricted by the shards without loading the resident index."""
+        resident = QueryService(repo, embedding_service, VectorIndex(), lexical_index=BM25Index())
+        repo.list_attributes.return_value = synthetic_shard_attributes(ShardPartition(1), 0)
+        service = QueryService(repo, embedding_service, VectorIndex(), lexical_index=BM25Index(), shards=sharded)
+
+        expected = resident.search("q", top_k=5, metadata_filter={"parity": "odd"})
+        found = service.search("q", top_k=5, metadata_filter={"parity": "odd"})
+
+        assert [r.id for r in found] == [r.id for r in expected]
+        assert all(r.id % 2 == 1 for r in found)
+        assert not service.index.loaded
+        repo.list_attributes.assert_called_once()
+
+    def test_candidates_are_scored_on_shards(self, repo, embedding_service, sharded):
+        """Test candidate scoring uses loaded shards instead of gathering embeddings."""
+        service = QueryService(repo, embedding_service, VectorIndex(), lexical_index=BM25Index(), shards=sharded)
+
+        ids, _ = service.rank_candidates(embedding_service.embed_query.return_value, np.array([5, 6, 7]), 2)
+
+        assert set(ids.tolist()) <= {5, 6, 7}
+        repo.get_embeddings.assert_not_called()
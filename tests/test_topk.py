@@ -0,0 +1,99 @@
+"""Tests for partial and chunked top-k selection."""
+import pytest
+import numpy as np
+
+from app.core.index.topk import top_k_indices, chunked_top_k, top_k_rows, chunked_top_k_rows
+
+
+class TestTopK:
+    """Test suite for top-k selection helpers."""
+
+    @pytest.fixture
+    def corpus(self):
+        """Create a random normalized corpus and query."""
+        rng = np.random.default_rng(42)
+        matrix = rng.standard_normal((1000, 16)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = matrix[7] + 0.1
+        return matrix, query / np.linalg.norm(query)
+
+    def test_top_k_indices_matches_full_argsort(self):
+        """Test partial selection returns the same winners as a full sort."""
+        scores = np.random.default_rng(0).random(500).astype(np.float32)
+
+        result = top_k_indices(scores, 10)
+
+        np.testing.assert_array_equal(result, np.argsort(-scores)[:10])
+
+    def test_top_k_indices_orders_best_first(self):
+        """Test returned indices are sorted by descending score."""
+        scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+
+        np.testing.assert_array_equal(top_k_indices(scores, 3), [1, 3, 2])
+
+    def test_top_k_indices_clamps_k(self):
+        """Test k larger than the input returns every index."""
+        scores = np.array([0.2, 0.8], dtype=np.float32)
+
+        np.testing.assert_array_equal(top_k_indices(scores, 10), [1, 0])
+        assert len(top_k_indices(scores, 0)) == 0
+
+    @pytest.mark.parametrize("block_size", [1, 7, 128, 10_000])
+    def test_chunked_top_k_matches_exact(self, corpus, block_size):
+        """Test blockwise scoring is exact regardless of block size."""
+        matrix, query = corpus
+        sims = matrix @ query
+
+        idx, scores = chunked_top_k(matrix, 5, lambda block: block @ query, block_size=block_size)
+
+        np.testing.assert_array_equal(idx, np.argsort(-sims)[:5])
+        np.testing.assert_allclose(scores, np.sort(sims)[::-1][:5], rtol=1e-6)
+
+    def test_chunked_top_k_scores_each_block_once(self, corpus):
+        """Test the scorer only ever sees blocks of at most block_size rows."""
+        matrix, query = corpus
+        seen = []
+
+        def score(block):
+            seen.append(len(block))
+            return block @ query
+
+        chunked_top_k(matrix, 3, score, block_size=300)
+
+        assert seen == [300, 300, 300, 100]
+
+    def test_chunked_top_k_empty_matrix(self):
+        """Test an empty matrix yields empty results."""
+        idx, scores = chunked_top_k(np.empty((0, 4), dtype=np.float32), 5, lambda b: b.sum(axis=1))
+
+        assert len(idx) == 0
+        assert len(scores) == 0
+
+    def test_top_k_rows_matches_per_row_selection(self):
+        """Test row-wise selection equals top_k_indices on every row."""
+        scores = np.random.default_rng(1).standard_normal((5, 50)).astype(np.float32)
+
+        idx, best = top_k_rows(scores, 4)
+
+        for row in range(5):
+            np.testing.assert_array_equal(idx[row], top_k_indices(scores[row], 4))
+            np.testing.assert_array_equal(best[row], scores[row][idx[row]])
+
+    def test_top_k_rows_clamps_k(self):
+        """Test k larger than the row length returns every column sorted."""
+        idx, _ = top_k_rows(np.array([[0.1, 0.9, 0.5]], dtype=np.float32), 10)
+
+        np.testing.assert_array_equal(idx, [[1, 2, 0]])
+
+    @pytest.mark.parametrize("block_size", [64, 333, 5000])
+    def test_chunked_top_k_rows_matches_single_queries(self, corpus, block_size):
+        """Test the batched scan returns each query's chunked_top_k result."""
+        matrix, _ = corpus
+        queries = matrix[[3, 500, 999]] + 0.05
+
+        idx, scores = chunked_top_k_rows(matrix, 5, lambda block: queries @ block.T, block_size=block_size)
+
+        for row, query in enumerate(queries):
+            expected_idx, expected_scores = chunked_top_k(matrix, 5, lambda block: block @ query)
+            np.testing.assert_array_equal(idx[row], expected_idx)
+            np.testing.assert_allclose(scores[row], expected_scores, rtol=1e-6)
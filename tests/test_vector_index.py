@@ -0,0 +1,103 @@
+"""Tests for VectorIndex."""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from app.core.index.vector_index import VectorIndex, get_vector_index
+
+
+class TestVectorIndex:
+    """Test suite for VectorIndex class."""
+
+    @staticmethod
+    def _repo_with(vectors):
+        repo = Mock()
+        repo.list_embeddings.return_value = [
+            (i + 1, np.asarray(v, dtype=np.float32)) for i, v in enumerate(vectors)
+        ]
+        return repo
+
+    def test_new_index_is_empty_and_not_loaded(self):
+        """Test a fresh index has no vectors and is not loaded."""
+        index = VectorIndex()
+
+        assert len(index) == 0
+        assert not index.loaded
+        assert index.dim is None
+        assert index.matrix.shape[0] == 0
+
+    def test_ensure_loaded_builds_contiguous_matrix(self):
+        """Test loading produces a contiguous float32 matrix aligned with ids."""
+        index = VectorIndex()
+        index.ensure_loaded(self._repo_with([[1.0, 0.0], [0.0, 1.0]]))
+
+        assert index.loaded
+        assert index.matrix.dtype == np.float32
+        assert index.matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(index.ids, [1, 2])
+        np.testing.assert_array_equal(index.matrix, [[1.0, 0.0], [0.0, 1.0]])
+
+    def test_ensure_loaded_reads_repository_once(self):
+        """Test subsequent ensure_loaded calls do not hit the repository."""
+        index = VectorIndex()
+        repo = self._repo_with([[1.0, 0.0]])
+
+        index.ensure_loaded(repo)
+        index.ensure_loaded(repo)
+
+        repo.list_embeddings.assert_called_once()
+
+    def test_add_appends_past_initial_capacity(self):
+        """Test incremental appends grow the buffer and keep earlier rows."""
+        index = VectorIndex()
+        index.ensure_loaded(self._repo_with([[1.0, 0.0]]))
+        extra = np.random.rand(VectorIndex._INITIAL_CAPACITY + 10, 2).astype(np.float32)
+
+        index.add(range(2, len(extra) + 2), extra)
+
+        assert len(index) == len(extra) + 1
+        np.testing.assert_array_equal(index.matrix[0], [1.0, 0.0])
+        np.testing.assert_array_equal(index.matrix[1:], extra)
+        assert index.ids[-1] == len(extra) + 1
+
+    def test_add_skips_rows_read_by_the_load(self):
+        """Test ids committed while the index loaded are not appended a second time."""
+        index = VectorIndex()
+        index.ensure_loaded(self._repo_with([[1.0, 0.0], [0.0, 1.0]]))
+
+        index.add([2, 3], np.array([[0.0, 1.0], [0.6, 0.8]], dtype=np.float32))
+
+        np.testing.assert_array_equal(index.ids, [1, 2, 3])
+        np.testing.assert_allclose(index.matrix[2], [0.6, 0.8])
+
+    def test_add_before_load_is_ignored(self):
+        """Test rows added before the first load are left to the load itself."""
+        index = VectorIndex()
+
+        index.add([1], np.array([[1.0, 0.0]], dtype=np.float32))
+
+        assert len(index) == 0
+
+    def test_add_rejects_dimension_mismatch(self):
+        """Test appending vectors of a different dimension raises ValueError."""
+        index = VectorIndex()
+        index.ensure_loaded(self._repo_with([[1.0, 0.0]]))
+
+        with pytest.raises(ValueError, match="dimension"):
+            index.add([2], np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+
+    def test_clear_forces_reload(self):
+        """Test clear drops vectors and the next ensure_loaded reloads."""
+        index = VectorIndex()
+        repo = self._repo_with([[1.0, 0.0]])
+        index.ensure_loaded(repo)
+
+        index.clear()
+        index.ensure_loaded(repo)
+
+        assert repo.list_embeddings.call_count == 2
+        assert len(index) == 1
+
+    def test_get_vector_index_singleton(self):
+        """Test that get_vector_index returns a process-wide instance."""
+        assert get_vector_index() is get_vector_index()